@@ -0,0 +1,56 @@
+"""
+Generic block render time against pin count.
+
+draw_generic_block draws its pin wires as one collection over a static layer
+rasterized once per scene, so a render should cost about the same at 4 pins
+as at 64+. Times the scene build (first render of a layout) and the mean of
+uncached renders on the retained scene, with every other pin active. With
+--backend svg the first render builds the SVG template instead.
+
+Usage:
+    python benchmarks/pin_scaling.py [--repeat N] [--max-inputs N] [--backend matplotlib|svg]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import circuits
+
+def block_args(inputs, outputs, phase):
+    input_labels = [f"I{i}" for i in range(inputs)]
+    output_labels = [f"O{i}" for i in range(outputs)]
+    active_inputs = {label: (i + phase) % 2 for i, label in enumerate(input_labels)}
+    active_outputs = {label: (i + phase) % 2 for i, label in enumerate(output_labels)}
+    return ("Block", input_labels, output_labels, active_inputs, active_outputs)
+
+def render(backend, args):
+    _, normalized, _ = circuits.draw_generic_block.cache_key(*args)
+    return circuits.draw_generic_block.backends[backend](**normalized)
+
+def main():
+    parser = argparse.ArgumentParser(description="Time draw_generic_block against its pin count.")
+    parser.add_argument("--repeat", type=int, default=20, help="Renders per pin count")
+    parser.add_argument("--max-inputs", type=int, default=128, help="Largest input count (outputs are half)")
+    parser.add_argument("--backend", choices=circuits.CIRCUIT_BACKENDS, default="matplotlib")
+    args = parser.parse_args()
+
+    render(args.backend, block_args(2, 1, 0))  # warm imports and fonts
+    inputs = 4
+    while inputs <= args.max_inputs:
+        outputs = inputs // 2
+        circuits.scene_pool.clear()
+        start = time.perf_counter()
+        render(args.backend, block_args(inputs, outputs, 0))
+        build = time.perf_counter() - start
+        start = time.perf_counter()
+        for i in range(args.repeat):
+            render(args.backend, block_args(inputs, outputs, i + 1))
+        per_render = (time.perf_counter() - start) / args.repeat
+        print(f"{inputs:4d} in / {outputs:3d} out   first render {build * 1e3:7.1f} ms   "
+              f"render {per_render * 1e3:7.2f} ms")
+        inputs *= 2
+
+if __name__ == "__main__":
+    main()
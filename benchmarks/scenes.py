@@ -0,0 +1,54 @@
+"""
+Retained scenes vs full rebuilds.
+
+Times uncached matplotlib renders of the seven-segment display and the 4-to-1
+multiplexer in two modes: "rebuild" builds a fresh figure for every render
+(the scene pool is emptied first), "retained" checks a pooled scene out and
+only restyles its signal-dependent artists. Both bypass the render caches.
+
+Usage:
+    python benchmarks/scenes.py [--repeat N]
+"""
+import argparse
+import itertools
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import circuits
+
+def states():
+    """(draw function, args) cycles covering each diagram's states."""
+    yield circuits.draw_seven_segment, [(digit,) for digit in range(10)]
+    yield circuits.draw_mux_4to1, [(list(d), list(s)) for d, s in itertools.product(
+        itertools.product((0, 1), repeat=4), itertools.product((0, 1), repeat=2))]
+
+def render(draw, args):
+    _, normalized, _ = draw.cache_key(*args)
+    return draw.backends['matplotlib'](**normalized)
+
+def time_renders(draw, calls, repeat, rebuild):
+    """Mean seconds per render over `repeat` renders cycling through `calls`."""
+    circuits.scene_pool.clear()
+    render(draw, calls[0])  # warm imports and fonts
+    start = time.perf_counter()
+    for i in range(repeat):
+        if rebuild:
+            circuits.scene_pool.clear()
+        render(draw, calls[i % len(calls)])
+    return (time.perf_counter() - start) / repeat
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare retained-scene renders with full rebuilds.")
+    parser.add_argument("--repeat", type=int, default=50, help="Renders per diagram and mode")
+    args = parser.parse_args()
+
+    for draw, calls in states():
+        rebuild = time_renders(draw, calls, args.repeat, rebuild=True)
+        retained = time_renders(draw, calls, args.repeat, rebuild=False)
+        print(f"{draw.__name__:20s} rebuild {rebuild * 1e3:7.1f} ms   retained {retained * 1e3:7.1f} ms   "
+              f"{rebuild / retained:4.1f}x")
+
+if __name__ == "__main__":
+    main()
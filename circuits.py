@@ -1,77 +1,489 @@
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
+import contextlib
+import functools
+import hashlib
+import inspect
 import io
+import math
+import os
+import re
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from xml.sax.saxutils import escape
+
+from netlist import SEVEN_SEGMENT_DIGITS  # lit segments per digit, shared with the decoder netlist
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process deployments only need the thread lock
+    fcntl = None
+
+# Rendering backend: 'matplotlib' (PNG) or 'svg' (template-filled SVG).
+CIRCUIT_BACKENDS = ('matplotlib', 'svg')
+CIRCUIT_BACKEND = os.environ.get("CIRCUIT_BACKEND", "matplotlib")
+
+def set_circuit_backend(name):
+    """Selects the backend used by all draw_* functions."""
+    global CIRCUIT_BACKEND
+    if name not in CIRCUIT_BACKENDS:
+        raise ValueError(f"Unknown circuit backend '{name}'. Choose from {CIRCUIT_BACKENDS}.")
+    CIRCUIT_BACKEND = name
+
+def _load_matplotlib():
+    """Imports matplotlib on first use so the SVG backend never pays for it."""
+    import matplotlib.patches as patches
+    return patches
+
+def _new_figure(figsize):
+    """
+    Creates a standalone figure with its own Agg canvas.
+    No pyplot figure manager is involved, so each render owns all of its state
+    and concurrent sessions can draw in parallel without sharing anything.
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    fig = Figure(figsize=figsize, facecolor='none')
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    return fig, ax
 
 def get_line_color(state):
     """Returns color based on logic state: Green for 1, Dark Grey for 0."""
     return '#22c55e' if state else '#475569'
 
-def draw_logic_gate(gate_type, inputs, output_state):
+# --- Render Cache ---
+# The experiments only ever draw a handful of distinct states (e.g. 6 gates x 4
+# input pairs), so finished images are memoized process-wide. Entries are
+# immutable bytes, which makes them safe to share between Streamlit sessions.
+
+DEFAULT_RENDER_CACHE_BYTES = int(os.environ.get("CIRCUIT_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+
+class RenderCache:
     """
-    Draws a simple logic gate representation using matplotlib.
+    Thread-safe LRU cache of rendered images with a byte budget.
+    """
+    def __init__(self, max_bytes=DEFAULT_RENDER_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key, data):
+        data = bytes(data)
+        if len(data) > self.max_bytes:
+            return data  # Too large to ever fit; serve it uncached
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= len(old)
+            self._entries[key] = data
+            self.current_bytes += len(data)
+            self._evict()
+        return data
+
+    def resize(self, max_bytes):
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _evict(self):
+        # Caller must hold the lock
+        while self.current_bytes > self.max_bytes and self._entries:
+            _, data = self._entries.popitem(last=False)
+            self.current_bytes -= len(data)
+            self.evictions += 1
+
+render_cache = RenderCache()
+
+# --- Disk Render Cache ---
+# A second, on-disk tier shared by every Streamlit worker process on a host, so
+# identical images are rendered once per deploy instead of once per process.
+# Bump RENDERER_VERSION whenever drawing code changes the output: it is part of
+# every key and older versions' directories are discarded on startup.
+
+RENDERER_VERSION = 1
+DEFAULT_DISK_CACHE_DIR = os.environ.get(
+    "CIRCUIT_DISK_CACHE_DIR", os.path.join(tempfile.gettempdir(), "dld_lab_render_cache"))
+DEFAULT_DISK_CACHE_BYTES = int(os.environ.get("CIRCUIT_DISK_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+_VERSION_DIR = re.compile(r"^v\d+$")
+
+class DiskRenderCache:
+    """
+    Content-addressed render cache on disk, safe for concurrent processes.
+
+    Writes go to a temp file that is atomically renamed into place, so readers
+    never see a partial entry and need no lock. Eviction (oldest access time
+    first) runs under an exclusive file lock. Reads refresh the entry's mtime,
+    which serves as the LRU clock across processes.
+    """
+    def __init__(self, root, max_bytes=DEFAULT_DISK_CACHE_BYTES, version=RENDERER_VERSION):
+        self.root = root
+        self.version = version
+        self.max_bytes = max_bytes
+        self.directory = os.path.join(root, f"v{version}")
+        self._lock = threading.Lock()
+        self._bytes_since_evict = 0
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        os.makedirs(self.directory, exist_ok=True)
+        self._discard_old_versions()
+
+    def key_digest(self, key):
+        return hashlib.sha256(repr((self.version,) + key).encode('utf-8')).hexdigest()
+
+    def _path(self, digest):
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def get(self, key):
+        path = self._path(self.key_digest(key))
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            os.utime(path)  # LRU bookkeeping only; the read already succeeded
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, key, data):
+        path = self._path(self.key_digest(key))
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            return  # A read-only or full disk only costs us the cache
+        with self._lock:
+            self.writes += 1
+            self._bytes_since_evict += len(data)
+            due = self._bytes_since_evict > self.max_bytes // 10
+            if due:
+                self._bytes_since_evict = 0
+        if due:
+            self.evict()
+
+    @contextlib.contextmanager
+    def _file_lock(self):
+        with open(os.path.join(self.root, ".lock"), 'a+') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _entries(self):
+        for bucket in os.scandir(self.directory):
+            if not bucket.is_dir():
+                continue
+            for entry in os.scandir(bucket.path):
+                if not entry.name.endswith(".tmp"):
+                    yield entry
+
+    def evict(self):
+        """Deletes least recently used entries until the cache is under 90% of its budget."""
+        with self._file_lock():
+            entries = []
+            total = 0
+            for entry in self._entries():
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
+            if total <= self.max_bytes:
+                return
+            entries.sort()
+            target = int(self.max_bytes * 0.9)
+            for _, size, path in entries:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                with self._lock:
+                    self.evictions += 1
+
+    def _discard_old_versions(self):
+        with self._file_lock():
+            for entry in os.scandir(self.root):
+                # Only our own version directories ("v<digits>"); the root may be shared
+                if entry.is_dir() and _VERSION_DIR.match(entry.name) and entry.path != self.directory:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+
+    def clear(self):
+        with self._file_lock():
+            shutil.rmtree(self.directory, ignore_errors=True)
+            os.makedirs(self.directory, exist_ok=True)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "directory": self.directory,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+def _open_disk_cache():
+    if not DEFAULT_DISK_CACHE_DIR:
+        return None  # Disabled with CIRCUIT_DISK_CACHE_DIR=""
+    try:
+        return DiskRenderCache(DEFAULT_DISK_CACHE_DIR)
+    except OSError:
+        return None
+
+disk_cache = _open_disk_cache()
+
+def render_cache_stats():
+    """Returns hit/miss/size counters for the shared render caches."""
+    stats = render_cache.stats()
+    stats["disk"] = disk_cache.stats() if disk_cache is not None else None
+    return stats
+
+def _normalize_arg(value):
+    """
+    Converts an argument to the plain form used for rendering.
+    Booleans become 0/1 so that True and 1 draw (and cache) identically.
+    """
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (list, tuple)):
+        return [_normalize_arg(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _normalize_arg(v) for k, v in value.items()}
+    return value
+
+def _freeze_arg(value):
+    """Converts a normalized argument to a hashable cache-key component."""
+    if isinstance(value, list):
+        return tuple(_freeze_arg(v) for v in value)
+    if isinstance(value, dict):
+        return ('__dict__',) + tuple((k, _freeze_arg(v)) for k, v in value.items())
+    return value
+
+def cached_render(draw_func):
+    """
+    Memoizes a draw_* function that returns encoded image bytes.
+    Callers still receive a fresh BytesIO, backed by the shared cached bytes.
+    The decorated function is the matplotlib implementation; other backends
+    attach theirs with @draw_xxx.register_backend('svg').
+    """
+    signature = inspect.signature(draw_func)
+    backends = {'matplotlib': draw_func}
+
+    def cache_key(*args, **kwargs):
+        """Returns (key, normalized kwargs, backend) for a call with these arguments."""
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        normalized = {name: _normalize_arg(v) for name, v in bound.arguments.items()}
+        backend = CIRCUIT_BACKEND if CIRCUIT_BACKEND in backends else 'matplotlib'
+        key = (draw_func.__name__, backend) + tuple(_freeze_arg(v) for v in normalized.values())
+        return key, normalized, backend
+
+    @functools.wraps(draw_func)
+    def wrapper(*args, **kwargs):
+        key, normalized, backend = cache_key(*args, **kwargs)
+        data = render_cache.get(key)
+        if data is None:
+            if disk_cache is not None:
+                data = disk_cache.get(key)
+            if data is None:
+                data = backends[backend](**normalized)
+                if disk_cache is not None:
+                    disk_cache.put(key, data)
+            data = render_cache.put(key, data)
+        return io.BytesIO(data)
+
+    def register_backend(name):
+        def decorator(impl):
+            backends[name] = impl
+            return impl
+        return decorator
+
+    wrapper.uncached = draw_func
+    wrapper.cache_key = cache_key
+    wrapper.backends = backends
+    wrapper.register_backend = register_backend
+    return wrapper
+
+def _figure_to_png(fig, **savefig_kwargs):
+    """Encodes a finished figure as PNG bytes."""
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', bbox_inches='tight', transparent=True, facecolor='none', dpi=100, **savefig_kwargs)
+    return buf.getvalue()
+
+# --- Diagram Geometry ---
+# Shared by the matplotlib scenes and the SVG templates.
+
+_MUX_Y_POS = [6.0, 5.0, 4.0, 3.0]  # D0 at top to D3 at bottom
+
+_SEVEN_SEGMENTS = {
+    'a': [(2, 18), (3, 19), (9, 19), (10, 18), (9, 17), (3, 17)],
+    'b': [(10, 18), (11, 17), (11, 10.5), (10, 9.5), (9, 10.5), (9, 17)],
+    'c': [(10, 9.5), (11, 8.5), (11, 2), (10, 1), (9, 2), (9, 8.5)],
+    'd': [(10, 1), (9, 0), (3, 0), (2, 1), (3, 2), (9, 2)],
+    'e': [(2, 9.5), (3, 8.5), (3, 2), (2, 1), (1, 2), (1, 8.5)],
+    'f': [(2, 18), (3, 17), (3, 10.5), (2, 9.5), (1, 10.5), (1, 17)],
+    'g': [(2, 9.5), (3, 10.5), (9, 10.5), (10, 9.5), (9, 8.5), (3, 8.5)]
+}
+
+_FLIP_FLOP_INPUT_Y = {'S': 4, 'R': 2, 'J': 4, 'K': 2, 'D': 4, 'T': 4}
+
+# --- Retained Scenes ---
+# The geometry of a diagram never changes; only wire colors and value labels
+# do. Each diagram is therefore built once as a "scene" (a figure plus a dict
+# of the artists that depend on signal state) and later renders only restyle
+# those artists before re-encoding. Scenes are checked out of a pool, so a
+# figure is never touched by two threads at once.
+
+class ScenePool:
     """
-    fig, ax = plt.subplots(figsize=(8, 4), facecolor='none')
+    Pool of retained matplotlib scenes, keyed by builder and layout arguments.
+    """
+    def __init__(self, max_idle_per_key=4):
+        self.max_idle_per_key = max_idle_per_key
+        self._idle = {}
+        self._lock = threading.Lock()
+        self.builds = 0
+
+    @contextlib.contextmanager
+    def checkout(self, builder, *layout):
+        key = (builder.__name__,) + layout
+        with self._lock:
+            idle = self._idle.get(key)
+            scene = idle.pop() if idle else None
+        if scene is None:
+            scene = builder(*layout)
+            with self._lock:
+                self.builds += 1
+        try:
+            yield scene
+        finally:
+            with self._lock:
+                idle = self._idle.setdefault(key, [])
+                if len(idle) < self.max_idle_per_key:
+                    idle.append(scene)
+
+    def clear(self):
+        with self._lock:
+            self._idle.clear()
+
+scene_pool = ScenePool()
+
+def _build_logic_gate_scene(single_input):
+    patches = _load_matplotlib()
+    fig, ax = _new_figure(figsize=(8, 4))
     ax.set_xlim(0, 10)
     ax.set_ylim(0, 6)
     ax.axis('off')
-    
+    scene = {'fig': fig}
+
     # Gate symbol (simplified rectangle)
     gate_rect = patches.Rectangle((3.5, 2), 3, 2, fill=True, 
                                facecolor='#1e293b', edgecolor='#60a5fa', linewidth=2)
     ax.add_patch(gate_rect)
     
     # Gate label
-    ax.text(5, 3, gate_type, ha='center', va='center', 
-            fontsize=16, fontweight='bold', color='#60a5fa')
+    scene['label'] = ax.text(5, 3, '', ha='center', va='center', 
+                             fontsize=16, fontweight='bold', color='#60a5fa')
     
     # Input lines and labels
-    if gate_type == 'NOT':
-        color_in = get_line_color(inputs[0])
-        ax.plot([1, 3.5], [3, 3], color=color_in, linewidth=3)
-        ax.text(0.5, 3, f'A={inputs[0]}', ha='right', va='center', 
-                fontsize=12, color='#e4e7eb', fontweight='bold')
+    if single_input:
+        scene['line_a'], = ax.plot([1, 3.5], [3, 3], linewidth=3)
+        scene['text_a'] = ax.text(0.5, 3, '', ha='right', va='center', 
+                                  fontsize=12, color='#e4e7eb', fontweight='bold')
     else:
-        color_a = get_line_color(inputs[0])
-        color_b = get_line_color(inputs[1])
-        ax.plot([1, 3.5], [3.5, 3.5], color=color_a, linewidth=3)
-        ax.plot([1, 3.5], [2.5, 2.5], color=color_b, linewidth=3)
-        ax.text(0.5, 3.5, f'A={inputs[0]}', ha='right', va='center', 
-                fontsize=12, color='#e4e7eb', fontweight='bold')
-        ax.text(0.5, 2.5, f'B={inputs[1]}', ha='right', va='center', 
-                fontsize=12, color='#e4e7eb', fontweight='bold')
+        scene['line_a'], = ax.plot([1, 3.5], [3.5, 3.5], linewidth=3)
+        scene['line_b'], = ax.plot([1, 3.5], [2.5, 2.5], linewidth=3)
+        scene['text_a'] = ax.text(0.5, 3.5, '', ha='right', va='center', 
+                                  fontsize=12, color='#e4e7eb', fontweight='bold')
+        scene['text_b'] = ax.text(0.5, 2.5, '', ha='right', va='center', 
+                                  fontsize=12, color='#e4e7eb', fontweight='bold')
     
     # Output line and label
-    color_out = get_line_color(output_state)
-    ax.plot([6.5, 9], [3, 3], color=color_out, linewidth=3)
-    ax.text(9.5, 3, f'Out={output_state}', ha='left', va='center', 
-            fontsize=12, color='#22c55e' if output_state else '#64748b', fontweight='bold')
-    
-    # Save to buffer
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png', bbox_inches='tight', transparent=True, facecolor='none', dpi=100)
-    buf.seek(0)
-    plt.close(fig)
-    return buf
+    scene['line_out'], = ax.plot([6.5, 9], [3, 3], linewidth=3)
+    scene['text_out'] = ax.text(9.5, 3, '', ha='left', va='center', 
+                                fontsize=12, fontweight='bold')
+    return scene
 
-def draw_half_adder(a, b):
+@cached_render
+def draw_logic_gate(gate_type, inputs, output_state):
     """
-    Draws a half adder circuit with dynamic coloring.
+    Draws a simple logic gate representation using matplotlib.
     """
-    sum_val = a ^ b
-    carry_val = a and b
-    
-    fig, ax = plt.subplots(figsize=(10, 6), facecolor='none')
+    single_input = gate_type == 'NOT'
+    with scene_pool.checkout(_build_logic_gate_scene, single_input) as scene:
+        scene['label'].set_text(gate_type)
+        scene['line_a'].set_color(get_line_color(inputs[0]))
+        scene['text_a'].set_text(f'A={inputs[0]}')
+        if not single_input:
+            scene['line_b'].set_color(get_line_color(inputs[1]))
+            scene['text_b'].set_text(f'B={inputs[1]}')
+        scene['line_out'].set_color(get_line_color(output_state))
+        scene['text_out'].set_text(f'Out={output_state}')
+        scene['text_out'].set_color('#22c55e' if output_state else '#64748b')
+        return _figure_to_png(scene['fig'])
+
+def _build_half_adder_scene():
+    patches = _load_matplotlib()
+    fig, ax = _new_figure(figsize=(10, 6))
     ax.set_xlim(0, 12)
     ax.set_ylim(0, 8)
     ax.axis('off')
-    
-    # Colors
-    c_a = get_line_color(a)
-    c_b = get_line_color(b)
-    c_sum = get_line_color(sum_val)
-    c_carry = get_line_color(carry_val)
+    scene = {'fig': fig}
     
     # XOR gate for Sum
     xor_rect = patches.Rectangle((4, 4.5), 2.5, 1.5, fill=True, 
@@ -87,46 +499,65 @@ def draw_half_adder(a, b):
     ax.text(5.25, 2.25, 'AND', ha='center', va='center', 
             fontsize=12, fontweight='bold', color='#a78bfa')
     
-    # Input A lines
-    ax.plot([1, 4], [5.5, 5.5], color=c_a, linewidth=3) # To XOR
-    ax.plot([2, 2], [5.5, 2.5], color=c_a, linewidth=2, linestyle='--') # Drop to AND
-    ax.plot([2, 4], [2.5, 2.5], color=c_a, linewidth=3) # To AND
-    ax.text(0.5, 5.5, f'A={a}', ha='right', va='center', fontsize=12, color='#e4e7eb', fontweight='bold')
-    
-    # Input B lines
-    ax.plot([1, 4], [4.75, 4.75], color=c_b, linewidth=3) # To XOR
-    ax.plot([2.5, 2.5], [4.75, 2], color=c_b, linewidth=2, linestyle='--') # Drop to AND
-    ax.plot([2.5, 4], [2, 2], color=c_b, linewidth=3) # To AND
-    ax.text(0.5, 4.75, f'B={b}', ha='right', va='center', fontsize=12, color='#e4e7eb', fontweight='bold')
+    # Input A lines: to XOR, drop to AND, to AND
+    scene['lines_a'] = [
+        ax.plot([1, 4], [5.5, 5.5], linewidth=3)[0],
+        ax.plot([2, 2], [5.5, 2.5], linewidth=2, linestyle='--')[0],
+        ax.plot([2, 4], [2.5, 2.5], linewidth=3)[0],
+    ]
+    scene['text_a'] = ax.text(0.5, 5.5, '', ha='right', va='center', fontsize=12, color='#e4e7eb', fontweight='bold')
     
-    # Output Sum
-    ax.plot([6.5, 10], [5.25, 5.25], color=c_sum, linewidth=3)
-    ax.text(10.5, 5.25, f'Sum={sum_val}', ha='left', va='center', fontsize=12, color=c_sum, fontweight='bold')
+    # Input B lines: to XOR, drop to AND, to AND
+    scene['lines_b'] = [
+        ax.plot([1, 4], [4.75, 4.75], linewidth=3)[0],
+        ax.plot([2.5, 2.5], [4.75, 2], linewidth=2, linestyle='--')[0],
+        ax.plot([2.5, 4], [2, 2], linewidth=3)[0],
+    ]
+    scene['text_b'] = ax.text(0.5, 4.75, '', ha='right', va='center', fontsize=12, color='#e4e7eb', fontweight='bold')
     
-    # Output Carry
-    ax.plot([6.5, 10], [2.25, 2.25], color=c_carry, linewidth=3)
-    ax.text(10.5, 2.25, f'Carry={carry_val}', ha='left', va='center', fontsize=12, color=c_carry, fontweight='bold')
-    
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png', bbox_inches='tight', transparent=True, facecolor='none', dpi=100)
-    buf.seek(0)
-    plt.close(fig)
-    return buf
+    # Outputs
+    scene['line_sum'], = ax.plot([6.5, 10], [5.25, 5.25], linewidth=3)
+    scene['text_sum'] = ax.text(10.5, 5.25, '', ha='left', va='center', fontsize=12, fontweight='bold')
+    scene['line_carry'], = ax.plot([6.5, 10], [2.25, 2.25], linewidth=3)
+    scene['text_carry'] = ax.text(10.5, 2.25, '', ha='left', va='center', fontsize=12, fontweight='bold')
+    return scene
 
-def draw_mux_4to1(d_inputs, select_lines):
+@cached_render
+def draw_half_adder(a, b):
     """
-    Draws a 4:1 Multiplexer.
-    d_inputs: list of 4 values (0/1)
-    select_lines: list of 2 values [S1, S0]
+    Draws a half adder circuit with dynamic coloring.
     """
-    s1, s0 = select_lines
-    sel_idx = s1 * 2 + s0
-    output_val = d_inputs[sel_idx]
+    sum_val = a ^ b
+    carry_val = a and b
+    
+    # Colors
+    c_a = get_line_color(a)
+    c_b = get_line_color(b)
+    c_sum = get_line_color(sum_val)
+    c_carry = get_line_color(carry_val)
     
-    fig, ax = plt.subplots(figsize=(8, 6), facecolor='none')
+    with scene_pool.checkout(_build_half_adder_scene) as scene:
+        for line in scene['lines_a']:
+            line.set_color(c_a)
+        for line in scene['lines_b']:
+            line.set_color(c_b)
+        scene['text_a'].set_text(f'A={a}')
+        scene['text_b'].set_text(f'B={b}')
+        scene['line_sum'].set_color(c_sum)
+        scene['text_sum'].set_text(f'Sum={sum_val}')
+        scene['text_sum'].set_color(c_sum)
+        scene['line_carry'].set_color(c_carry)
+        scene['text_carry'].set_text(f'Carry={carry_val}')
+        scene['text_carry'].set_color(c_carry)
+        return _figure_to_png(scene['fig'])
+
+def _build_mux_scene():
+    patches = _load_matplotlib()
+    fig, ax = _new_figure(figsize=(8, 6))
     ax.set_xlim(0, 10)
     ax.set_ylim(0, 8)
     ax.axis('off')
+    scene = {'fig': fig, 'lines_d': [], 'texts_d': [], 'lines_sel': []}
     
     # Mux Trapezoid
     verts = [(3, 1), (3, 7), (7, 6), (7, 2)]
@@ -136,111 +567,102 @@ def draw_mux_4to1(d_inputs, select_lines):
     ax.text(5, 4, '4:1 MUX', ha='center', va='center', fontsize=14, fontweight='bold', color='#f59e0b')
     
     # Inputs D0-D3
-    y_pos = [2.5, 3.8, 5.1, 6.4] # Positions for D0, D1, D2, D3 (bottom to top? usually D0 top)
-    # Let's do D0 at top (6.4) to D3 at bottom (2.5) to match standard logic
-    # Actually standard is often D0 top. Let's stick to D0 top.
-    y_pos = [6.0, 5.0, 4.0, 3.0] 
-    labels = ['D0', 'D1', 'D2', 'D3']
-    
-    for i in range(4):
-        color = get_line_color(d_inputs[i])
-        # Input line
-        ax.plot([1, 3], [y_pos[i], y_pos[i]], color=color, linewidth=3)
-        ax.text(0.5, y_pos[i], f'{labels[i]}={d_inputs[i]}', ha='right', va='center', 
-                fontsize=12, color='#e4e7eb', fontweight='bold')
-        
-        # Internal connection (only if selected)
-        if i == sel_idx:
-            # Draw curve from input to output
-            ax.plot([3, 7], [y_pos[i], 4], color=color, linewidth=2, linestyle=':')
+    for y in _MUX_Y_POS:
+        scene['lines_d'].append(ax.plot([1, 3], [y, y], linewidth=3)[0])
+        scene['texts_d'].append(ax.text(0.5, y, '', ha='right', va='center', 
+                                        fontsize=12, color='#e4e7eb', fontweight='bold'))
+        # Internal connection, only shown for the selected input
+        scene['lines_sel'].append(ax.plot([3, 7], [y, 4], linewidth=2, linestyle=':')[0])
             
     # Select Lines (Bottom)
-    ax.plot([4.5, 4.5], [0.5, 1.5], color=get_line_color(s1), linewidth=2)
-    ax.text(4.5, 0.2, f'S1={s1}', ha='center', va='center', fontsize=12, color='#e4e7eb')
-    
-    ax.plot([5.5, 5.5], [0.5, 1.5], color=get_line_color(s0), linewidth=2)
-    ax.text(5.5, 0.2, f'S0={s0}', ha='center', va='center', fontsize=12, color='#e4e7eb')
+    scene['line_s1'], = ax.plot([4.5, 4.5], [0.5, 1.5], linewidth=2)
+    scene['text_s1'] = ax.text(4.5, 0.2, '', ha='center', va='center', fontsize=12, color='#e4e7eb')
+    scene['line_s0'], = ax.plot([5.5, 5.5], [0.5, 1.5], linewidth=2)
+    scene['text_s0'] = ax.text(5.5, 0.2, '', ha='center', va='center', fontsize=12, color='#e4e7eb')
     
     # Output
-    c_out = get_line_color(output_val)
-    ax.plot([7, 9], [4, 4], color=c_out, linewidth=3)
-    ax.text(9.5, 4, f'Y={output_val}', ha='left', va='center', fontsize=14, color=c_out, fontweight='bold')
-    
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png', bbox_inches='tight', transparent=True, facecolor='none', dpi=100)
-    buf.seek(0)
-    plt.close(fig)
-    return buf
+    scene['line_out'], = ax.plot([7, 9], [4, 4], linewidth=3)
+    scene['text_out'] = ax.text(9.5, 4, '', ha='left', va='center', fontsize=14, fontweight='bold')
+    return scene
 
-def draw_seven_segment(value):
+@cached_render
+def draw_mux_4to1(d_inputs, select_lines):
     """
-    Draws a realistic 7-segment display using hexagonal polygons.
-    value: int (0-9)
+    Draws a 4:1 Multiplexer.
+    d_inputs: list of 4 values (0/1)
+    select_lines: list of 2 values [S1, S0]
     """
-    fig, ax = plt.subplots(figsize=(4, 6.5), facecolor='none')
+    s1, s0 = select_lines
+    sel_idx = s1 * 2 + s0
+    output_val = d_inputs[sel_idx]
+    
+    with scene_pool.checkout(_build_mux_scene) as scene:
+        for i in range(4):
+            color = get_line_color(d_inputs[i])
+            scene['lines_d'][i].set_color(color)
+            scene['texts_d'][i].set_text(f'D{i}={d_inputs[i]}')
+            scene['lines_sel'][i].set_color(color)
+            scene['lines_sel'][i].set_visible(i == sel_idx)
+        scene['line_s1'].set_color(get_line_color(s1))
+        scene['text_s1'].set_text(f'S1={s1}')
+        scene['line_s0'].set_color(get_line_color(s0))
+        scene['text_s0'].set_text(f'S0={s0}')
+        c_out = get_line_color(output_val)
+        scene['line_out'].set_color(c_out)
+        scene['text_out'].set_text(f'Y={output_val}')
+        scene['text_out'].set_color(c_out)
+        return _figure_to_png(scene['fig'])
+
+def _build_seven_segment_scene():
+    patches = _load_matplotlib()
+    from matplotlib.collections import PatchCollection
+    fig, ax = _new_figure(figsize=(4, 6.5))
     ax.set_xlim(-1, 13)
     ax.set_ylim(-1, 21)
     ax.axis('off')
     
-    # Define hexagonal segments for a realistic look
-    # Format: List of (x, y) tuples
-    segments = {
-        'a': [(2, 18), (3, 19), (9, 19), (10, 18), (9, 17), (3, 17)],
-        'b': [(10, 18), (11, 17), (11, 10.5), (10, 9.5), (9, 10.5), (9, 17)],
-        'c': [(10, 9.5), (11, 8.5), (11, 2), (10, 1), (9, 2), (9, 8.5)],
-        'd': [(10, 1), (9, 0), (3, 0), (2, 1), (3, 2), (9, 2)],
-        'e': [(2, 9.5), (3, 8.5), (3, 2), (2, 1), (1, 2), (1, 8.5)],
-        'f': [(2, 18), (3, 17), (3, 10.5), (2, 9.5), (1, 10.5), (1, 17)],
-        'g': [(2, 9.5), (3, 10.5), (9, 10.5), (10, 9.5), (9, 8.5), (3, 8.5)]
-    }
-    
-    # Map digits to segments
-    digit_map = {
-        0: ['a', 'b', 'c', 'd', 'e', 'f'],
-        1: ['b', 'c'],
-        2: ['a', 'b', 'g', 'e', 'd'],
-        3: ['a', 'b', 'g', 'c', 'd'],
-        4: ['f', 'g', 'b', 'c'],
-        5: ['a', 'f', 'g', 'c', 'd'],
-        6: ['a', 'f', 'e', 'd', 'c', 'g'],
-        7: ['a', 'b', 'c'],
-        8: ['a', 'b', 'c', 'd', 'e', 'f', 'g'],
-        9: ['a', 'b', 'c', 'd', 'f', 'g']
-    }
-    
-    active_segments = digit_map.get(value, [])
-    
-    for seg_name, verts in segments.items():
-        if seg_name in active_segments:
-            color = '#ef4444' # Red LED
-            alpha = 1.0
-            lw = 0
-        else:
-            color = '#1e293b' # Off state
-            alpha = 0.2
-            lw = 1
-            
-        poly = patches.Polygon(verts, closed=True, facecolor=color, edgecolor=color, alpha=alpha, linewidth=lw)
-        ax.add_patch(poly)
+    # Hexagonal segments for a realistic look, drawn as one collection
+    polys = [patches.Polygon(verts, closed=True) for verts in _SEVEN_SEGMENTS.values()]
+    segments = PatchCollection(polys, joinstyle='miter')
+    ax.add_collection(segments)
         
     # Add invisible point to force bbox to include top area
     ax.plot([6], [20.5], color='none')
-        
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png', bbox_inches='tight', pad_inches=0.1, transparent=True, facecolor='none', dpi=100)
-    buf.seek(0)
-    plt.close(fig)
-    return buf
+    return {'fig': fig, 'segments': segments}
 
-def draw_flip_flop(ff_type, inputs, q, q_bar, clk_state=0):
+@cached_render
+def draw_seven_segment(value):
     """
-    Draws a Flip-Flop (SR, JK, D, T).
-    inputs: dict of input values e.g. {'J': 1, 'K': 0}
+    Draws a realistic 7-segment display using hexagonal polygons.
+    value: int (0-9)
     """
-    fig, ax = plt.subplots(figsize=(6, 5), facecolor='none')
+    from matplotlib.colors import to_rgba
+    active_segments = SEVEN_SEGMENT_DIGITS.get(value, '')
+    
+    colors = []
+    widths = []
+    for seg_name in _SEVEN_SEGMENTS:
+        if seg_name in active_segments:
+            colors.append(to_rgba('#ef4444', 1.0)) # Red LED
+            widths.append(0)
+        else:
+            colors.append(to_rgba('#1e293b', 0.2)) # Off state
+            widths.append(1)
+            
+    with scene_pool.checkout(_build_seven_segment_scene) as scene:
+        segments = scene['segments']
+        segments.set_facecolor(colors)
+        segments.set_edgecolor(colors)
+        segments.set_linewidth(widths)
+        return _figure_to_png(scene['fig'], pad_inches=0.1)
+
+def _build_flip_flop_scene(input_names):
+    patches = _load_matplotlib()
+    fig, ax = _new_figure(figsize=(6, 5))
     ax.set_xlim(0, 8)
     ax.set_ylim(0, 6)
     ax.axis('off')
+    scene = {'fig': fig, 'lines_in': [], 'texts_in': []}
     
     # Main Block
     rect = patches.Rectangle((2.5, 1), 3, 4, fill=True, 
@@ -248,48 +670,56 @@ def draw_flip_flop(ff_type, inputs, q, q_bar, clk_state=0):
     ax.add_patch(rect)
     
     # Title
-    ax.text(4, 3, f'{ff_type} FF', ha='center', va='center', fontsize=14, fontweight='bold', color='#a78bfa')
+    scene['title'] = ax.text(4, 3, '', ha='center', va='center', fontsize=14, fontweight='bold', color='#a78bfa')
     
     # Inputs
-    y_positions = {'S': 4, 'R': 2, 'J': 4, 'K': 2, 'D': 4, 'T': 4}
-    
-    for name, val in inputs.items():
-        y = y_positions.get(name, 3)
-        color = get_line_color(val)
-        ax.plot([1, 2.5], [y, y], color=color, linewidth=3)
-        ax.text(0.5, y, f'{name}={val}', ha='right', va='center', fontsize=12, color='#e4e7eb')
+    for name in input_names:
+        y = _FLIP_FLOP_INPUT_Y.get(name, 3)
+        scene['lines_in'].append(ax.plot([1, 2.5], [y, y], linewidth=3)[0])
+        scene['texts_in'].append(ax.text(0.5, y, '', ha='right', va='center', fontsize=12, color='#e4e7eb'))
         
     # Clock
-    ax.plot([1, 2.5], [3, 3], color=get_line_color(clk_state), linewidth=2)
+    scene['line_clk'], = ax.plot([1, 2.5], [3, 3], linewidth=2)
     # Clock triangle
     ax.plot([2.5, 2.8], [3.2, 3], color='#a78bfa', linewidth=2)
     ax.plot([2.5, 2.8], [2.8, 3], color='#a78bfa', linewidth=2)
-    ax.text(0.5, 3, f'CLK={clk_state}', ha='right', va='center', fontsize=12, color='#e4e7eb')
+    scene['text_clk'] = ax.text(0.5, 3, '', ha='right', va='center', fontsize=12, color='#e4e7eb')
 
     # Outputs
-    c_q = get_line_color(q)
-    c_qb = get_line_color(q_bar)
-    
-    ax.plot([5.5, 7], [4, 4], color=c_q, linewidth=3)
-    ax.text(7.5, 4, f'Q={q}', ha='left', va='center', fontsize=12, color=c_q, fontweight='bold')
-    
-    ax.plot([5.5, 7], [2, 2], color=c_qb, linewidth=3)
-    ax.text(7.5, 2, f'Q\'={q_bar}', ha='left', va='center', fontsize=12, color=c_qb, fontweight='bold')
-    
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png', bbox_inches='tight', transparent=True, facecolor='none', dpi=100)
-    buf.seek(0)
-    plt.close(fig)
-    return buf
+    scene['line_q'], = ax.plot([5.5, 7], [4, 4], linewidth=3)
+    scene['text_q'] = ax.text(7.5, 4, '', ha='left', va='center', fontsize=12, fontweight='bold')
+    scene['line_qb'], = ax.plot([5.5, 7], [2, 2], linewidth=3)
+    scene['text_qb'] = ax.text(7.5, 2, '', ha='left', va='center', fontsize=12, fontweight='bold')
+    return scene
 
-def draw_generic_block(title, input_labels, output_labels, active_inputs=None, active_outputs=None):
+@cached_render
+def draw_flip_flop(ff_type, inputs, q, q_bar, clk_state=0):
     """
-    Draws a generic block diagram (for FSM, PLA, FPGA).
+    Draws a Flip-Flop (SR, JK, D, T).
+    inputs: dict of input values e.g. {'J': 1, 'K': 0}
     """
-    if active_inputs is None: active_inputs = {}
-    if active_outputs is None: active_outputs = {}
-    
-    fig, ax = plt.subplots(figsize=(8, 5), facecolor='none')
+    with scene_pool.checkout(_build_flip_flop_scene, tuple(inputs)) as scene:
+        scene['title'].set_text(f'{ff_type} FF')
+        for i, (name, val) in enumerate(inputs.items()):
+            scene['lines_in'][i].set_color(get_line_color(val))
+            scene['texts_in'][i].set_text(f'{name}={val}')
+        scene['line_clk'].set_color(get_line_color(clk_state))
+        scene['text_clk'].set_text(f'CLK={clk_state}')
+        
+        c_q = get_line_color(q)
+        c_qb = get_line_color(q_bar)
+        scene['line_q'].set_color(c_q)
+        scene['text_q'].set_text(f'Q={q}')
+        scene['text_q'].set_color(c_q)
+        scene['line_qb'].set_color(c_qb)
+        scene['text_qb'].set_text(f'Q\'={q_bar}')
+        scene['text_qb'].set_color(c_qb)
+        return _figure_to_png(scene['fig'])
+
+def _build_generic_block_scene(title, input_labels, output_labels):
+    patches = _load_matplotlib()
+    from matplotlib.collections import LineCollection
+    fig, ax = _new_figure(figsize=(8, 5))
     ax.set_xlim(0, 10)
     ax.set_ylim(0, 6)
     ax.axis('off')
@@ -300,27 +730,367 @@ def draw_generic_block(title, input_labels, output_labels, active_inputs=None, a
     ax.add_patch(rect)
     ax.text(5, 3, title, ha='center', va='center', fontsize=12, fontweight='bold', color='#60a5fa', wrap=True)
     
-    # Inputs
+    # Pin wires (inputs, then outputs) are batched into a single collection so
+    # wide blocks (16-output registers, 32-input PLAs) stay one draw call
+    wires = []
     dy = 4 / (len(input_labels) + 1)
     for i, label in enumerate(input_labels):
         y = 5 - (i + 1) * dy
-        val = active_inputs.get(label, 0)
-        color = get_line_color(val)
-        ax.plot([1.5, 3], [y, y], color=color, linewidth=3)
+        wires.append([(1.5, y), (3, y)])
         ax.text(1.2, y, label, ha='right', va='center', fontsize=10, color='#e4e7eb')
         
-    # Outputs
     dy = 4 / (len(output_labels) + 1)
     for i, label in enumerate(output_labels):
         y = 5 - (i + 1) * dy
-        val = active_outputs.get(label, 0)
-        color = get_line_color(val)
-        ax.plot([7, 8.5], [y, y], color=color, linewidth=3)
+        wires.append([(7, y), (8.5, y)])
         ax.text(8.8, y, label, ha='left', va='center', fontsize=10, color='#e4e7eb')
 
+    wire_collection = LineCollection(wires, linewidths=3, capstyle='projecting', animated=True)
+    ax.add_collection(wire_collection)
+
+    # Everything except the wires is static: rasterize it once, measure the
+    # tight bounding box once, and later renders only blit the wires over it.
+    # This keeps render time nearly flat as the pin count grows.
+    canvas = fig.canvas
+    canvas.draw()
+    background = canvas.copy_from_bbox(fig.bbox)
+    tight = fig.get_tightbbox(canvas.get_renderer()).padded(0.1)
+    height = fig.bbox.height
+    crop = (
+        max(int(round(tight.x0 * fig.dpi)), 0),
+        max(int(round(height - tight.y1 * fig.dpi)), 0),
+        min(int(round(tight.x1 * fig.dpi)), int(fig.bbox.width)),
+        min(int(round(height - tight.y0 * fig.dpi)), int(height)),
+    )
+    return {'fig': fig, 'ax': ax, 'wires': wire_collection, 'background': background, 'crop': crop}
+
+def _blit_to_png(scene, *artists):
+    """Redraws only `artists` over the scene's cached background and encodes the cropped PNG."""
+    from PIL import Image
+    canvas = scene['fig'].canvas
+    canvas.restore_region(scene['background'])
+    for artist in artists:
+        scene['ax'].draw_artist(artist)
+    left, top, right, bottom = scene['crop']
+    image = Image.frombuffer('RGBA', canvas.get_width_height(), canvas.buffer_rgba(), 'raw', 'RGBA', 0, 1)
     buf = io.BytesIO()
-    plt.savefig(buf, format='png', bbox_inches='tight', transparent=True, facecolor='none', dpi=100)
-    buf.seek(0)
-    plt.close(fig)
-    return buf
+    image.crop((left, top, right, bottom)).save(buf, format='png', dpi=(100, 100))
+    return buf.getvalue()
 
+@cached_render
+def draw_generic_block(title, input_labels, output_labels, active_inputs=None, active_outputs=None):
+    """
+    Draws a generic block diagram (for FSM, PLA, FPGA).
+    """
+    if active_inputs is None: active_inputs = {}
+    if active_outputs is None: active_outputs = {}
+    
+    colors = [get_line_color(active_inputs.get(label, 0)) for label in input_labels]
+    colors += [get_line_color(active_outputs.get(label, 0)) for label in output_labels]
+    
+    layout = (title, tuple(input_labels), tuple(output_labels))
+    with scene_pool.checkout(_build_generic_block_scene, *layout) as scene:
+        scene['wires'].set_color(colors)
+        return _blit_to_png(scene, scene['wires'])
+
+# --- SVG Backend ---
+# Each diagram's geometry is laid out once into an SVG string template (using
+# the same data coordinates as the matplotlib version); a render is then a
+# single str.format() call that fills in signal colors and value labels.
+
+_SVG_DPI = 100  # Matches the matplotlib savefig dpi, so stroke/font sizes line up
+_SVG_ANCHOR = {'left': 'start', 'center': 'middle', 'right': 'end'}
+_SVG_DASH = {'--': '8,5', ':': '2,4'}
+
+class _SvgCanvas:
+    """
+    Collects SVG elements using matplotlib-style data coordinates (y grows up).
+    String arguments may contain {placeholders} that are filled per render.
+    """
+    def __init__(self, xlim, ylim, px_per_unit):
+        self.xlim = xlim
+        self.ylim = ylim
+        self.scale = px_per_unit
+        self.parts = []
+
+    def _x(self, x):
+        return f"{x * self.scale:.1f}"
+
+    def _y(self, y):
+        return f"{-y * self.scale:.1f}"
+
+    def _pt(self, points):
+        # Matplotlib sizes are in points; convert to pixels at the figure dpi
+        return f"{points * _SVG_DPI / 72:.1f}"
+
+    def line(self, xs, ys, color, linewidth, linestyle='-'):
+        dash = _SVG_DASH.get(linestyle)
+        dash_attr = f' stroke-dasharray="{dash}"' if dash else ''
+        self.parts.append(
+            f'<line x1="{self._x(xs[0])}" y1="{self._y(ys[0])}" x2="{self._x(xs[1])}" y2="{self._y(ys[1])}" '
+            f'stroke="{color}" stroke-width="{self._pt(linewidth)}"{dash_attr}/>'
+        )
+
+    def rect(self, x, y, width, height, facecolor, edgecolor, linewidth):
+        self.parts.append(
+            f'<rect x="{self._x(x)}" y="{self._y(y + height)}" width="{self._x(width)}" height="{self._x(height)}" '
+            f'fill="{facecolor}" stroke="{edgecolor}" stroke-width="{self._pt(linewidth)}"/>'
+        )
+
+    def polygon(self, verts, facecolor, edgecolor, linewidth, opacity='1'):
+        points = " ".join(f"{self._x(x)},{self._y(y)}" for x, y in verts)
+        self.parts.append(
+            f'<polygon points="{points}" fill="{facecolor}" stroke="{edgecolor}" '
+            f'stroke-width="{self._pt(linewidth)}" opacity="{opacity}"/>'
+        )
+
+    def text(self, x, y, text, color, fontsize, ha='center', bold=False):
+        weight = ' font-weight="bold"' if bold else ''
+        self.parts.append(
+            f'<text x="{self._x(x)}" y="{self._y(y)}" text-anchor="{_SVG_ANCHOR[ha]}" dominant-baseline="central" '
+            f'font-size="{self._pt(fontsize)}" fill="{color}"{weight}>{text}</text>'
+        )
+
+    def template(self):
+        x0, x1 = self.xlim
+        y0, y1 = self.ylim
+        width = (x1 - x0) * self.scale
+        height = (y1 - y0) * self.scale
+        header = (
+            f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="{self._x(x0)} {self._y(y1)} {width:.1f} {height:.1f}" '
+            f'width="{width:.0f}" height="{height:.0f}" font-family="Inter, DejaVu Sans, sans-serif">'
+        )
+        return header + "".join(self.parts) + '</svg>'
+
+def _fill_svg(template, **values):
+    """Fills an SVG template, escaping any text values."""
+    safe = {k: escape(str(v)) for k, v in values.items()}
+    return template.format(**safe).encode('utf-8')
+
+def _escape_braces(text):
+    """Protects literal text (e.g. user labels) baked into a template."""
+    return escape(str(text)).replace('{', '{{').replace('}', '}}')
+
+@functools.lru_cache(maxsize=None)
+def _svg_logic_gate_template(single_input):
+    svg = _SvgCanvas((-1.5, 11.5), (1.5, 4.5), 80)
+    svg.rect(3.5, 2, 3, 2, '#1e293b', '#60a5fa', 2)
+    svg.text(5, 3, '{gate_type}', '#60a5fa', 16, bold=True)
+    if single_input:
+        svg.line([1, 3.5], [3, 3], '{c_a}', 3)
+        svg.text(0.5, 3, 'A={a}', '#e4e7eb', 12, ha='right', bold=True)
+    else:
+        svg.line([1, 3.5], [3.5, 3.5], '{c_a}', 3)
+        svg.line([1, 3.5], [2.5, 2.5], '{c_b}', 3)
+        svg.text(0.5, 3.5, 'A={a}', '#e4e7eb', 12, ha='right', bold=True)
+        svg.text(0.5, 2.5, 'B={b}', '#e4e7eb', 12, ha='right', bold=True)
+    svg.line([6.5, 9], [3, 3], '{c_out}', 3)
+    svg.text(9.5, 3, 'Out={out}', '{c_out_text}', 12, ha='left', bold=True)
+    return svg.template()
+
+@draw_logic_gate.register_backend('svg')
+def _svg_logic_gate(gate_type, inputs, output_state):
+    single_input = gate_type == 'NOT'
+    b = inputs[1] if not single_input else 0
+    return _fill_svg(
+        _svg_logic_gate_template(single_input),
+        gate_type=gate_type,
+        a=inputs[0], b=b, out=output_state,
+        c_a=get_line_color(inputs[0]), c_b=get_line_color(b),
+        c_out=get_line_color(output_state),
+        c_out_text='#22c55e' if output_state else '#64748b',
+    )
+
+@functools.lru_cache(maxsize=None)
+def _svg_half_adder_template():
+    svg = _SvgCanvas((-1.5, 13.5), (1, 6.5), 80)
+    svg.rect(4, 4.5, 2.5, 1.5, '#1e293b', '#60a5fa', 2)
+    svg.text(5.25, 5.25, 'XOR', '#60a5fa', 12, bold=True)
+    svg.rect(4, 1.5, 2.5, 1.5, '#1e293b', '#a78bfa', 2)
+    svg.text(5.25, 2.25, 'AND', '#a78bfa', 12, bold=True)
+    svg.line([1, 4], [5.5, 5.5], '{c_a}', 3)
+    svg.line([2, 2], [5.5, 2.5], '{c_a}', 2, '--')
+    svg.line([2, 4], [2.5, 2.5], '{c_a}', 3)
+    svg.text(0.5, 5.5, 'A={a}', '#e4e7eb', 12, ha='right', bold=True)
+    svg.line([1, 4], [4.75, 4.75], '{c_b}', 3)
+    svg.line([2.5, 2.5], [4.75, 2], '{c_b}', 2, '--')
+    svg.line([2.5, 4], [2, 2], '{c_b}', 3)
+    svg.text(0.5, 4.75, 'B={b}', '#e4e7eb', 12, ha='right', bold=True)
+    svg.line([6.5, 10], [5.25, 5.25], '{c_sum}', 3)
+    svg.text(10.5, 5.25, 'Sum={sum}', '{c_sum}', 12, ha='left', bold=True)
+    svg.line([6.5, 10], [2.25, 2.25], '{c_carry}', 3)
+    svg.text(10.5, 2.25, 'Carry={carry}', '{c_carry}', 12, ha='left', bold=True)
+    return svg.template()
+
+@draw_half_adder.register_backend('svg')
+def _svg_half_adder(a, b):
+    sum_val = a ^ b
+    carry_val = a and b
+    return _fill_svg(
+        _svg_half_adder_template(),
+        a=a, b=b, sum=sum_val, carry=carry_val,
+        c_a=get_line_color(a), c_b=get_line_color(b),
+        c_sum=get_line_color(sum_val), c_carry=get_line_color(carry_val),
+    )
+
+@functools.lru_cache(maxsize=None)
+def _svg_mux_template():
+    svg = _SvgCanvas((-1.5, 11), (-0.2, 7.2), 80)
+    svg.polygon([(3, 1), (3, 7), (7, 6), (7, 2)], '#1e293b', '#f59e0b', 2)
+    svg.text(5, 4, '4:1 MUX', '#f59e0b', 14, bold=True)
+    for i, y in enumerate(_MUX_Y_POS):
+        svg.line([1, 3], [y, y], f'{{c_d{i}}}', 3)
+        svg.text(0.5, y, f'D{i}={{d{i}}}', '#e4e7eb', 12, ha='right', bold=True)
+        # Internal connection: stroke is 'none' unless this input is selected
+        svg.line([3, 7], [y, 4], f'{{c_sel{i}}}', 2, ':')
+    svg.line([4.5, 4.5], [0.5, 1.5], '{c_s1}', 2)
+    svg.text(4.5, 0.2, 'S1={s1}', '#e4e7eb', 12)
+    svg.line([5.5, 5.5], [0.5, 1.5], '{c_s0}', 2)
+    svg.text(5.5, 0.2, 'S0={s0}', '#e4e7eb', 12)
+    svg.line([7, 9], [4, 4], '{c_out}', 3)
+    svg.text(9.5, 4, 'Y={out}', '{c_out}', 14, ha='left', bold=True)
+    return svg.template()
+
+@draw_mux_4to1.register_backend('svg')
+def _svg_mux_4to1(d_inputs, select_lines):
+    s1, s0 = select_lines
+    sel_idx = s1 * 2 + s0
+    output_val = d_inputs[sel_idx]
+    values = {
+        's1': s1, 's0': s0, 'out': output_val,
+        'c_s1': get_line_color(s1), 'c_s0': get_line_color(s0),
+        'c_out': get_line_color(output_val),
+    }
+    for i in range(4):
+        color = get_line_color(d_inputs[i])
+        values[f'd{i}'] = d_inputs[i]
+        values[f'c_d{i}'] = color
+        values[f'c_sel{i}'] = color if i == sel_idx else 'none'
+    return _fill_svg(_svg_mux_template(), **values)
+
+@functools.lru_cache(maxsize=None)
+def _svg_seven_segment_template():
+    svg = _SvgCanvas((0.5, 11.5), (-0.5, 19.5), 28)
+    for seg_name, verts in _SEVEN_SEGMENTS.items():
+        svg.polygon(verts, f'{{c_{seg_name}}}', f'{{c_{seg_name}}}', 1, opacity=f'{{o_{seg_name}}}')
+    return svg.template()
+
+@draw_seven_segment.register_backend('svg')
+def _svg_seven_segment(value):
+    active_segments = SEVEN_SEGMENT_DIGITS.get(value, '')
+    values = {}
+    for seg_name in _SEVEN_SEGMENTS:
+        on = seg_name in active_segments
+        values[f'c_{seg_name}'] = '#ef4444' if on else '#1e293b'
+        values[f'o_{seg_name}'] = '1' if on else '0.2'
+    return _fill_svg(_svg_seven_segment_template(), **values)
+
+@functools.lru_cache(maxsize=None)
+def _svg_flip_flop_template(input_names):
+    svg = _SvgCanvas((-1.5, 9.5), (0.5, 5.5), 75)
+    svg.rect(2.5, 1, 3, 4, '#1e293b', '#a78bfa', 2)
+    svg.text(4, 3, '{ff_type} FF', '#a78bfa', 14, bold=True)
+    for i, name in enumerate(input_names):
+        y = _FLIP_FLOP_INPUT_Y.get(name, 3)
+        svg.line([1, 2.5], [y, y], f'{{c_in{i}}}', 3)
+        svg.text(0.5, y, f'{_escape_braces(name)}={{in{i}}}', '#e4e7eb', 12, ha='right')
+    svg.line([1, 2.5], [3, 3], '{c_clk}', 2)
+    svg.line([2.5, 2.8], [3.2, 3], '#a78bfa', 2)
+    svg.line([2.5, 2.8], [2.8, 3], '#a78bfa', 2)
+    svg.text(0.5, 3, 'CLK={clk}', '#e4e7eb', 12, ha='right')
+    svg.line([5.5, 7], [4, 4], '{c_q}', 3)
+    svg.text(7.5, 4, 'Q={q}', '{c_q}', 12, ha='left', bold=True)
+    svg.line([5.5, 7], [2, 2], '{c_qb}', 3)
+    svg.text(7.5, 2, "Q'={q_bar}", '{c_qb}', 12, ha='left', bold=True)
+    return svg.template()
+
+@draw_flip_flop.register_backend('svg')
+def _svg_flip_flop(ff_type, inputs, q, q_bar, clk_state=0):
+    values = {
+        'ff_type': ff_type, 'q': q, 'q_bar': q_bar, 'clk': clk_state,
+        'c_q': get_line_color(q), 'c_qb': get_line_color(q_bar),
+        'c_clk': get_line_color(clk_state),
+    }
+    for i, val in enumerate(inputs.values()):
+        values[f'in{i}'] = val
+        values[f'c_in{i}'] = get_line_color(val)
+    return _fill_svg(_svg_flip_flop_template(tuple(inputs)), **values)
+
+@functools.lru_cache(maxsize=256)
+def _svg_generic_block_template(title, input_labels, output_labels):
+    svg = _SvgCanvas((-0.5, 10.5), (0.5, 5.5), 80)
+    svg.rect(3, 1, 4, 4, '#1e293b', '#60a5fa', 2)
+    svg.text(5, 3, _escape_braces(title), '#60a5fa', 12, bold=True)
+    dy = 4 / (len(input_labels) + 1)
+    for i, label in enumerate(input_labels):
+        y = 5 - (i + 1) * dy
+        svg.line([1.5, 3], [y, y], f'{{c_in{i}}}', 3)
+        svg.text(1.2, y, _escape_braces(label), '#e4e7eb', 10, ha='right')
+    dy = 4 / (len(output_labels) + 1)
+    for i, label in enumerate(output_labels):
+        y = 5 - (i + 1) * dy
+        svg.line([7, 8.5], [y, y], f'{{c_out{i}}}', 3)
+        svg.text(8.8, y, _escape_braces(label), '#e4e7eb', 10, ha='left')
+    return svg.template()
+
+@draw_generic_block.register_backend('svg')
+def _svg_generic_block(title, input_labels, output_labels, active_inputs=None, active_outputs=None):
+    if active_inputs is None: active_inputs = {}
+    if active_outputs is None: active_outputs = {}
+    values = {}
+    for i, label in enumerate(input_labels):
+        values[f'c_in{i}'] = get_line_color(active_inputs.get(label, 0))
+    for i, label in enumerate(output_labels):
+        values[f'c_out{i}'] = get_line_color(active_outputs.get(label, 0))
+    template = _svg_generic_block_template(title, tuple(input_labels), tuple(output_labels))
+    return _fill_svg(template, **values)
+
+# --- Sprite Sheets ---
+# Small experiments can ship every visual state at once as a grid of equally
+# sized cells; the page then only needs a cell index to show a state.
+
+_SVG_SIZE = re.compile(rb'<svg[^>]*?\swidth="([\d.]+)"[^>]*?\sheight="([\d.]+)"')
+
+def image_size(data):
+    """Returns the (width, height) in pixels of a rendered PNG or SVG image."""
+    if data.lstrip()[:4] == b'<svg':
+        match = _SVG_SIZE.search(data)
+        return int(float(match.group(1))), int(float(match.group(2)))
+    from PIL import Image
+    with Image.open(io.BytesIO(data)) as image:
+        return image.size
+
+def compose_sprite_sheet(images):
+    """
+    Packs images into a near-square grid of equal cells (each image centered).
+    All images must come from the same backend.
+    Returns (sheet_bytes, layout) with layout keys cols, rows, cell_width, cell_height.
+    """
+    sizes = [image_size(data) for data in images]
+    cell_w = max(w for w, _ in sizes)
+    cell_h = max(h for _, h in sizes)
+    cols = math.ceil(math.sqrt(len(images)))
+    rows = math.ceil(len(images) / cols)
+    layout = {"cols": cols, "rows": rows, "cell_width": cell_w, "cell_height": cell_h}
+
+    if images[0].lstrip()[:4] == b'<svg':
+        # Nest each SVG document as a positioned child of one outer document
+        parts = []
+        for i, (data, (w, h)) in enumerate(zip(images, sizes)):
+            x = (i % cols) * cell_w + (cell_w - w) // 2
+            y = (i // cols) * cell_h + (cell_h - h) // 2
+            parts.append(data.lstrip().replace(b'<svg ', f'<svg x="{x}" y="{y}" '.encode(), 1))
+        header = (f'<svg xmlns="http://www.w3.org/2000/svg" width="{cols * cell_w}" '
+                  f'height="{rows * cell_h}">').encode()
+        return header + b"".join(parts) + b'</svg>', layout
+
+    from PIL import Image
+    sheet = Image.new('RGBA', (cols * cell_w, rows * cell_h), (0, 0, 0, 0))
+    for i, (data, (w, h)) in enumerate(zip(images, sizes)):
+        with Image.open(io.BytesIO(data)) as tile:
+            x = (i % cols) * cell_w + (cell_w - w) // 2
+            y = (i // cols) * cell_h + (cell_h - h) // 2
+            sheet.paste(tile.convert('RGBA'), (x, y))
+    buf = io.BytesIO()
+    sheet.save(buf, format='png', optimize=True)
+    return buf.getvalue(), layout
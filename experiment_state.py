@@ -0,0 +1,247 @@
+"""
+Per-experiment simulation state.
+
+Each stateful experiment keeps its state in one small object stored under a
+namespaced session key ("<experiment id>_state"). The classes use __slots__,
+registers, K-map cells, LUT contents and PLA planes are bit-packed ints, and
+every object round-trips through a few bytes (to_bytes / from_bytes), which
+is what the state backend checkpoints.
+"""
+import functools
+import operator
+import struct
+import streamlit as st
+from traces import TraceBuffer
+from netlist import incrementer, word_inputs, word_value
+from truthtable import TruthTable
+
+class ExperimentState:
+    """
+    Base class: the packed form is the `_FORMAT` struct of the slots, in
+    order. Subclasses with variable-length parts override to_bytes/from_bytes.
+    """
+    __slots__ = ()
+    _FORMAT = struct.Struct("")
+
+    def to_bytes(self):
+        return self._FORMAT.pack(*(getattr(self, name) for name in self.__slots__))
+
+    @classmethod
+    def from_bytes(cls, data):
+        state = cls()
+        for name, value in zip(cls.__slots__, cls._FORMAT.unpack(data)):
+            setattr(state, name, value)
+        return state
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.to_bytes() == other.to_bytes()
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+class KMapState(ExperimentState):
+    """Experiment 2: one bit per K-map cell, indexed by minterm."""
+    __slots__ = ("cells",)
+    _FORMAT = struct.Struct("<H")
+
+    def __init__(self):
+        self.cells = 0
+
+    def get(self, minterm):
+        return (self.cells >> minterm) & 1
+
+    def toggle(self, minterm):
+        self.cells ^= 1 << minterm
+
+    def minterms(self):
+        return set(self.table.minterms())
+
+    @property
+    def table(self):
+        """The marked cells as F(A, B, C, D), sharing the packed int."""
+        return TruthTable(4, self.cells)
+
+class FlipFlopState(ExperimentState):
+    """Experiment 6: stored bit Q and the clock level shown in the drawing."""
+    __slots__ = ("q", "clk")
+    _FORMAT = struct.Struct("<BB")
+
+    def __init__(self):
+        self.q = 0
+        self.clk = 0
+
+class ShiftRegisterState(ExperimentState):
+    """Experiment 7: 4-bit SISO register, Q3 in bit 3. Data enters at Q3."""
+    __slots__ = ("bits",)
+    _FORMAT = struct.Struct("<B")
+
+    def __init__(self):
+        self.bits = 0
+
+    def shift_in(self, data_in):
+        self.bits = (data_in << 3) | (self.bits >> 1)
+
+    def clear(self):
+        self.bits = 0
+
+    def as_list(self):
+        """Returns [Q3, Q2, Q1, Q0]."""
+        return [(self.bits >> i) & 1 for i in (3, 2, 1, 0)]
+
+class CounterState(ExperimentState):
+    """Experiment 8: 4-bit up-counter and its bounded trace of counts, one row per pulse."""
+    __slots__ = ("count", "trace")
+    TRACE_COLUMNS = ("Decimal",)
+
+    def __init__(self):
+        self.count = 0
+        self.trace = TraceBuffer(self.TRACE_COLUMNS)
+
+    def pulse(self):
+        self.count = word_value(incrementer(4).evaluate(word_inputs("Q", self.count, 4)), "N", 4)
+        self.trace.append(self.count)
+
+    def reset(self):
+        self.count = 0
+        self.trace.clear()
+
+    def trace_frame(self, start, stop):
+        """Trace rows [start, stop) as state-table rows (Step, Decimal, Binary, Q3..Q0)."""
+        df = self.trace.frame(start, stop)
+        counts = df["Decimal"].to_numpy()
+        df["Binary"] = [format(count, '04b') for count in counts]
+        for bit in (3, 2, 1, 0):
+            df[f"Q{bit}"] = (counts >> bit) & 1
+        return df
+
+    def to_bytes(self):
+        return bytes((self.count,)) + self.trace.to_bytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        if not data:
+            raise ValueError("empty counter state")
+        state = cls()
+        state.count = data[0] % 16
+        state.trace = TraceBuffer.from_bytes(cls.TRACE_COLUMNS, data[1:])
+        return state
+
+class SequenceDetectorState(ExperimentState):
+    """Experiment 9: '101' Mealy detector; `state` is stored as an index into STATES."""
+    __slots__ = ("state_index", "last_out", "clocked", "last_in")
+    _FORMAT = struct.Struct("<BBBB")
+    STATES = "ABC"
+
+    def __init__(self):
+        self.reset()
+        self.last_in = 0
+
+    @property
+    def state(self):
+        return self.STATES[self.state_index]
+
+    @state.setter
+    def state(self, name):
+        self.state_index = self.STATES.index(name)
+
+    def reset(self):
+        self.state_index = 0
+        self.last_out = 0
+        self.clocked = 0
+
+    @classmethod
+    def from_bytes(cls, data):
+        state = super().from_bytes(data)
+        state.state  # an out-of-range index raises IndexError here, not mid-experiment
+        return state
+
+class VendingState(ExperimentState):
+    """Experiment 10: inserted balance in cents and the dispense flag."""
+    __slots__ = ("balance", "dispensed")
+    _FORMAT = struct.Struct("<IB")
+
+    def __init__(self):
+        self.balance = 0
+        self.dispensed = 0
+
+class PLAState(ExperimentState):
+    """
+    Experiment 11: 2 product terms over inputs A, B. The AND plane holds bit
+    (2 * term + input), the OR plane bit `term`.
+    """
+    __slots__ = ("and_plane", "or_plane")
+    _FORMAT = struct.Struct("<BB")
+
+    def __init__(self):
+        self.and_plane = 0
+        self.or_plane = 0
+
+    def uses(self, term, inp):
+        return bool((self.and_plane >> (2 * term + inp)) & 1)
+
+    def set_uses(self, term, inp, on):
+        bit = 1 << (2 * term + inp)
+        self.and_plane = (self.and_plane | bit) if on else (self.and_plane & ~bit)
+
+    def includes(self, term):
+        return bool((self.or_plane >> term) & 1)
+
+    def function(self):
+        """F(A, B) as a TruthTable: the OR of the included, non-empty product terms."""
+        f = TruthTable(2)
+        for term in range(2):
+            literals = [TruthTable.variable(2, inp) for inp in range(2) if self.uses(term, inp)]
+            if literals and self.includes(term):
+                f |= functools.reduce(operator.and_, literals)
+        return f
+
+    def set_includes(self, term, on):
+        bit = 1 << term
+        self.or_plane = (self.or_plane | bit) if on else (self.or_plane & ~bit)
+
+class LUTState(ExperimentState):
+    """Experiment 12: 2-input LUT, output for address i in bit i."""
+    __slots__ = ("mem",)
+    _FORMAT = struct.Struct("<B")
+
+    def __init__(self):
+        self.mem = 0
+
+    def get(self, addr):
+        return (self.mem >> addr) & 1
+
+    def set(self, addr, value):
+        self.mem = (self.mem | (1 << addr)) if value else (self.mem & ~(1 << addr))
+
+    def as_list(self):
+        return [self.get(addr) for addr in range(4)]
+
+    @property
+    def table(self):
+        """The memory as F(A, B) (address = A B), sharing the packed int."""
+        return TruthTable(2, self.mem)
+
+# --- Registry ---
+# Experiment id -> state class; the session key is "<experiment id>_state".
+STATE_CLASSES = {
+    "u1_ex2": KMapState,
+    "u3_ex6": FlipFlopState,
+    "u3_ex7": ShiftRegisterState,
+    "u3_ex8": CounterState,
+    "u4_ex9": SequenceDetectorState,
+    "u4_ex10": VendingState,
+    "u5_ex11": PLAState,
+    "u5_ex12": LUTState,
+}
+
+def state_key(exp_id):
+    return f"{exp_id}_state"
+
+def get_experiment_state(exp_id):
+    """Returns the session's state object for an experiment, creating it on first use."""
+    key = state_key(exp_id)
+    state = st.session_state.get(key)
+    if state is None:
+        state = st.session_state[key] = STATE_CLASSES[exp_id]()
+    return state
@@ -1,7 +1,10 @@
+import os
+import threading
 import streamlit as st
 from utils import apply_lab_style
-from units import unit1_basics, unit2_combinational, unit3_sequential, unit4_advanced, unit5_pld_memory
-from tutor import SmartTutor
+from registry import unit_titles, unit_for_title, load_unit
+import progress as lab_progress
+import state_store
 
 # Page Configuration
 st.set_page_config(
@@ -13,6 +16,21 @@ st.set_page_config(
 # Apply Custom Styling
 apply_lab_style()
 
+# Bring back this student's progress and experiment state (once per session)
+state_store.restore_session()
+
+# Optional render atlas warm-up (CIRCUIT_PRERENDER=1), once per server process.
+# Runs in the background so the first page is not blocked.
+@st.cache_resource(show_spinner=False)
+def start_render_warmup():
+    from prerender import warm_render_cache
+    thread = threading.Thread(target=warm_render_cache, kwargs={"workers": 0}, daemon=True)
+    thread.start()
+    return thread
+
+if os.environ.get("CIRCUIT_PRERENDER") == "1":
+    start_render_warmup()
+
 # Sidebar Navigation
 # Sidebar Navigation
 st.sidebar.markdown("""
@@ -29,11 +47,7 @@ menu = st.sidebar.selectbox(
         "Home",
         "Getting Started",
         "My Progress",
-        "Unit 1: Basics",
-        "Unit 2: Combinational Circuits",
-        "Unit 3: Sequential Circuits",
-        "Unit 4: Advanced Logic",
-        "Unit 5: PLDs & Memory"
+        *unit_titles()
     ],
     label_visibility="collapsed"
 )
@@ -46,57 +60,18 @@ st.sidebar.markdown("""
     </div>
 """, unsafe_allow_html=True)
 
+if state_store.get_state_backend() is not None:
+    st.sidebar.caption("💾 Progress is saved to this page's link. Bookmark it to resume later.")
+
 if st.sidebar.button("🗑️ Reset All Progress", help="Clear all experiment progress and start over"):
+    state_store.forget_session()
     for key in list(st.session_state.keys()):
         del st.session_state[key]
     st.rerun()
 
 # Main Routing
-# --- GLOBAL PROGRESS CALCULATION ---
-tutor = SmartTutor()
-
-# Total steps for each experiment (must match tutor_config lengths)
-EXPERIMENT_STEPS = {
-    "u1_ex1": 16, "u1_ex2": 10,
-    "u2_ex3": 13, "u2_ex4": 12, "u2_ex5": 10,
-    "u3_ex6": 8,  "u3_ex7": 8,  "u3_ex8": 9,
-    "u4_ex9": 10, "u4_ex10": 10,
-    "u5_ex11": 10, "u5_ex12": 9
-}
-
-total_experiments = len(EXPERIMENT_STEPS)
-completed_count = 0
-
-# Calculate Per-Unit Progress
-unit_progress = {
-    "Unit 1": {"completed": 0, "total": 2},
-    "Unit 2": {"completed": 0, "total": 3},
-    "Unit 3": {"completed": 0, "total": 3},
-    "Unit 4": {"completed": 0, "total": 2},
-    "Unit 5": {"completed": 0, "total": 2}
-}
-
-# Map experiment IDs to Units
-exp_to_unit = {
-    "u1_ex1": "Unit 1", "u1_ex2": "Unit 1",
-    "u2_ex3": "Unit 2", "u2_ex4": "Unit 2", "u2_ex5": "Unit 2",
-    "u3_ex6": "Unit 3", "u3_ex7": "Unit 3", "u3_ex8": "Unit 3",
-    "u4_ex9": "Unit 4", "u4_ex10": "Unit 4",
-    "u5_ex11": "Unit 5", "u5_ex12": "Unit 5"
-}
-
-for exp_id, total_steps in EXPERIMENT_STEPS.items():
-    current_step = tutor.get_current_step(exp_id)
-    # Check if completed (current step index >= total steps)
-    if current_step >= total_steps:
-        completed_count += 1
-        unit_name = exp_to_unit[exp_id]
-        unit_progress[unit_name]["completed"] += 1
-        
-progress = completed_count / total_experiments if total_experiments > 0 else 0
-
 # Helper to generate progress bar HTML
-def get_unit_progress_html(unit_name, color):
+def get_unit_progress_html(unit_progress, unit_name, color):
     p = unit_progress[unit_name]
     pct = (p['completed'] / p['total']) * 100 if p['total'] > 0 else 0
     return f"""
@@ -193,6 +168,12 @@ if menu == "Home":
     st.markdown("<br/>", unsafe_allow_html=True)
 
 elif menu == "My Progress":
+    # O(1) reads from the progress index maintained by tutor step events
+    completed_count = lab_progress.completed_count()
+    total_experiments = lab_progress.total_count()
+    progress = lab_progress.overall_progress()
+    unit_progress = lab_progress.unit_progress()
+
     st.title("🚀 My Progress")
     st.markdown("Track your journey through the Digital Logic Lab curriculum.")
     
@@ -270,7 +251,7 @@ elif menu == "My Progress":
                     border: 1px solid rgba(59, 130, 246, 0.3); transition: all 0.3s;'>
             <h3 style='color: #60a5fa; margin-top: 0;'>🔌 Unit 1: Basics</h3>
             <p style='color: #94a3b8; font-size: 0.95rem; line-height: 1.6;'>Logic Gates, Boolean Algebra, K-Map Minimization</p>
-            {get_unit_progress_html("Unit 1", "#60a5fa")}
+            {get_unit_progress_html(unit_progress, "Unit 1", "#60a5fa")}
         </div>
         """, unsafe_allow_html=True)
         
@@ -280,7 +261,7 @@ elif menu == "My Progress":
                     border: 1px solid rgba(139, 92, 246, 0.3); transition: all 0.3s;'>
             <h3 style='color: #a78bfa; margin-top: 0;'>⚙️ Unit 2: Combinational</h3>
             <p style='color: #94a3b8; font-size: 0.95rem; line-height: 1.6;'>Adders, Mux/Demux, Code Converters</p>
-            {get_unit_progress_html("Unit 2", "#a78bfa")}
+            {get_unit_progress_html(unit_progress, "Unit 2", "#a78bfa")}
         </div>
         """, unsafe_allow_html=True)
         
@@ -290,7 +271,7 @@ elif menu == "My Progress":
                     border: 1px solid rgba(236, 72, 153, 0.3); transition: all 0.3s;'>
             <h3 style='color: #ec4899; margin-top: 0;'>🔄 Unit 3: Sequential</h3>
             <p style='color: #94a3b8; font-size: 0.95rem; line-height: 1.6;'>Flip-Flops, Shift Registers, Counters</p>
-            {get_unit_progress_html("Unit 3", "#ec4899")}
+            {get_unit_progress_html(unit_progress, "Unit 3", "#ec4899")}
         </div>
         """, unsafe_allow_html=True)
         
@@ -303,7 +284,7 @@ elif menu == "My Progress":
                     border: 1px solid rgba(34, 197, 94, 0.3); transition: all 0.3s;'>
             <h3 style='color: #22c55e; margin-top: 0;'>🧩 Unit 4: Advanced</h3>
             <p style='color: #94a3b8; font-size: 0.95rem; line-height: 1.6;'>FSM Design, State Machines, Real-world Controllers</p>
-            {get_unit_progress_html("Unit 4", "#22c55e")}
+            {get_unit_progress_html(unit_progress, "Unit 4", "#22c55e")}
         </div>
         """, unsafe_allow_html=True)
          
@@ -313,7 +294,7 @@ elif menu == "My Progress":
                     border: 1px solid rgba(251, 191, 36, 0.3); transition: all 0.3s;'>
             <h3 style='color: #f59e0b; margin-top: 0;'>💾 Unit 5: PLDs & Memory</h3>
             <p style='color: #94a3b8; font-size: 0.95rem; line-height: 1.6;'>PLA/PAL, FPGA Architecture, Programmable Logic</p>
-            {get_unit_progress_html("Unit 5", "#f59e0b")}
+            {get_unit_progress_html(unit_progress, "Unit 5", "#f59e0b")}
         </div>
         """, unsafe_allow_html=True)
     
@@ -364,17 +345,5 @@ elif menu == "Getting Started":
         </div>
         """, unsafe_allow_html=True)
 
-elif menu == "Unit 1: Basics":
-    unit1_basics.render()
-
-elif menu == "Unit 2: Combinational Circuits":
-    unit2_combinational.render()
-
-elif menu == "Unit 3: Sequential Circuits":
-    unit3_sequential.render()
-
-elif menu == "Unit 4: Advanced Logic":
-    unit4_advanced.render()
-
-elif menu == "Unit 5: PLDs & Memory":
-    unit5_pld_memory.render()
+elif unit_for_title(menu):
+    load_unit(unit_for_title(menu)).render()
@@ -0,0 +1,419 @@
+"""
+Gate-level netlist simulation.
+
+A Netlist is a set of typed nets (primary inputs, constants and gate outputs)
+driven by gates from GATE_LIBRARY. compile() levelizes the gates (topological
+order; combinational loops are rejected) into a flat program of two-input
+instructions and evaluate() runs that program in a single pass. For circuits evaluated
+over and over, compiled() generates straight-line Python source for the same
+levelized order and returns it as one function.
+
+Signals are Python ints used as bit vectors: bit i of every net belongs to
+input vector i, so `width` vectors are evaluated by one pass. The experiments
+evaluate one vector (width=1); exhaustive sweeps pack many.
+"""
+import functools
+import hashlib
+import operator
+from collections import deque
+
+INPUT, CONST, GATE = "input", "const", "gate"
+
+# --- Gate Library ---
+# kind -> (bitwise operator, inverted output, min inputs, max inputs or None).
+# One-input AND/OR/XOR act as buffers, which keeps generated product terms
+# uniform (a PLA term over a single literal is still an AND gate).
+GATE_LIBRARY = {
+    "BUF":  (operator.and_, False, 1, 1),
+    "NOT":  (operator.and_, True, 1, 1),
+    "AND":  (operator.and_, False, 1, None),
+    "NAND": (operator.and_, True, 1, None),
+    "OR":   (operator.or_, False, 1, None),
+    "NOR":  (operator.or_, True, 1, None),
+    "XOR":  (operator.xor, False, 1, None),
+    "XNOR": (operator.xor, True, 1, None),
+}
+
+class Net:
+    """A named signal. `kind` is INPUT, CONST or GATE; `value` is a constant's bit."""
+    __slots__ = ("name", "kind", "index", "value")
+
+    def __init__(self, name, kind, index, value=0):
+        self.name = name
+        self.kind = kind
+        self.index = index
+        self.value = value
+
+    def __repr__(self):
+        return f"Net({self.name!r}, {self.kind})"
+
+class Gate:
+    __slots__ = ("kind", "inputs", "output")
+
+    def __init__(self, kind, inputs, output):
+        self.kind = kind
+        self.inputs = tuple(inputs)
+        self.output = output
+
+    def __repr__(self):
+        return f"Gate({self.kind}, {list(self.inputs)} -> {self.output!r})"
+
+class Netlist:
+    """
+    Combinational circuit. Gates may reference nets that are declared later;
+    every referenced net must exist by the time the netlist is compiled.
+    """
+    def __init__(self, name=""):
+        self.name = name
+        self.nets = {}     # net name -> Net
+        self.gates = []
+        self.outputs = {}  # output name -> net name
+        self._program = self._compiled = None
+
+    def __repr__(self):
+        return f"Netlist({self.name!r}, inputs={len(self.inputs)}, gates={len(self.gates)}, outputs={len(self.outputs)})"
+
+    @property
+    def inputs(self):
+        return [net.name for net in self.nets.values() if net.kind == INPUT]
+
+    def _add_net(self, name, kind, value=0):
+        if name in self.nets:
+            raise ValueError(f"Net '{name}' is already defined.")
+        self.nets[name] = Net(name, kind, len(self.nets), value)
+        self._program = self._compiled = None
+        return name
+
+    def add_input(self, name):
+        return self._add_net(name, INPUT)
+
+    def add_const(self, name, value):
+        return self._add_net(name, CONST, 1 if value else 0)
+
+    def add_gate(self, kind, inputs, name=None):
+        """Adds a gate driving a new net (auto-named if `name` is None) and returns the net name."""
+        if kind not in GATE_LIBRARY:
+            raise ValueError(f"Unknown gate '{kind}'. Choose from {tuple(GATE_LIBRARY)}.")
+        _, _, min_in, max_in = GATE_LIBRARY[kind]
+        inputs = list(inputs)
+        if len(inputs) < min_in or (max_in is not None and len(inputs) > max_in):
+            raise ValueError(f"{kind} gate cannot take {len(inputs)} inputs.")
+        name = name or f"_{kind.lower()}{len(self.gates)}"
+        self._add_net(name, GATE)
+        self.gates.append(Gate(kind, inputs, name))
+        return name
+
+    def add_output(self, name, net):
+        self.outputs[name] = net
+        self._program = self._compiled = None
+
+    # --- Levelization ---
+    def levelize(self):
+        """
+        Returns the gates grouped by logic level: level 0 gates read only inputs
+        and constants, level n gates read at least one level n-1 gate. Raises
+        ValueError on undriven nets and combinational loops.
+        """
+        driver = {gate.output: gate for gate in self.gates}
+        for gate in self.gates:
+            for net in gate.inputs:
+                if net not in self.nets:
+                    raise ValueError(f"Gate {gate.output!r} reads undefined net '{net}'.")
+        for out_name, net in self.outputs.items():
+            if net not in self.nets:
+                raise ValueError(f"Output '{out_name}' is connected to undefined net '{net}'.")
+
+        # Kahn's algorithm over gate-to-gate edges
+        pending = {}
+        fanout = {}
+        for gate in self.gates:
+            sources = {net for net in gate.inputs if net in driver}
+            pending[gate.output] = len(sources)
+            for net in sources:
+                fanout.setdefault(net, []).append(gate)
+        level = {}
+        ready = deque(gate for gate in self.gates if pending[gate.output] == 0)
+        levels = []
+        placed = 0
+        while ready:
+            gate = ready.popleft()
+            depth = level.setdefault(gate.output, 0)
+            while len(levels) <= depth:
+                levels.append([])
+            levels[depth].append(gate)
+            placed += 1
+            for reader in fanout.get(gate.output, ()):
+                level[reader.output] = max(level.get(reader.output, 0), depth + 1)
+                pending[reader.output] -= 1
+                if pending[reader.output] == 0:
+                    ready.append(reader)
+        if placed < len(self.gates):
+            looped = sorted(name for name, count in pending.items() if count)
+            raise ValueError(f"Combinational loop through nets {looped[:8]}.")
+        return levels
+
+    def depth(self):
+        return len(self.levelize())
+
+    # --- Compilation and Evaluation ---
+    def compile(self):
+        """
+        Flattens the levelized netlist into (operator, out, a, b, invert)
+        instructions over a slot list. n-input gates become chains of two-input
+        instructions through scratch slots; single-input gates copy their input
+        (a & a), inverted for NOT/NAND/NOR/XNOR.
+        invert is -1 (XOR with all ones) or 0, so evaluation is branch-free.
+        """
+        if self._program is not None:
+            return self._program
+        slots = len(self.nets)
+        index = {name: net.index for name, net in self.nets.items()}
+        instructions = []
+        for gates in self.levelize():
+            for gate in gates:
+                op, inverted, _, _ = GATE_LIBRARY[gate.kind]
+                ins = [index[net] for net in gate.inputs]
+                invert = -1 if inverted else 0
+                if len(ins) == 1:
+                    # a & a copies a: every one-input gate is a buffer (or inverter)
+                    instructions.append((operator.and_, index[gate.output], ins[0], ins[0], invert))
+                    continue
+                acc = ins[0]
+                for nxt in ins[1:-1]:
+                    instructions.append((op, slots, acc, nxt, 0))
+                    acc, slots = slots, slots + 1
+                instructions.append((op, index[gate.output], acc, ins[-1], invert))
+        initial = [0] * slots
+        for net in self.nets.values():
+            if net.kind == CONST and net.value:
+                initial[net.index] = -1
+        self._program = (
+            tuple(instructions),
+            initial,
+            tuple((net.name, net.index) for net in self.nets.values() if net.kind == INPUT),
+            tuple((name, index[net]) for name, net in self.outputs.items()),
+        )
+        return self._program
+
+    def evaluate(self, inputs, width=1, nets=False):
+        """
+        Evaluates the circuit for `inputs` (input name -> int; bit i is vector
+        i) and returns {output name: int}, each masked to `width` bits. With
+        nets=True, returns the value of every net instead.
+        """
+        instructions, initial, input_slots, output_slots = self.compile()
+        mask = (1 << width) - 1
+        values = initial[:]
+        for name, slot in input_slots:
+            try:
+                values[slot] = inputs[name] & mask
+            except KeyError:
+                raise ValueError(f"Missing value for input '{name}'.") from None
+        for op, out, a, b, invert in instructions:
+            values[out] = op(values[a], values[b]) ^ invert
+        if nets:
+            return {name: values[net.index] & mask for name, net in self.nets.items()}
+        return {name: values[slot] & mask for name, slot in output_slots}
+
+    # --- Code Generation ---
+    def fingerprint(self):
+        """Structural hash: equal for netlists with the same nets, gates and outputs."""
+        h = hashlib.sha256()
+        for net in self.nets.values():
+            h.update(f"{net.kind}:{net.name}={net.value};".encode())
+        for gate in self.gates:
+            h.update(f"{gate.output}={gate.kind}({','.join(gate.inputs)});".encode())
+        for name, net in self.outputs.items():
+            h.update(f"{name}<{net};".encode())
+        return h.hexdigest()
+
+    def source(self):
+        """
+        Python source of the compiled form: one bitwise statement per gate in
+        level order, over locals. Same contract as evaluate() without `nets`.
+        """
+        levels = self.levelize()
+        var = {name: f"n{net.index}" for name, net in self.nets.items()}
+        lines = [f"def evaluate(inputs, width=1):",
+                 f"    # {self.name!r}: {len(self.gates)} gates, depth {len(levels)}",
+                 f"    mask = (1 << width) - 1"]
+        for net in self.nets.values():
+            if net.kind == INPUT:
+                lines.append(f"    {var[net.name]} = inputs[{net.name!r}] & mask")
+            elif net.kind == CONST:
+                lines.append(f"    {var[net.name]} = {-net.value}")
+        for gates in levels:
+            for gate in gates:
+                op, inverted, _, _ = GATE_LIBRARY[gate.kind]
+                expr = f" {_OP_SYMBOLS[op]} ".join(var[net] for net in gate.inputs)
+                if inverted:
+                    expr = f"~({expr})"
+                lines.append(f"    {var[gate.output]} = {expr}")
+        outputs = ", ".join(f"{name!r}: {var[net]} & mask" for name, net in self.outputs.items())
+        lines.append(f"    return {{{outputs}}}")
+        return "\n".join(lines) + "\n"
+
+    def compiled(self):
+        """
+        The netlist as a generated function f(inputs, width=1) -> outputs.
+        Code objects are shared by structurally identical netlists. A missing
+        input raises KeyError.
+        """
+        if self._compiled is None:
+            self._compiled = _compile_source(self.fingerprint(), self.source())
+        return self._compiled
+
+_OP_SYMBOLS = {operator.and_: "&", operator.or_: "|", operator.xor: "^"}
+
+@functools.lru_cache(maxsize=256)
+def _compile_source(fingerprint, source):
+    namespace = {}
+    exec(compile(source, f"<netlist {fingerprint[:12]}>", "exec"), namespace)
+    return namespace["evaluate"]
+
+# --- Standard Circuits ---
+# Netlists for the lab's circuits. Builders are cached: each circuit is
+# compiled once per process and shared by every session.
+
+@functools.lru_cache(maxsize=None)
+def gate_circuit(kind):
+    """Single gate: inputs A (and B), output Y."""
+    net = Netlist(kind)
+    ins = [net.add_input("A")] if GATE_LIBRARY[kind][3] == 1 else [net.add_input("A"), net.add_input("B")]
+    net.add_output("Y", net.add_gate(kind, ins, "Y"))
+    return net
+
+def _full_adder_into(net, a, b, cin, prefix=""):
+    """Adds a full adder (2 XOR, 2 AND, 1 OR) and returns its (sum, carry) nets."""
+    x = net.add_gate("XOR", [a, b], f"{prefix}X1")
+    total = net.add_gate("XOR", [x, cin], f"{prefix}Sum")
+    c1 = net.add_gate("AND", [a, b], f"{prefix}C1")
+    c2 = net.add_gate("AND", [cin, x], f"{prefix}C2")
+    return total, net.add_gate("OR", [c1, c2], f"{prefix}Cout")
+
+@functools.lru_cache(maxsize=None)
+def half_adder():
+    net = Netlist("Half Adder")
+    a, b = net.add_input("A"), net.add_input("B")
+    net.add_output("Sum", net.add_gate("XOR", [a, b], "Sum"))
+    net.add_output("Carry", net.add_gate("AND", [a, b], "Carry"))
+    return net
+
+@functools.lru_cache(maxsize=None)
+def full_adder():
+    net = Netlist("Full Adder")
+    total, carry = _full_adder_into(net, net.add_input("A"), net.add_input("B"), net.add_input("Cin"))
+    net.add_output("Sum", total)
+    net.add_output("Cout", carry)
+    return net
+
+@functools.lru_cache(maxsize=None)
+def ripple_adder(width):
+    """`width`-bit ripple-carry adder: inputs A0.., B0.., Cin; outputs S0.., Cout."""
+    net = Netlist(f"{width}-bit Ripple Adder")
+    a = [net.add_input(f"A{i}") for i in range(width)]
+    b = [net.add_input(f"B{i}") for i in range(width)]
+    carry = net.add_input("Cin")
+    for i in range(width):
+        total, carry = _full_adder_into(net, a[i], b[i], carry, prefix=f"FA{i}.")
+        net.add_output(f"S{i}", total)
+    net.add_output("Cout", carry)
+    return net
+
+@functools.lru_cache(maxsize=None)
+def mux4():
+    """4-to-1 multiplexer: inputs D0..D3, S1, S0; output Y."""
+    net = Netlist("4:1 MUX")
+    data = [net.add_input(f"D{i}") for i in range(4)]
+    s1, s0 = net.add_input("S1"), net.add_input("S0")
+    ns1, ns0 = net.add_gate("NOT", [s1], "S1'"), net.add_gate("NOT", [s0], "S0'")
+    selects = [(ns1, ns0), (ns1, s0), (s1, ns0), (s1, s0)]
+    terms = [net.add_gate("AND", [sel1, sel0, d], f"T{i}") for i, (d, (sel1, sel0)) in enumerate(zip(data, selects))]
+    net.add_output("Y", net.add_gate("OR", terms, "Y"))
+    return net
+
+# Segments lit for each BCD digit; codes 10-15 leave the display blank.
+SEVEN_SEGMENT_DIGITS = {
+    0: "abcdef", 1: "bc", 2: "abdeg", 3: "abcdg", 4: "bcfg",
+    5: "acdfg", 6: "acdefg", 7: "abc", 8: "abcdefg", 9: "abcdfg",
+}
+
+@functools.lru_cache(maxsize=None)
+def bcd_to_seven_segment():
+    """BCD decoder: inputs D3..D0, outputs a..g, each a sum of digit minterms."""
+    net = Netlist("BCD to 7-Segment")
+    bits = [net.add_input(f"D{i}") for i in (3, 2, 1, 0)]
+    inverted = [net.add_gate("NOT", [bit], f"{bit}'") for bit in bits]
+    minterms = {}
+    for digit in SEVEN_SEGMENT_DIGITS:
+        literals = [bits[i] if (digit >> (3 - i)) & 1 else inverted[i] for i in range(4)]
+        minterms[digit] = net.add_gate("AND", literals, f"M{digit}")
+    for seg in "abcdefg":
+        lit = [minterms[d] for d, segments in SEVEN_SEGMENT_DIGITS.items() if seg in segments]
+        net.add_output(seg, net.add_gate("OR", lit, seg))
+    return net
+
+@functools.lru_cache(maxsize=None)
+def flip_flop_next_state(ff_type):
+    """
+    Characteristic equation of a flip-flop: its inputs plus Q, output Qn.
+    SR: S + R'Q (S=R=1 is reported as invalid by the caller), JK: JQ' + K'Q,
+    D: D, T: T xor Q.
+    """
+    net = Netlist(f"{ff_type} Flip-Flop")
+    if ff_type == "SR":
+        s, r, q = net.add_input("S"), net.add_input("R"), net.add_input("Q")
+        hold = net.add_gate("AND", [net.add_gate("NOT", [r], "R'"), q], "R'Q")
+        qn = net.add_gate("OR", [s, hold], "Qn")
+    elif ff_type == "JK":
+        j, k, q = net.add_input("J"), net.add_input("K"), net.add_input("Q")
+        setq = net.add_gate("AND", [j, net.add_gate("NOT", [q], "Q'")], "JQ'")
+        hold = net.add_gate("AND", [net.add_gate("NOT", [k], "K'"), q], "K'Q")
+        qn = net.add_gate("OR", [setq, hold], "Qn")
+    elif ff_type == "D":
+        net.add_input("Q")
+        qn = net.add_gate("BUF", [net.add_input("D")], "Qn")
+    elif ff_type == "T":
+        qn = net.add_gate("XOR", [net.add_input("T"), net.add_input("Q")], "Qn")
+    else:
+        raise ValueError(f"Unknown flip-flop type '{ff_type}'.")
+    net.add_output("Qn", qn)
+    return net
+
+@functools.lru_cache(maxsize=None)
+def incrementer(width):
+    """Next-state logic of a `width`-bit up-counter: Q0.. -> N0.. (mod 2**width), a half-adder chain."""
+    net = Netlist(f"{width}-bit Incrementer")
+    q = [net.add_input(f"Q{i}") for i in range(width)]
+    net.add_output("N0", net.add_gate("NOT", [q[0]], "N0"))
+    carry = q[0]
+    for i in range(1, width):
+        net.add_output(f"N{i}", net.add_gate("XOR", [q[i], carry], f"N{i}"))
+        carry = net.add_gate("AND", [q[i], carry], f"C{i}")
+    return net
+
+@functools.lru_cache(maxsize=None)
+def pla(and_plane, or_plane, inputs=("A", "B"), terms=2):
+    """
+    Programmed PLA. Bit (len(inputs) * term + input) of `and_plane` connects an
+    input to a product term and bit `term` of `or_plane` connects the term to
+    output F. Empty terms and an empty OR plane are tied to 0.
+    """
+    net = Netlist("PLA")
+    ins = [net.add_input(name) for name in inputs]
+    zero = net.add_const("0", 0)
+    products = []
+    for term in range(terms):
+        literals = [ins[i] for i in range(len(ins)) if (and_plane >> (len(ins) * term + i)) & 1]
+        products.append(net.add_gate("AND", literals or [zero], f"P{term + 1}"))
+    used = [products[term] for term in range(terms) if (or_plane >> term) & 1]
+    net.add_output("F", net.add_gate("OR", used or [zero], "F"))
+    return net
+
+def word_inputs(prefix, value, width):
+    """Splits an int into per-bit inputs: word_inputs("Q", 5, 4) -> {"Q0": 1, "Q1": 0, ...}."""
+    return {f"{prefix}{i}": (value >> i) & 1 for i in range(width)}
+
+def word_value(outputs, prefix, width):
+    """Inverse of word_inputs for a circuit's outputs."""
+    return sum(outputs[f"{prefix}{i}"] << i for i in range(width))
@@ -0,0 +1,139 @@
+"""
+Render atlas warm-up.
+
+Every experiment's visual state space is small and finite, so all of it can be
+rendered ahead of time (at deploy time or process start) into the render
+caches. The first student to reach any state then never pays for a cold render.
+
+Usage:
+    python prerender.py [--workers N] [--backend matplotlib|svg]
+"""
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import circuits
+import netlist
+
+BITS = (0, 1)
+
+def _gate_output(gate_type, a, b):
+    # Same netlists as Experiment 1
+    return netlist.gate_circuit(gate_type).evaluate({"A": a, "B": b})["Y"]
+
+def iter_render_states():
+    """
+    Yields (experiment_id, draw_function_name, args, kwargs) for every state the
+    experiments can draw, using exactly the argument shapes the units pass.
+    """
+    # Experiment 1: Logic Gates
+    for gate_type in ["AND", "OR", "NAND", "NOR", "XOR"]:
+        for a, b in itertools.product(BITS, BITS):
+            yield "u1_ex1", "draw_logic_gate", (gate_type, [a, b], _gate_output(gate_type, a, b)), {}
+    for a in BITS:
+        yield "u1_ex1", "draw_logic_gate", ("NOT", [a], _gate_output("NOT", a, 0)), {}
+
+    # Experiment 3: Half Adder and Full Adder
+    for a, b in itertools.product(BITS, BITS):
+        yield "u2_ex3", "draw_half_adder", (a, b), {}
+    for a, b, cin in itertools.product(BITS, BITS, BITS):
+        out = netlist.full_adder().evaluate({"A": a, "B": b, "Cin": cin})
+        yield "u2_ex3", "draw_generic_block", ("Full Adder", ["A", "B", "Cin"], ["Sum", "Cout"]), {
+            "active_inputs": {"A": a, "B": b, "Cin": cin},
+            "active_outputs": {"Sum": out["Sum"], "Cout": out["Cout"]},
+        }
+
+    # Experiment 4: 16 data configurations x 4 select addresses
+    for d_inputs in itertools.product(BITS, repeat=4):
+        for s1, s0 in itertools.product(BITS, BITS):
+            yield "u2_ex4", "draw_mux_4to1", (list(d_inputs), [s1, s0]), {}
+
+    # Experiment 5: BCD digits
+    for digit in range(10):
+        yield "u2_ex5", "draw_seven_segment", (digit,), {}
+
+    # Experiment 6: flip-flop type x inputs x Q x clock
+    ff_inputs = {"SR": ("S", "R"), "JK": ("J", "K"), "D": ("D",), "T": ("T",)}
+    for ff_type, names in ff_inputs.items():
+        for values in itertools.product(BITS, repeat=len(names)):
+            for q, clk_state in itertools.product(BITS, BITS):
+                yield "u3_ex6", "draw_flip_flop", (ff_type, dict(zip(names, values)), q, 1 - q, clk_state), {}
+
+    # Experiment 7: serial input x 16 register states
+    for data_in in BITS:
+        for reg in itertools.product(BITS, repeat=4):
+            yield "u3_ex7", "draw_generic_block", ("4-Bit Shift Register", ["Data In", "Clk", "Clear"], ["Q3", "Q2", "Q1", "Q0"]), {
+                "active_inputs": {"Data In": data_in},
+                "active_outputs": dict(zip(["Q3", "Q2", "Q1", "Q0"], reg)),
+            }
+
+    # Experiment 8: 16 counter states
+    for count in range(16):
+        bits = [int(c) for c in format(count, '04b')]
+        yield "u3_ex8", "draw_generic_block", ("4-Bit Counter", ["Clk", "Reset"], ["Q3", "Q2", "Q1", "Q0"]), {
+            "active_outputs": dict(zip(["Q3", "Q2", "Q1", "Q0"], bits)),
+        }
+
+def _render_state(task):
+    backend, func_name, args, kwargs = task
+    circuits.set_circuit_backend(backend)
+    return getattr(circuits, func_name)(*args, **kwargs).getvalue()
+
+def warm_render_cache(workers=None, backend=None):
+    """
+    Pre-renders every experiment state into the in-memory (and, if enabled,
+    on-disk) render caches. workers=0 renders in the calling process.
+    Returns a summary dict with the state count, elapsed time and bytes.
+    """
+    backend = backend or circuits.CIRCUIT_BACKEND
+    states = list(iter_render_states())
+    tasks = [(backend, func_name, args, kwargs) for _, func_name, args, kwargs in states]
+
+    start = time.perf_counter()
+    if workers == 0:
+        results = [_render_state(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            results = list(pool.map(_render_state, tasks, chunksize=8))
+
+    # Fill this process's memory tier with the workers' output
+    previous_backend = circuits.CIRCUIT_BACKEND
+    circuits.set_circuit_backend(backend)
+    try:
+        for (_, func_name, args, kwargs), data in zip(tasks, results):
+            key, _, _ = getattr(circuits, func_name).cache_key(*args, **kwargs)
+            circuits.render_cache.put(key, data)
+    finally:
+        circuits.set_circuit_backend(previous_backend)
+    elapsed = time.perf_counter() - start
+
+    per_experiment = {}
+    for exp_id, *_ in states:
+        per_experiment[exp_id] = per_experiment.get(exp_id, 0) + 1
+
+    return {
+        "backend": backend,
+        "states": len(states),
+        "per_experiment": per_experiment,
+        "seconds": elapsed,
+        "bytes": sum(len(data) for data in results),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-render every experiment state into the render cache.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count, 0 = in-process)")
+    parser.add_argument("--backend", choices=circuits.CIRCUIT_BACKENDS, default=None, help="Rendering backend to warm")
+    args = parser.parse_args()
+
+    summary = warm_render_cache(workers=args.workers, backend=args.backend)
+    print(f"Pre-rendered {summary['states']} states ({summary['backend']} backend) "
+          f"in {summary['seconds']:.2f}s, {summary['bytes'] / 1024:.1f} KiB")
+    for exp_id, count in summary["per_experiment"].items():
+        print(f"  {exp_id}: {count} states")
+    if circuits.disk_cache is None:
+        print("Note: on-disk cache is disabled; only this process was warmed.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Progress index.
+
+Completion totals (per experiment, per unit and overall) kept up to date by
+SmartTutor step events, so the progress page reads them in O(1) instead of
+scanning every experiment on each rerun.
+"""
+import streamlit as st
+from registry import UNITS, EXPERIMENTS, step_count
+from tutor import SmartTutor
+
+def _new_index():
+    index = {
+        "completed": set(),
+        "units": {name: {"completed": 0, "total": 0} for name in UNITS},
+    }
+    for exp in EXPERIMENTS.values():
+        index["units"][exp["unit"]]["total"] += 1
+    # Seed from whatever tutor state the session already holds (one-off scan)
+    for exp_id, step_index in st.session_state.get('tutor_state', {}).items():
+        if exp_id in EXPERIMENTS and step_index >= step_count(exp_id):
+            _mark(index, exp_id, True)
+    return index
+
+def _index():
+    if 'progress_index' not in st.session_state:
+        st.session_state.progress_index = _new_index()
+    return st.session_state.progress_index
+
+def _mark(index, exp_id, completed):
+    unit = index["units"][EXPERIMENTS[exp_id]["unit"]]
+    if completed and exp_id not in index["completed"]:
+        index["completed"].add(exp_id)
+        unit["completed"] += 1
+    elif not completed and exp_id in index["completed"]:
+        index["completed"].discard(exp_id)
+        unit["completed"] -= 1
+
+@SmartTutor.add_step_listener
+def _on_step_change(exp_id, old_step, new_step):
+    if exp_id not in EXPERIMENTS:
+        return
+    if 'progress_index' not in st.session_state:
+        # Built lazily on first read, from the already updated tutor state
+        return
+    total = step_count(exp_id)
+    if (old_step >= total) != (new_step >= total):
+        _mark(st.session_state.progress_index, exp_id, new_step >= total)
+
+# --- Readers ---
+
+def is_completed(exp_id):
+    return exp_id in _index()["completed"]
+
+def completed_count():
+    return len(_index()["completed"])
+
+def total_count():
+    return len(EXPERIMENTS)
+
+def overall_progress():
+    """Fraction of experiments completed (0.0 - 1.0)."""
+    return completed_count() / total_count() if total_count() > 0 else 0
+
+def unit_progress():
+    """Returns {unit name: {"completed": n, "total": m}}."""
+    return _index()["units"]
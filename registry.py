@@ -0,0 +1,67 @@
+"""
+Experiment registry.
+
+Single source of truth for which experiments exist, which unit they belong
+to and how many tutor steps they have. Unit modules are imported the first
+time they are needed, and step counts are read from each experiment's tutor
+config once per process.
+"""
+import functools
+import importlib
+
+# --- Units ---
+# Keyed by the short unit name used on the progress page, in curriculum order.
+UNITS = {
+    "Unit 1": {"title": "Unit 1: Basics", "module": "units.unit1_basics"},
+    "Unit 2": {"title": "Unit 2: Combinational Circuits", "module": "units.unit2_combinational"},
+    "Unit 3": {"title": "Unit 3: Sequential Circuits", "module": "units.unit3_sequential"},
+    "Unit 4": {"title": "Unit 4: Advanced Logic", "module": "units.unit4_advanced"},
+    "Unit 5": {"title": "Unit 5: PLDs & Memory", "module": "units.unit5_pld_memory"},
+}
+
+# --- Experiments ---
+# "steps" names the function in the unit module that builds the tutor config.
+EXPERIMENTS = {
+    "u1_ex1": {"unit": "Unit 1", "title": "Experiment 1: Logic Gate Analysis", "steps": "tutor_steps_1"},
+    "u1_ex2": {"unit": "Unit 1", "title": "Experiment 2: Boolean Algebra & K-Map", "steps": "tutor_steps_2"},
+    "u2_ex3": {"unit": "Unit 2", "title": "Experiment 3: Adder Studio", "steps": "tutor_steps_3"},
+    "u2_ex4": {"unit": "Unit 2", "title": "Experiment 4: Multiplexer Logic", "steps": "tutor_steps_4"},
+    "u2_ex5": {"unit": "Unit 2", "title": "Experiment 5: Code Converters", "steps": "tutor_steps_5"},
+    "u3_ex6": {"unit": "Unit 3", "title": "Experiment 6: Flip-Flop Fundamentals", "steps": "tutor_steps_6"},
+    "u3_ex7": {"unit": "Unit 3", "title": "Experiment 7: Shift Registers", "steps": "tutor_steps_7"},
+    "u3_ex8": {"unit": "Unit 3", "title": "Experiment 8: Counters", "steps": "tutor_steps_8"},
+    "u4_ex9": {"unit": "Unit 4", "title": "Experiment 9: Sequence Detector (FSM)", "steps": "tutor_steps_9"},
+    "u4_ex10": {"unit": "Unit 4", "title": "Experiment 10: Vending Machine", "steps": "tutor_steps_10"},
+    "u5_ex11": {"unit": "Unit 5", "title": "Experiment 11: PLA/PAL Designer", "steps": "tutor_steps_11"},
+    "u5_ex12": {"unit": "Unit 5", "title": "Experiment 12: FPGA Architecture", "steps": "tutor_steps_12"},
+}
+
+def unit_titles():
+    """Returns the unit page titles in curriculum order (sidebar entries)."""
+    return [unit["title"] for unit in UNITS.values()]
+
+def unit_for_title(title):
+    """Returns the unit name for a page title, or None for non-unit pages."""
+    for name, unit in UNITS.items():
+        if unit["title"] == title:
+            return name
+    return None
+
+def load_unit(name):
+    """Imports (on first use) and returns the module that renders a unit."""
+    return importlib.import_module(UNITS[name]["module"])
+
+def experiments_in_unit(name):
+    """Returns the experiment ids of a unit, in order."""
+    return [exp_id for exp_id, exp in EXPERIMENTS.items() if exp["unit"] == name]
+
+@functools.lru_cache(maxsize=None)
+def step_count(exp_id):
+    """Number of tutor steps in an experiment, taken from its tutor config."""
+    exp = EXPERIMENTS[exp_id]
+    build_steps = getattr(load_unit(exp["unit"]), exp["steps"])
+    return len(build_steps())
+
+def step_counts():
+    """Returns {experiment id: step count} for every experiment."""
+    return {exp_id: step_count(exp_id) for exp_id in EXPERIMENTS}
@@ -0,0 +1,533 @@
+"""
+Durable lab state.
+
+Tutor progress (current steps, completions and the last simulation context of
+each experiment) and experiment state (the packed objects of
+experiment_state.py: registers, counters, FSM states, PLA and LUT
+programming, ...) are kept in a pluggable backend, so a server restart, a
+redeploy, a new browser tab or a failover to another replica does not wipe a
+student's work.
+
+Backends, chosen with STATE_BACKEND:
+- "sqlite" (default): a local SQLite database in WAL mode (STATE_DB_PATH).
+  Every replica on the host, or sharing its volume, sees the same state.
+- "memory": a process-local dict. Survives reloads and new tabs, not restarts.
+- "redis://host:port/db": a Redis-compatible key-value server, one hash per
+  student (needs the `redis` package). Any replica can serve any student.
+
+Shared backends write behind: writes never touch the disk or network on the
+script thread. They land in an in-memory buffer (repeated writes to the same
+key coalesce) that a background thread flushes in batches. A student's state
+is read back with a single indexed query (or one HGETALL) when their session
+starts.
+"""
+import atexit
+import base64
+import binascii
+import json
+import os
+import re
+import sqlite3
+import struct
+import threading
+import time
+import uuid
+
+import streamlit as st
+from experiment_state import STATE_CLASSES, state_key
+
+def _user_state_dir():
+    # Per-user application state, outside the source tree: $XDG_STATE_HOME,
+    # %LOCALAPPDATA% on Windows, otherwise ~/.local/state
+    base = os.environ.get("XDG_STATE_HOME") or os.environ.get("LOCALAPPDATA")
+    return os.path.join(base or os.path.join(os.path.expanduser("~"), ".local", "state"), "dld_lab")
+
+DEFAULT_BACKEND = os.environ.get("STATE_BACKEND", "sqlite")
+DEFAULT_DB_PATH = os.environ.get("STATE_DB_PATH", os.path.join(_user_state_dir(), "lab_state.sqlite3"))
+DEFAULT_FLUSH_INTERVAL = float(os.environ.get("STATE_FLUSH_INTERVAL", 1.0))
+
+SCHEMA_VERSION = 1
+
+# Kinds of stored values, mirrored into these session_state entries
+STEP = "step"          # tutor_state[unit_id]
+COMPLETED = "done"     # tutor_progress[key]
+CONTEXT = "ctx"        # {unit_id}_ctx
+EXPERIMENT = "exp"     # <exp_id>_state, packed with ExperimentState.to_bytes()
+
+# --- Value Encoding ---
+# Values are plain data; sets (e.g. marked K-map cells) are tagged so they
+# come back as sets. Backends only ever hold encoded strings, never the
+# session's own (mutable) objects.
+
+def _json_default(value):
+    if isinstance(value, (set, frozenset)):
+        return {"__set__": sorted(value, key=repr)}
+    raise TypeError(f"cannot store {type(value).__name__}")
+
+def _json_object_hook(obj):
+    if len(obj) == 1 and "__set__" in obj:
+        return set(obj["__set__"])
+    return obj
+
+def encode_value(value):
+    return json.dumps(value, default=_json_default, separators=(",", ":"))
+
+def decode_value(text):
+    return json.loads(text, object_hook=_json_object_hook)
+
+# --- Backends ---
+
+class StateBackend:
+    """
+    Stores encoded values keyed by (student, kind, key).
+
+    Subclasses implement put_encoded(), delete(), clear_student() and
+    _read(student) -> {(kind, key): encoded}.
+    """
+    def put(self, student, kind, key, value):
+        """Stores a value for the student; returns False if it cannot be encoded."""
+        try:
+            encoded = encode_value(value)
+        except (TypeError, ValueError):
+            return False
+        self.put_encoded(student, kind, str(key), encoded)
+        return True
+
+    def put_encoded(self, student, kind, key, encoded):
+        raise NotImplementedError
+
+    def delete(self, student, kind, key):
+        raise NotImplementedError
+
+    def clear_student(self, student):
+        raise NotImplementedError
+
+    def _read(self, student):
+        raise NotImplementedError
+
+    def load(self, student):
+        """Returns {kind: {key: value}} for a student."""
+        state = {}
+        for (kind, key), encoded in self._read(student).items():
+            state.setdefault(kind, {})[key] = decode_value(encoded)
+        return state
+
+    def flush(self):
+        return 0
+
+    def close(self):
+        pass
+
+    def stats(self):
+        return {"backend": type(self).__name__}
+
+class InProcessBackend(StateBackend):
+    """Process-local backend: one dict per student."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._students = {}
+
+    def put_encoded(self, student, kind, key, encoded):
+        with self._lock:
+            self._students.setdefault(student, {})[(kind, key)] = encoded
+
+    def delete(self, student, kind, key):
+        with self._lock:
+            self._students.get(student, {}).pop((kind, key), None)
+
+    def clear_student(self, student):
+        with self._lock:
+            self._students.pop(student, None)
+
+    def _read(self, student):
+        with self._lock:
+            return dict(self._students.get(student, {}))
+
+    def stats(self):
+        with self._lock:
+            return {"backend": type(self).__name__, "students": len(self._students)}
+
+class WriteBehindBackend(StateBackend):
+    """
+    Buffers writes in memory and flushes them from a background thread.
+
+    put_encoded() only updates a dict under a lock. The buffer is flushed
+    every `flush_interval` seconds, or as soon as `max_batch` keys are
+    pending; a failed batch is kept for the next flush. load() merges
+    buffered and in-flight writes over the stored rows, so a session always
+    reads its own writes. Subclasses implement _write_batch(batch),
+    _read(student) and _clear(student).
+    """
+    def __init__(self, flush_interval=DEFAULT_FLUSH_INTERVAL, max_batch=500):
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._pending = {}   # (student, kind, key) -> encoded value or None (delete)
+        self._inflight = {}  # the batch currently being written
+        self.puts = 0
+        self.rows_written = 0
+        self.batches = 0
+        self.loads = 0
+        self.errors = 0
+        self._thread = threading.Thread(target=self._run, name="lab-state-writer", daemon=True)
+        self._thread.start()
+
+    def put_encoded(self, student, kind, key, encoded):
+        self._queue((student, kind, key), encoded)
+
+    def delete(self, student, kind, key):
+        self._queue((student, kind, str(key)), None)
+
+    def _queue(self, row_key, encoded):
+        with self._lock:
+            self._pending[row_key] = encoded
+            self.puts += 1
+            full = len(self._pending) >= self.max_batch
+        if full:
+            self._wake.set()
+
+    def clear_student(self, student):
+        """Deletes everything stored for a student, including buffered writes."""
+        with self._flush_lock:
+            with self._lock:
+                for row_key in [k for k in self._pending if k[0] == student]:
+                    del self._pending[row_key]
+            try:
+                self._clear(student)
+            except Exception:
+                with self._lock:
+                    self.errors += 1
+
+    def flush(self):
+        """Writes all buffered values as one batch; returns the number written."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                batch, self._pending = self._pending, {}
+                self._inflight = batch
+            try:
+                self._write_batch(batch)
+            except Exception:
+                with self._lock:
+                    # Keep the batch for the next flush, without overwriting newer writes
+                    for row_key, encoded in batch.items():
+                        self._pending.setdefault(row_key, encoded)
+                    self._inflight = {}
+                    self.errors += 1
+                return 0
+            with self._lock:
+                self._inflight = {}
+                self.rows_written += len(batch)
+                self.batches += 1
+            return len(batch)
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def close(self):
+        """Stops the writer thread after a final flush."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._thread.join()
+        self.flush()
+
+    def load(self, student):
+        try:
+            rows = self._read(student)
+        except Exception:
+            rows = {}
+            with self._lock:
+                self.errors += 1
+        with self._lock:
+            self.loads += 1
+            for buffer in (self._inflight, self._pending):
+                for (s, kind, key), encoded in buffer.items():
+                    if s == student:
+                        rows[(kind, key)] = encoded
+
+        state = {}
+        for (kind, key), encoded in rows.items():
+            if encoded is not None:
+                state.setdefault(kind, {})[key] = decode_value(encoded)
+        return state
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": type(self).__name__,
+                "puts": self.puts,
+                "pending": len(self._pending),
+                "rows_written": self.rows_written,
+                "batches": self.batches,
+                "loads": self.loads,
+                "errors": self.errors,
+            }
+
+class SQLiteBackend(WriteBehindBackend):
+    """SQLite database in WAL mode; each batch is one transaction."""
+    def __init__(self, path, **kwargs):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._writer = self._connect()
+        self._writer.execute("""
+            CREATE TABLE IF NOT EXISTS lab_state (
+                student TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                updated REAL NOT NULL,
+                PRIMARY KEY (student, kind, key)
+            ) WITHOUT ROWID
+        """)
+        self._writer.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        super().__init__(**kwargs)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # With WAL, NORMAL only risks the last transactions on power loss, never corruption
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _reader(self):
+        # One read connection per script thread; WAL readers never wait for the writer
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def _write_batch(self, batch):
+        now = time.time()
+        upserts = [(s, kind, key, v, now) for (s, kind, key), v in batch.items() if v is not None]
+        deletes = [row_key for row_key, v in batch.items() if v is None]
+        try:
+            self._writer.execute("BEGIN IMMEDIATE")
+            self._writer.executemany(
+                "INSERT INTO lab_state (student, kind, key, value, updated) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (student, kind, key) DO UPDATE SET value = excluded.value, updated = excluded.updated",
+                upserts)
+            self._writer.executemany(
+                "DELETE FROM lab_state WHERE student = ? AND kind = ? AND key = ?", deletes)
+            self._writer.execute("COMMIT")
+        except sqlite3.Error:
+            if self._writer.in_transaction:
+                self._writer.execute("ROLLBACK")
+            raise
+
+    def _read(self, student):
+        # A range scan of the primary key
+        return {(kind, key): value for kind, key, value in self._reader().execute(
+            "SELECT kind, key, value FROM lab_state WHERE student = ?", (student,))}
+
+    def _clear(self, student):
+        self._writer.execute("DELETE FROM lab_state WHERE student = ?", (student,))
+
+    def close(self):
+        super().close()
+        self._writer.close()
+
+    def stats(self):
+        return dict(super().stats(), path=self.path)
+
+class KeyValueBackend(WriteBehindBackend):
+    """
+    One hash per student on a key-value server. `client` needs the Redis hash
+    commands hgetall, hset(name, mapping=...), hdel and delete, so a
+    redis.Redis(decode_responses=True) client or FakeKeyValueServer works.
+    """
+    def __init__(self, client, prefix="dld_lab:", **kwargs):
+        self.client = client
+        self.prefix = prefix
+        super().__init__(**kwargs)
+
+    def _write_batch(self, batch):
+        upserts, deletes = {}, {}
+        for (student, kind, key), encoded in batch.items():
+            field = f"{kind}:{key}"
+            if encoded is None:
+                deletes.setdefault(student, []).append(field)
+            else:
+                upserts.setdefault(student, {})[field] = encoded
+        # One round trip per student and operation
+        for student, mapping in upserts.items():
+            self.client.hset(self.prefix + student, mapping=mapping)
+        for student, fields in deletes.items():
+            self.client.hdel(self.prefix + student, *fields)
+
+    def _read(self, student):
+        rows = {}
+        for field, encoded in self.client.hgetall(self.prefix + student).items():
+            kind, _, key = field.partition(":")
+            rows[(kind, key)] = encoded
+        return rows
+
+    def _clear(self, student):
+        self.client.delete(self.prefix + student)
+
+class FakeKeyValueServer:
+    """In-process stand-in for a Redis server (hash commands only), for local runs and tests."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hashes = {}
+
+    def hgetall(self, name):
+        with self._lock:
+            return dict(self._hashes.get(name, {}))
+
+    def hset(self, name, key=None, value=None, mapping=None):
+        with self._lock:
+            fields = self._hashes.setdefault(name, {})
+            added = 0
+            for k, v in ([(key, value)] if key is not None else []) + list((mapping or {}).items()):
+                added += k not in fields
+                fields[k] = v
+            return added
+
+    def hdel(self, name, *keys):
+        with self._lock:
+            fields = self._hashes.get(name, {})
+            return sum(fields.pop(k, None) is not None for k in keys)
+
+    def delete(self, *names):
+        with self._lock:
+            return sum(self._hashes.pop(name, None) is not None for name in names)
+
+def open_state_backend(spec=DEFAULT_BACKEND):
+    """Creates the backend named by a STATE_BACKEND value, or None if disabled."""
+    if spec in ("", "none"):
+        return None
+    if spec == "memory":
+        return InProcessBackend()
+    if spec == "sqlite":
+        return SQLiteBackend(DEFAULT_DB_PATH) if DEFAULT_DB_PATH else None
+    if spec.startswith(("redis://", "rediss://", "unix://")):
+        import redis
+        return KeyValueBackend(redis.Redis.from_url(spec, decode_responses=True))
+    raise ValueError(f"unknown STATE_BACKEND: {spec!r}")
+
+_backend = None
+_backend_opened = False
+_backend_lock = threading.Lock()
+
+def get_state_backend():
+    """Returns the process-wide backend, or None if persistence is disabled or unavailable."""
+    global _backend, _backend_opened
+    with _backend_lock:
+        if not _backend_opened:
+            _backend_opened = True
+            try:
+                _backend = open_state_backend()
+            except (OSError, sqlite3.Error, ImportError):
+                _backend = None
+            if _backend is not None:
+                atexit.register(_backend.close)
+        return _backend
+
+def set_state_backend(backend):
+    """Replaces the process-wide backend (embedding, multi-replica tests)."""
+    global _backend, _backend_opened
+    with _backend_lock:
+        _backend, _backend_opened = backend, True
+
+# --- Session Binding ---
+# A student is identified by the `student` query parameter, generated on the
+# first visit. Reopening or bookmarking the URL, on any replica, resumes the
+# same state.
+
+_STUDENT_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+def student_id():
+    if "student_id" not in st.session_state:
+        sid = st.query_params.get("student", "")
+        if not _STUDENT_ID.match(sid):
+            sid = uuid.uuid4().hex
+            st.query_params["student"] = sid
+        st.session_state.student_id = sid
+    return st.session_state.student_id
+
+def restore_session():
+    """
+    Loads the student's stored state into session_state, once per session.
+    Values already in the session win over stored ones.
+    """
+    if st.session_state.get("state_restored"):
+        return
+    st.session_state.state_restored = True
+    backend = get_state_backend()
+    if backend is None:
+        return
+    try:
+        state = backend.load(student_id())
+    except (TypeError, ValueError):
+        state = {}  # Unreadable stored values; start a fresh session
+    tutor_state = st.session_state.setdefault("tutor_state", {})
+    for unit_id, step_index in state.get(STEP, {}).items():
+        tutor_state.setdefault(unit_id, step_index)
+    tutor_progress = st.session_state.setdefault("tutor_progress", {})
+    for key, done in state.get(COMPLETED, {}).items():
+        tutor_progress.setdefault(key, done)
+    for unit_id, ctx in state.get(CONTEXT, {}).items():
+        st.session_state.setdefault(f"{unit_id}_ctx", ctx)
+    saved = st.session_state.setdefault("state_saved", {})
+    for exp_id, packed in state.get(EXPERIMENT, {}).items():
+        key = state_key(exp_id)
+        if exp_id not in STATE_CLASSES or key in st.session_state:
+            continue
+        try:
+            data = base64.b64decode(packed, validate=True)
+            st.session_state[key] = STATE_CLASSES[exp_id].from_bytes(data)
+        except (TypeError, ValueError, IndexError, KeyError, binascii.Error, struct.error):
+            continue  # Written by an older layout or corrupted; start this experiment fresh
+        saved[exp_id] = data
+
+def save(kind, key, value):
+    """Queues a value of the current session for persistence."""
+    backend = get_state_backend()
+    if backend is not None:
+        backend.put(student_id(), kind, key, value)
+
+def discard(kind, key):
+    """Queues the removal of a stored value of the current session."""
+    backend = get_state_backend()
+    if backend is not None:
+        backend.delete(student_id(), kind, key)
+
+def checkpoint_experiment_state():
+    """
+    Queues the experiment states that changed since the last checkpoint.
+    Experiments mutate their state objects in place, so changes are found by
+    comparing the packed bytes (a few bytes per experiment) with the last
+    ones queued.
+    """
+    backend = get_state_backend()
+    if backend is None:
+        return
+    saved = st.session_state.setdefault("state_saved", {})
+    student = None
+    for exp_id in STATE_CLASSES:
+        state = st.session_state.get(state_key(exp_id))
+        if state is None:
+            continue
+        data = state.to_bytes()
+        if saved.get(exp_id) != data:
+            saved[exp_id] = data
+            student = student or student_id()
+            backend.put_encoded(student, EXPERIMENT, exp_id, encode_value(base64.b64encode(data).decode("ascii")))
+
+def forget_session():
+    """Deletes the current student's stored state (Reset All Progress)."""
+    backend = get_state_backend()
+    if backend is not None:
+        backend.clear_student(student_id())
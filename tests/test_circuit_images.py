@@ -0,0 +1,39 @@
+import os
+
+import pytest
+
+import utils
+
+@pytest.fixture
+def static_dir(monkeypatch, tmp_path):
+    """Publishes into a temporary static/circuits with a 1000-byte budget."""
+    monkeypatch.setattr(utils, "CIRCUIT_STATIC_DIR", str(tmp_path))
+    monkeypatch.setattr(utils, "CIRCUIT_STATIC_MAX_BYTES", 1000)
+    monkeypatch.setattr(utils, "_published_images", {})
+    monkeypatch.setattr(utils, "_static_bytes_since_sweep", None)
+    monkeypatch.setattr(utils, "_static_serving_enabled", lambda: True)
+    return tmp_path
+
+def image(n):
+    return b"<svg>" + bytes([n]) * 295
+
+def test_least_recently_used_images_are_evicted(static_dir):
+    urls = []
+    for n in range(5):
+        urls.append(utils.publish_circuit_image(image(n)))
+        os.utime(static_dir / urls[-1].rsplit("/", 1)[-1], (n, n))
+    utils.sweep_circuit_images()
+    remaining = sorted(os.listdir(static_dir))
+    assert remaining == sorted(url.rsplit("/", 1)[-1] for url in urls[-3:])
+
+    # An evicted image is written again the next time it is published
+    assert utils.publish_circuit_image(image(0)) == urls[0]
+    assert (static_dir / urls[0].rsplit("/", 1)[-1]).read_bytes() == image(0)
+
+def test_first_publish_clears_stale_images(static_dir):
+    for n in range(5):
+        (static_dir / f"stale{n}.png").write_bytes(b"x" * 300)
+        os.utime(static_dir / f"stale{n}.png", (n, n))
+    url = utils.publish_circuit_image(image(9))
+    assert url.rsplit("/", 1)[-1] in os.listdir(static_dir)
+    assert sum(path.stat().st_size for path in static_dir.iterdir()) <= 900
@@ -0,0 +1,46 @@
+import os
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+import state_store
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+
+@pytest.fixture
+def app():
+    state_store.set_state_backend(None)  # no durable state: each test starts fresh
+    at = AppTest.from_file(APP, default_timeout=60)
+    at.run()
+    yield at
+    state_store.set_state_backend(None)
+
+def test_hidden_experiments_keep_widget_values(app):
+    app.sidebar.selectbox[0].select("Unit 2: Combinational Circuits").run()
+    app.selectbox(key="u2_ex3_type").select("Full Adder").run()
+    app.number_input(key="u2_ex3_a").set_value(1).run()
+    selector = app.radio(key="unit2_active_experiment")
+    selector.set_value(selector.options[1]).run()
+    app.number_input(key="u2_ex4_d1").set_value(1).run()
+    app.radio(key="u2_ex4_s0").set_value(1).run()
+
+    selector.set_value(selector.options[0]).run()
+    assert app.selectbox(key="u2_ex3_type").value == "Full Adder"
+    assert app.number_input(key="u2_ex3_a").value == 1
+
+    selector.set_value(selector.options[1]).run()
+    assert app.number_input(key="u2_ex4_d0").value == 1  # seeded default survives too
+    assert app.number_input(key="u2_ex4_d1").value == 1
+    assert app.radio(key="u2_ex4_s0").value == 1
+    assert not app.exception
+
+def test_flip_flop_type_survives_switching_experiments(app):
+    app.sidebar.selectbox[0].select("Unit 3: Sequential Circuits").run()
+    app.selectbox(key="u3_ex6_type").select("JK").run()
+    app.radio(key="u3_ex6_j").set_value(1).run()
+    selector = app.radio(key="unit3_active_experiment")
+    selector.set_value(selector.options[1]).run()
+    selector.set_value(selector.options[0]).run()
+    assert app.selectbox(key="u3_ex6_type").value == "JK"
+    assert app.radio(key="u3_ex6_j").value == 1
+    assert not app.exception
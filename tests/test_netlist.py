@@ -0,0 +1,37 @@
+import random
+
+import pytest
+
+import netlist
+from netlist import GATE_LIBRARY, Netlist
+
+@pytest.mark.parametrize("kind", sorted(GATE_LIBRARY))
+@pytest.mark.parametrize("width", [1, 8])
+def test_one_input_gates_buffer_or_invert(kind, width):
+    net = Netlist(f"one-input {kind}")
+    net.add_output("Y", net.add_gate(kind, [net.add_input("A")], "Y"))
+    inverted = GATE_LIBRARY[kind][1]
+    mask = (1 << width) - 1
+    for a in range(1 << width):
+        expected = (a ^ mask) if inverted else a
+        assert net.evaluate({"A": a}, width)["Y"] == expected
+        assert net.compiled()({"A": a}, width)["Y"] == expected
+
+def test_compiled_matches_interpreted_on_library_circuits():
+    circuits = [netlist.gate_circuit(kind) for kind in GATE_LIBRARY] + [
+        netlist.half_adder(), netlist.full_adder(), netlist.mux4(), netlist.bcd_to_seven_segment(),
+        netlist.incrementer(4), netlist.ripple_adder(8),
+    ] + [netlist.pla(and_plane, or_plane) for and_plane in range(16) for or_plane in range(4)]
+    rng = random.Random(0)
+    for circuit in circuits:
+        for width in (1, 64):
+            inputs = {name: rng.getrandbits(width) for name in circuit.inputs}
+            assert circuit.evaluate(inputs, width) == circuit.compiled()(inputs, width), circuit
+
+def test_combinational_loop_is_rejected():
+    net = Netlist()
+    net.add_input("A")
+    net.add_gate("AND", ["A", "y"], "x")
+    net.add_gate("OR", ["x"], "y")
+    with pytest.raises(ValueError, match="loop"):
+        net.compile()
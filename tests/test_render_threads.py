@@ -0,0 +1,35 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import circuits
+
+# Every retained scene layout, in several states so leftovers on a pooled scene show up
+CALLS = [
+    (circuits.draw_logic_gate, ("AND", [1, 0], 0)),
+    (circuits.draw_logic_gate, ("OR", [0, 1], 1)),
+    (circuits.draw_logic_gate, ("NOT", [1], 0)),
+    (circuits.draw_half_adder, (1, 1)),
+    (circuits.draw_mux_4to1, ([1, 0, 1, 1], [1, 0])),
+    (circuits.draw_mux_4to1, ([0, 1, 0, 0], [0, 1])),
+    (circuits.draw_seven_segment, (7,)),
+    (circuits.draw_seven_segment, (8,)),
+    (circuits.draw_flip_flop, ("JK", {"J": 1, "K": 0}, 1, 0, 1)),
+    (circuits.draw_generic_block, ("ALU", ["A", "B", "Cin"], ["F", "Cout"], {"A": 1, "Cin": 1}, {"Cout": 1})),
+]
+
+def render(backend, draw, args):
+    """Renders through the backend directly, bypassing the memory and disk caches."""
+    _, normalized, _ = draw.cache_key(*args)
+    return bytes(draw.backends[backend](**normalized))
+
+@pytest.mark.parametrize("backend", circuits.CIRCUIT_BACKENDS)
+def test_threaded_renders_are_byte_identical(backend):
+    circuits.scene_pool.clear()
+    expected = [render(backend, draw, args) for draw, args in CALLS]
+    circuits.scene_pool.clear()  # threads build (and then share) scenes concurrently too
+    jobs = [i % len(CALLS) for i in range(400)]
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(lambda i: render(backend, *CALLS[i]), jobs))
+    for i, data in zip(jobs, results):
+        assert data == expected[i], CALLS[i][0].__name__
@@ -0,0 +1,81 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import utils
+
+def sheet(experiment_id):
+    return {"url": f"{utils.CIRCUIT_STATIC_URL}/{experiment_id}.png"}
+
+@pytest.fixture
+def fake_builder(monkeypatch):
+    """Replaces the sheet renderer; builds of "slow" block until released."""
+    monkeypatch.setattr(utils, "_sprite_sheets", {})
+    monkeypatch.setattr(utils, "_sprite_failed_at", {})
+    monkeypatch.setattr(utils, "_sprite_build_locks", {})
+    monkeypatch.setattr(utils, "_keep_published", lambda filename: True)
+    release = threading.Event()
+    builds = []
+
+    def build(experiment_id):
+        builds.append(experiment_id)
+        if experiment_id == "slow":
+            assert release.wait(10)
+        return sheet(experiment_id)
+
+    monkeypatch.setattr(utils, "_build_sprite_sheet", build)
+    return release, builds
+
+def test_sheets_build_in_parallel_and_once(fake_builder):
+    release, builds = fake_builder
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        slow = [pool.submit(utils.get_sprite_sheet, "slow") for _ in range(4)]
+        # Another sheet is not held up by the slow build
+        assert pool.submit(utils.get_sprite_sheet, "fast").result(timeout=5) == sheet("fast")
+        assert not any(future.done() for future in slow)
+        release.set()
+        assert all(future.result(timeout=5) == sheet("slow") for future in slow)
+    assert sorted(builds) == ["fast", "slow"]
+
+def test_failed_sheets_are_retried_later(monkeypatch):
+    monkeypatch.setattr(utils, "_sprite_sheets", {})
+    monkeypatch.setattr(utils, "_sprite_failed_at", {})
+    monkeypatch.setattr(utils, "_sprite_build_locks", {})
+    monkeypatch.setattr(utils, "_keep_published", lambda filename: True)
+    results = [None, sheet("flaky")]
+    builds = []
+
+    def build(experiment_id):
+        builds.append(experiment_id)
+        return results[len(builds) - 1]
+
+    now = [1000.0]
+    monkeypatch.setattr(utils, "_build_sprite_sheet", build)
+    monkeypatch.setattr(utils.time, "monotonic", lambda: now[0])
+    assert utils.get_sprite_sheet("flaky") is None
+    assert utils.get_sprite_sheet("flaky") is None  # not rebuilt within the retry window
+    assert len(builds) == 1
+
+    now[0] += utils._SPRITE_RETRY_SECONDS
+    assert utils.get_sprite_sheet("flaky") == sheet("flaky")
+    assert utils.get_sprite_sheet("flaky") == sheet("flaky")
+    assert len(builds) == 2
+
+def test_sheets_whose_image_was_evicted_are_rebuilt(monkeypatch):
+    monkeypatch.setattr(utils, "_sprite_sheets", {})
+    monkeypatch.setattr(utils, "_sprite_failed_at", {})
+    monkeypatch.setattr(utils, "_sprite_build_locks", {})
+    published = {"evicted.png": False}
+    monkeypatch.setattr(utils, "_keep_published", lambda filename: published.pop(filename, True))
+    builds = []
+
+    def build(experiment_id):
+        builds.append(experiment_id)
+        return sheet(experiment_id)
+
+    monkeypatch.setattr(utils, "_build_sprite_sheet", build)
+    utils.get_sprite_sheet("evicted")
+    utils.get_sprite_sheet("evicted")  # the image is gone: rebuilt
+    utils.get_sprite_sheet("evicted")
+    assert builds == ["evicted", "evicted"]
@@ -0,0 +1,95 @@
+import base64
+import os
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+import state_store
+from experiment_state import CounterState
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+
+@pytest.fixture(params=["sqlite", "kv"])
+def replica_backends(request, tmp_path):
+    """Two backends (one per replica) over the same SQLite file or key-value server."""
+    if request.param == "sqlite":
+        path = str(tmp_path / "shared.sqlite3")
+        backends = [state_store.SQLiteBackend(path, flush_interval=60) for _ in range(2)]
+    else:
+        server = state_store.FakeKeyValueServer()
+        backends = [state_store.KeyValueBackend(server, flush_interval=60) for _ in range(2)]
+    yield backends
+    for backend in backends:
+        backend.close()
+    state_store.set_state_backend(None)
+
+def test_writes_from_one_replica_are_read_by_the_other(replica_backends):
+    first, second = replica_backends
+    first.put("ada", state_store.STEP, "unit2", 3)
+    first.put("ada", state_store.CONTEXT, "u1_ex2", {"marked": {1, 3}})
+    assert second.load("ada") == {}  # still buffered on the first replica
+    first.flush()
+    assert second.load("ada") == {"step": {"unit2": 3}, "ctx": {"u1_ex2": {"marked": {1, 3}}}}
+
+    second.delete("ada", state_store.STEP, "unit2")
+    second.flush()
+    assert first.load("ada") == {"ctx": {"u1_ex2": {"marked": {1, 3}}}}
+    second.clear_student("ada")
+    assert first.load("ada") == {}
+
+class Replica:
+    """One app instance: an AppTest session whose runs use its own backend."""
+    def __init__(self, backend, student):
+        self.backend = backend
+        self.at = AppTest.from_file(APP, default_timeout=60)
+        self.at.query_params["student"] = student
+
+    def run(self, element=None):
+        state_store.set_state_backend(self.backend)
+        (element or self.at).run()
+        assert not self.at.exception
+        return self.at
+
+def open_counter(replica):
+    at = replica.run()
+    at = replica.run(at.sidebar.selectbox[0].select("Unit 3: Sequential Circuits"))
+    return replica.run(at.radio(key="unit3_active_experiment").set_value("Ex 8: Counters"))
+
+def test_session_moves_between_replicas(replica_backends):
+    first, second = Replica(replica_backends[0], "ada"), Replica(replica_backends[1], "ada")
+    at = open_counter(first)
+    for _ in range(3):
+        at = first.run(at.button(key="ctr_pulse").click())
+    first.backend.flush()
+
+    # The student reconnects to the other replica
+    bt = open_counter(second)
+    assert bt.session_state.u3_ex8_state.count == 3
+    assert len(bt.session_state.u3_ex8_state.trace) == 3
+    bt = second.run(bt.button(key="ctr_pulse").click())
+    second.backend.flush()
+    stored = first.backend.load("ada")[state_store.EXPERIMENT]["u3_ex8"]
+    assert CounterState.from_bytes(base64.b64decode(stored)).count == 4
+
+def run_unit4(backend):
+    replica = Replica(backend, "ada")
+    try:
+        at = replica.run()
+        return replica.run(at.sidebar.selectbox[0].select("Unit 4: Advanced Logic"))
+    finally:
+        state_store.set_state_backend(None)
+
+def test_corrupted_experiment_state_starts_fresh():
+    backend = state_store.InProcessBackend()
+    packed = base64.b64encode(bytes([7, 0, 0, 0])).decode("ascii")  # state_index 7 of "ABC"
+    backend.put("ada", state_store.EXPERIMENT, "u4_ex9", packed)
+    backend.put("ada", state_store.STEP, "u4_ex9", 1)
+    at = run_unit4(backend)
+    assert at.session_state.u4_ex9_state.state == "A"
+    assert at.session_state.tutor_state["u4_ex9"] == 1  # the rest of the session is restored
+
+def test_unreadable_stored_values_start_a_fresh_session():
+    backend = state_store.InProcessBackend()
+    backend.put_encoded("ada", state_store.STEP, "u4_ex9", "{not json")
+    at = run_unit4(backend)
+    assert at.session_state.u4_ex9_state.state == "A"
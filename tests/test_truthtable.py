@@ -0,0 +1,15 @@
+import netlist
+from netlist import Netlist
+from truthtable import TruthTable, exhaustive
+
+def test_exhaustive_follows_netlist_changes():
+    net = Netlist("grows")
+    a, b = net.add_input("A"), net.add_input("B")
+    net.add_output("Y", net.add_gate("AND", [a, b], "Y"))
+    assert TruthTable.of(net, "Y") == TruthTable.from_minterms(2, [3])
+    net.add_output("Z", net.add_gate("OR", [a, b], "Z"))
+    assert exhaustive(net).outputs == ("Y", "Z")
+    assert TruthTable.of(net, "Z") == TruthTable.from_minterms(2, [1, 2, 3])
+
+def test_identical_netlists_share_a_table():
+    assert exhaustive(netlist.full_adder.__wrapped__()) is exhaustive(netlist.full_adder())
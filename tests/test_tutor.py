@@ -0,0 +1,15 @@
+import tutor
+
+def test_contexts_with_colliding_hashes_do_not_share_a_verdict():
+    # hash(-1) == hash(-2) in CPython, so these snapshots collide but differ
+    first, second = {"x": -1}, {"x": -2}
+    first_key, second_key = tutor.context_key(first), tutor.context_key(second)
+    assert hash(first_key) == hash(second_key)
+
+    smart_tutor = tutor.SmartTutor()
+    step = {"criteria": lambda context: context["x"] == -1}
+    assert smart_tutor.evaluate_step("unit", 0, step, first, first_key)
+    assert not smart_tutor.evaluate_step("unit", 0, step, second, second_key)
+
+def test_uncacheable_context_has_no_key():
+    assert tutor.context_key({"probe": object()}) is None
@@ -0,0 +1,225 @@
+"""
+Event-driven timing simulation of netlists.
+
+Every gate has an integer propagation delay (DEFAULT_DELAYS by gate kind,
+overridable per kind or per output net). Signal changes are events on a
+timing wheel: a ring of buckets, one per time unit, larger than the longest
+gate delay, so scheduling and dispatch are O(1). Stimuli further ahead than
+the wheel wait in an overflow heap until they come into range.
+
+Delay semantics:
+- "inertial": a gate swallows input pulses shorter than its delay. A
+  pending output change is cancelled when the gate re-evaluates back to
+  the current value before it fires; the swallowed pulse is recorded.
+- "transport": every change propagates, however short.
+
+Transitions on watched nets are recorded, and glitches() reports nets that
+switched more than once after the last stimulus (static or dynamic hazards).
+"""
+import heapq
+from netlist import GATE_LIBRARY, CONST
+
+INERTIAL, TRANSPORT = "inertial", "transport"
+DELAY_MODES = (INERTIAL, TRANSPORT)
+
+# Propagation delay per gate kind, in time units
+DEFAULT_DELAYS = {"BUF": 1, "NOT": 1, "NAND": 1, "NOR": 1, "AND": 2, "OR": 2, "XOR": 3, "XNOR": 3}
+
+class EventSimulator:
+    """
+    Timing simulation of one netlist. settle() sets a steady state, apply()
+    schedules input changes and run() processes events until the circuit is
+    quiet (or a time limit).
+    """
+    def __init__(self, circuit, delays=None, mode=INERTIAL, watch=None):
+        if mode not in DELAY_MODES:
+            raise ValueError(f"Unknown delay mode '{mode}'. Choose from {DELAY_MODES}.")
+        circuit.levelize()  # validates nets and rejects combinational loops
+        delays = {**DEFAULT_DELAYS, **(delays or {})}
+        self.circuit = circuit
+        self.mode = mode
+        self.names = list(circuit.nets)
+        index = {name: i for i, name in enumerate(self.names)}
+        self._index = index
+
+        self._gates = []
+        self._fanout = [[] for _ in self.names]
+        for gate in circuit.gates:
+            op, inverted, _, _ = GATE_LIBRARY[gate.kind]
+            delay = delays.get(gate.output, delays[gate.kind])
+            if not isinstance(delay, int) or delay < 1:
+                raise ValueError(f"Gate {gate.output!r} needs a whole-number delay of at least 1, not {delay!r}.")
+            ins = tuple(index[net] for net in gate.inputs)
+            for i in set(ins):
+                self._fanout[i].append(len(self._gates))
+            self._gates.append((op, 1 if inverted else 0, ins[0], ins[1:], index[gate.output], delay))
+        self.max_delay = max((gate[5] for gate in self._gates), default=1)
+
+        size = 1
+        while size <= self.max_delay:
+            size *= 2
+        self._wheel = [[] for _ in range(size)]
+        self._mask = size - 1
+        self._overflow = []  # (time, seq, net, value) beyond the wheel
+        self._seq = 0
+        self._queued = 0
+
+        self.values = [0] * len(self.names)
+        for name, net in circuit.nets.items():
+            if net.kind == CONST:
+                self.values[index[name]] = net.value
+        self._token = [0] * len(self.names)   # bumped to cancel a net's pending event (inertial)
+        self._pending = [None] * len(self.names)  # net -> (time, value) of its latest scheduled event
+
+        watch = list(circuit.inputs) + list(circuit.outputs.values()) if watch is None else watch
+        self._watched = {index[name] for name in watch}
+        self.waveforms = {name: [] for name in watch}
+        self.filtered = []   # (net, time the swallowed change was due) in inertial mode
+        self.now = 0
+        self.events = 0
+        self.stimulus_time = 0
+
+    def __repr__(self):
+        return (f"EventSimulator({self.circuit.name!r}, {self.mode}, now={self.now}, "
+                f"events={self.events}, queued={self._queued + len(self._overflow)})")
+
+    def value(self, name):
+        return self.values[self._index[name]]
+
+    def settle(self, inputs):
+        """Steady state for `inputs` (zero-delay evaluation); clears queued events and records."""
+        values = self.circuit.evaluate(inputs, nets=True)
+        self.values = [values[name] for name in self.names]
+        for bucket in self._wheel:
+            bucket.clear()
+        self._overflow.clear()
+        self._queued = 0
+        self._pending = [None] * len(self.names)
+        for name, wave in self.waveforms.items():
+            wave[:] = [(self.now - 1, values[name])]  # the steady state, just before now
+        self.filtered.clear()
+        self.stimulus_time = self.now
+
+    def apply(self, inputs, at=None):
+        """Schedules primary input changes at time `at` (default: now)."""
+        at = self.now if at is None else at
+        if at < self.now:
+            raise ValueError(f"Cannot schedule inputs at {at}, before the current time {self.now}.")
+        self.stimulus_time = at
+        for name, value in inputs.items():
+            self._schedule(self._index[name], value & 1, at)
+
+    def _schedule(self, net, value, time):
+        self._pending[net] = (time, value)
+        if time - self.now <= self._mask:
+            self._wheel[time & self._mask].append((net, value, self._token[net]))
+            self._queued += 1
+        else:
+            heapq.heappush(self._overflow, (time, self._seq, net, value, self._token[net]))
+            self._seq += 1
+
+    def run(self, until=None):
+        """Processes events until none are left or time `until` is reached. Returns the time."""
+        values, gates, fanout = self.values, self._gates, self._fanout
+        wheel, mask, token, pending = self._wheel, self._mask, self._token, self._pending
+        watched, waveforms, names = self._watched, self.waveforms, self.names
+        inertial = self.mode == INERTIAL
+        while self._queued or self._overflow:
+            if not self._queued:
+                next_time = self._overflow[0][0]
+                if until is not None and next_time > until:
+                    self.now = max(self.now, until + 1)
+                    break
+                self.now = max(self.now, next_time)
+            if until is not None and self.now > until:
+                break
+            while self._overflow and self._overflow[0][0] - self.now <= mask:
+                time, _, net, value, tok = heapq.heappop(self._overflow)
+                wheel[time & mask].append((net, value, tok))
+                self._queued += 1
+
+            now = self.now
+            bucket = wheel[now & mask]
+            if bucket:
+                wheel[now & mask] = []
+                self._queued -= len(bucket)
+                touched = set()
+                for net, value, tok in bucket:
+                    if tok != token[net]:
+                        continue  # cancelled by a later evaluation
+                    if pending[net] is not None and pending[net][0] == now:
+                        pending[net] = None
+                    if values[net] == value:
+                        continue
+                    values[net] = value
+                    self.events += 1
+                    if net in watched:
+                        waveforms[names[net]].append((now, value))
+                    touched.update(fanout[net])
+                # Gates see every change of this time step at once
+                for g in touched:
+                    op, invert, first, rest, out, delay = gates[g]
+                    v = values[first]
+                    for i in rest:
+                        v = op(v, values[i])
+                    v ^= invert
+                    scheduled = pending[out]
+                    projected = scheduled[1] if scheduled else values[out]
+                    if v == projected:
+                        continue
+                    if inertial and scheduled:
+                        # Back to the current value before the change fired: pulse swallowed
+                        token[out] += 1
+                        pending[out] = None
+                        self.filtered.append((names[out], scheduled[0]))
+                        continue
+                    self._schedule(out, v, now + delay)
+            self.now = now + 1
+        return self.now
+
+    def glitches(self):
+        """
+        Watched nets that switched more than once since the last stimulus:
+        {"net", "kind" ("static" or "dynamic"), "start", "end", "transitions"}.
+        """
+        found = []
+        for name, wave in self.waveforms.items():
+            before = [v for t, v in wave if t < self.stimulus_time]
+            after = [(t, v) for t, v in wave if t >= self.stimulus_time]
+            if len(after) < 2:
+                continue
+            initial = before[-1] if before else wave[0][1]
+            kind = "static" if after[-1][1] == initial else "dynamic"
+            found.append({"net": name, "kind": f"{kind}-{initial}" if kind == "static" else kind,
+                          "start": after[0][0], "end": after[-1][0], "transitions": len(after)})
+        return found
+
+    def settle_time(self):
+        """Time from the last stimulus to the last change on a watched net."""
+        last = [wave[-1][0] for wave in self.waveforms.values() if wave]
+        return max(0, max(last, default=self.stimulus_time) - self.stimulus_time)
+
+    def waveform_text(self, nets=None, end=None):
+        """One line per net: its level over time as ▁ (0) and ▔ (1), one character per time unit."""
+        nets = list(self.waveforms) if nets is None else nets
+        end = self.now if end is None else end
+        width = max(len(name) for name in nets)
+        lines = []
+        for name in nets:
+            wave = self.waveforms[name]
+            chars, level, i = [], wave[0][1] if wave else 0, 0
+            for t in range(self.stimulus_time - 1, end + 1):
+                while i < len(wave) and wave[i][0] <= t:
+                    level = wave[i][1]
+                    i += 1
+                chars.append("▔" if level else "▁")
+            lines.append(f"{name:<{width}} {''.join(chars)}")
+        return "\n".join(lines)
+
+def step_response(circuit, before, after, delays=None, mode=INERTIAL, watch=None):
+    """Settles `circuit` on `before`, switches the inputs to `after` at t=0 and runs until quiet."""
+    sim = EventSimulator(circuit, delays, mode, watch)
+    sim.settle(before)
+    sim.apply(after)
+    sim.run()
+    return sim
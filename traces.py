@@ -0,0 +1,88 @@
+"""
+Bounded signal traces for the sequential experiments.
+
+A TraceBuffer records one row of small integer columns per clock pulse in a
+fixed-size NumPy ring buffer: appends are O(1), memory is capped at
+TRACE_MAX_ROWS rows and the oldest rows are dropped once it is full. Tables
+only materialize the window on screen (see utils.render_trace_table).
+"""
+import os
+import struct
+import numpy as np
+
+TRACE_MAX_ROWS = int(os.environ.get("TRACE_MAX_ROWS", 1024))
+
+_HEADER = struct.Struct("<IQH")  # capacity, total rows appended, column count
+
+class TraceBuffer:
+    """
+    Ring buffer of `columns` (names of uint8 signals), one row per pulse.
+    Rows are addressed by position 0..len-1 from the oldest kept row; step
+    numbers count every row ever appended, so they stay correct after wrap.
+    """
+    __slots__ = ("columns", "capacity", "total", "_count", "_head", "_data")
+
+    def __init__(self, columns, capacity=TRACE_MAX_ROWS):
+        self.columns = tuple(columns)
+        self.capacity = max(1, int(capacity))
+        self.total = 0   # rows ever appended
+        self._count = 0  # rows kept
+        self._head = 0   # slot of the next append
+        self._data = np.zeros((self.capacity, len(self.columns)), dtype=np.uint8)
+
+    def __len__(self):
+        return self._count
+
+    def __bool__(self):
+        return self._count > 0
+
+    def __repr__(self):
+        return f"TraceBuffer({self.columns!r}, rows={self._count}, total={self.total})"
+
+    def append(self, *values):
+        self._data[self._head] = values
+        self._head = (self._head + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+        self.total += 1
+
+    def clear(self):
+        self.total = self._count = self._head = 0
+
+    @property
+    def first_step(self):
+        """Step number (1-based) of the oldest row kept."""
+        return self.total - self._count + 1
+
+    def window(self, start, stop):
+        """Returns rows [start, stop) in chronological order as an array copy."""
+        start, stop, _ = slice(start, stop).indices(self._count)
+        if start >= stop:
+            return self._data[:0].copy()
+        idx = (np.arange(start, stop) + (self._head - self._count)) % self.capacity
+        return self._data[idx]
+
+    def frame(self, start, stop):
+        """Rows [start, stop) as a DataFrame with a leading Step column."""
+        import pandas as pd
+        rows = self.window(start, stop)
+        df = pd.DataFrame(rows, columns=list(self.columns))
+        df.insert(0, "Step", np.arange(self.first_step + start, self.first_step + start + len(rows)))
+        return df
+
+    def to_bytes(self):
+        return _HEADER.pack(self.capacity, self.total, len(self.columns)) + self.window(0, self._count).tobytes()
+
+    @classmethod
+    def from_bytes(cls, columns, data, capacity=TRACE_MAX_ROWS):
+        """Rebuilds a trace; keeps the newest rows if `capacity` is below the stored row count."""
+        _, total, ncols = _HEADER.unpack_from(data)
+        if ncols != len(columns):
+            raise ValueError("trace columns do not match")
+        rows = np.frombuffer(data, dtype=np.uint8, offset=_HEADER.size).reshape(-1, ncols)
+        trace = cls(columns, capacity)
+        kept = rows[len(rows) - min(len(rows), trace.capacity):]
+        trace._data[:len(kept)] = kept
+        trace._count = len(kept)
+        trace._head = len(kept) % trace.capacity
+        trace.total = max(total, len(kept))
+        return trace
@@ -0,0 +1,263 @@
+"""
+Exhaustive truth tables.
+
+All 2**n input rows of a netlist are packed into Python ints, one int per
+input column (row r is bit r), so a single netlist pass with width=2**n
+produces every output column at once. Row r assigns input k (in netlist
+input order) bit n-1-k of r: the first input is the most significant, which
+is the usual truth-table row order.
+
+Python ints already do the bitwise work a word at a time in C; columns can be
+viewed as NumPy uint64 words (ExhaustiveTable.words) for vectorized
+consumers, and as one uint8 per row for tables.
+"""
+import functools
+import threading
+from collections import OrderedDict
+from netlist import CONST, gate_circuit
+
+MAX_INPUTS = 24
+
+@functools.lru_cache(maxsize=None)
+def input_column(n, k):
+    """Column of input k (0 = most significant) over all 2**n rows."""
+    half = 1 << (n - 1 - k)
+    column, rows = ((1 << half) - 1) << half, 2 * half  # `half` 0-rows then `half` 1-rows
+    while rows < 1 << n:                                # repeat by doubling
+        column |= column << rows
+        rows *= 2
+    return column
+
+class ExhaustiveTable:
+    """Every row of a circuit: packed columns for its inputs and outputs."""
+    __slots__ = ("inputs", "outputs", "columns", "rows")
+
+    def __init__(self, inputs, outputs, columns):
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.columns = columns  # input/output name -> int, bit r = row r
+        self.rows = 1 << len(self.inputs)
+
+    def __repr__(self):
+        return f"ExhaustiveTable(inputs={list(self.inputs)}, outputs={list(self.outputs)}, rows={self.rows})"
+
+    def row_index(self, values):
+        """Row number of an input assignment (input name -> bit)."""
+        n = len(self.inputs)
+        return sum((values[name] & 1) << (n - 1 - k) for k, name in enumerate(self.inputs))
+
+    def row(self, r):
+        return {name: (column >> r) & 1 for name, column in self.columns.items()}
+
+    def ones(self, name):
+        """Number of rows where a column is 1."""
+        return self.columns[name].bit_count()
+
+    def minterms(self, name):
+        """Rows where a column is 1, in increasing order."""
+        column = self.columns[name]
+        while column:
+            low = column & -column
+            yield low.bit_length() - 1
+            column ^= low
+
+    def words(self, name):
+        """A column as a NumPy uint64 array (row r is bit r % 64 of word r // 64)."""
+        import numpy as np
+        nbytes = max(8, -(-self.rows // 64) * 8)
+        return np.frombuffer(self.columns[name].to_bytes(nbytes, "little"), dtype="<u8")
+
+    def bits(self, name):
+        """A column as a NumPy uint8 array with one entry per row."""
+        import numpy as np
+        packed = self.words(name).view(np.uint8)
+        return np.unpackbits(packed, bitorder="little")[:self.rows]
+
+    def frame(self):
+        """All rows as a DataFrame (inputs, then outputs)."""
+        import pandas as pd
+        return pd.DataFrame({name: self.bits(name) for name in self.inputs + self.outputs})
+
+# Tables are cached by netlist fingerprint, not by object: a netlist changed
+# after its table was built gets a new table, and identical netlists share one.
+_TABLE_CACHE_SIZE = 32
+_tables = OrderedDict()  # fingerprint -> ExhaustiveTable, least recently used first
+_tables_lock = threading.Lock()
+
+def exhaustive(circuit):
+    """Evaluates a netlist on all 2**n input rows in one pass."""
+    key = circuit.fingerprint()
+    with _tables_lock:
+        table = _tables.get(key)
+        if table is not None:
+            _tables.move_to_end(key)
+            return table
+    inputs = circuit.inputs
+    n = len(inputs)
+    if n > MAX_INPUTS:
+        raise ValueError(f"{circuit.name or 'Circuit'} has {n} inputs; exhaustive tables stop at {MAX_INPUTS}.")
+    columns = {name: input_column(n, k) for k, name in enumerate(inputs)}
+    outputs = circuit.compiled()(columns, width=1 << n)
+    table = ExhaustiveTable(inputs, outputs, {**columns, **outputs})
+    with _tables_lock:
+        _tables[key] = table
+        while len(_tables) > _TABLE_CACHE_SIZE:
+            _tables.popitem(last=False)
+    return table
+
+def equivalent(first, second):
+    """
+    Compares two netlists with the same inputs and outputs over every row.
+    Returns None if they agree, otherwise the first differing row of `first`.
+    """
+    if set(first.inputs) != set(second.inputs) or set(first.outputs) != set(second.outputs):
+        raise ValueError("Circuits must have the same input and output names.")
+    table = exhaustive(first)
+    other = second.compiled()({name: table.columns[name] for name in table.inputs}, width=table.rows)
+    diff = 0
+    for name in table.outputs:
+        diff |= table.columns[name] ^ other[name]
+    if not diff:
+        return None
+    return table.row((diff & -diff).bit_length() - 1)
+
+def toggle_coverage(circuit, vectors=None):
+    """
+    Nets that never toggle under the given input vectors (a list of input
+    dicts; all rows when None). Returns (fraction of nets toggled, names of
+    nets stuck at 0 or 1).
+    """
+    if vectors is None:
+        table = exhaustive(circuit)
+        width = table.rows
+        packed = {name: table.columns[name] for name in table.inputs}
+    else:
+        width = len(vectors)
+        packed = {name: sum((vector[name] & 1) << i for i, vector in enumerate(vectors)) for name in circuit.inputs}
+    mask = (1 << width) - 1
+    values = circuit.evaluate(packed, width=width, nets=True)
+    nets = [name for name in values if circuit.nets[name].kind != CONST]
+    stuck = [name for name in nets if values[name] in (0, mask)]
+    return 1 - len(stuck) / max(1, len(nets)), stuck
+
+# --- Single-Output Tables ---
+
+class TruthTable:
+    """
+    A Boolean function of n variables packed into one int: bit r is the
+    output for row r, with variable k as bit n-1-k of r (the row order of
+    ExhaustiveTable). Tables are immutable and hashable; operations return
+    new tables.
+    """
+    __slots__ = ("n", "bits")
+
+    def __init__(self, n, bits=0):
+        if not 0 <= n <= MAX_INPUTS:
+            raise ValueError(f"Truth tables take 0 to {MAX_INPUTS} variables, not {n}.")
+        if bits < 0 or bits >> (1 << n):
+            raise ValueError(f"{bits:#x} does not fit a {n}-variable truth table.")
+        self.n = n
+        self.bits = bits
+
+    @classmethod
+    def from_minterms(cls, n, minterms):
+        bits = 0
+        for row in minterms:
+            bits |= 1 << row
+        return cls(n, bits)
+
+    @classmethod
+    def variable(cls, n, k):
+        """The projection onto variable k (0 = most significant)."""
+        return cls(n, input_column(n, k))
+
+    @classmethod
+    def of(cls, circuit, output):
+        """One output of a netlist, sharing the exhaustive table's column."""
+        table = exhaustive(circuit)
+        return cls(len(table.inputs), table.columns[output])
+
+    @property
+    def rows(self):
+        return 1 << self.n
+
+    def __getitem__(self, row):
+        return (self.bits >> row) & 1
+
+    def with_row(self, row, value):
+        bit = 1 << row
+        return TruthTable(self.n, (self.bits | bit) if value else (self.bits & ~bit))
+
+    def count(self):
+        return self.bits.bit_count()
+
+    def minterms(self):
+        """Rows where the function is 1, in increasing order."""
+        bits = self.bits
+        while bits:
+            low = bits & -bits
+            yield low.bit_length() - 1
+            bits ^= low
+
+    # --- Cofactors and Support ---
+    def cofactor(self, k, value):
+        """
+        Shannon cofactor with variable k fixed to `value`, still over n
+        variables (k becomes a don't-care), so it combines with this table.
+        """
+        shift = 1 << (self.n - 1 - k)
+        column = input_column(self.n, k)
+        if value:
+            half = self.bits & column
+            return TruthTable(self.n, half | (half >> shift))
+        half = self.bits & ~column
+        return TruthTable(self.n, half | (half << shift))
+
+    def depends_on(self, k):
+        return self.cofactor(k, 0) != self.cofactor(k, 1)
+
+    def support(self):
+        """Indices of the variables the function depends on."""
+        return tuple(k for k in range(self.n) if self.depends_on(k))
+
+    # --- Operators ---
+    def _check(self, other):
+        if not isinstance(other, TruthTable) or other.n != self.n:
+            raise ValueError("Truth tables must have the same number of variables.")
+
+    def __and__(self, other):
+        self._check(other)
+        return TruthTable(self.n, self.bits & other.bits)
+
+    def __or__(self, other):
+        self._check(other)
+        return TruthTable(self.n, self.bits | other.bits)
+
+    def __xor__(self, other):
+        self._check(other)
+        return TruthTable(self.n, self.bits ^ other.bits)
+
+    def __invert__(self):
+        return TruthTable(self.n, self.bits ^ ((1 << self.rows) - 1))
+
+    def __eq__(self, other):
+        return isinstance(other, TruthTable) and self.n == other.n and self.bits == other.bits
+
+    def __hash__(self):
+        return hash((self.n, self.bits))
+
+    def __repr__(self):
+        return f"TruthTable({self.n}, {self.bits:#0{2 + max(1, self.rows // 4)}x})"
+
+@functools.lru_cache(maxsize=None)
+def two_input_gates():
+    """{TruthTable: gate name} for the 2-input library gates."""
+    return {TruthTable.of(gate_circuit(kind), "Y"): kind for kind in ("AND", "OR", "NAND", "NOR", "XOR", "XNOR")}
+
+def describe(table):
+    """Short description of a function: a gate name when it is one, else its minterm list."""
+    gate = two_input_gates().get(table)
+    if gate:
+        return gate
+    minterms = ", ".join(map(str, table.minterms()))
+    return f"Σm({minterms})" if minterms else "0"
@@ -1,22 +1,104 @@
 import streamlit as st
+import functools
+import os
 import time
+from types import MappingProxyType
+import state_store
+
+def tutor_steps(build_steps):
+    """
+    Decorator for tutor step builders. The step list is built once per
+    process and shared read-only by every session and rerun, so guide()
+    receives the same object by reference each time.
+    """
+    steps = None
+
+    @functools.wraps(build_steps)
+    def get_steps():
+        nonlocal steps
+        if steps is None:
+            steps = tuple(MappingProxyType(dict(step)) for step in build_steps())
+        return steps
+    return get_steps
+
+# --- Criteria Evaluation ---
+# Criteria are pure functions of the simulation context, so a result stays
+# valid until the context changes. guide() keys results on a frozen snapshot
+# of the context and only calls criteria again when the snapshot changes.
+# Snapshots are compared with ==, never by hash alone, so two contexts whose
+# hashes collide cannot share a result.
+
+# Show which upcoming steps the current setup already satisfies (1 = on)
+TUTOR_LOOKAHEAD = os.environ.get("TUTOR_LOOKAHEAD", "0") == "1"
+
+_CONTEXT_SCALARS = (int, float, complex, str, bytes, bool, type(None))
+
+def _freeze_context(value):
+    """Returns a hashable, order-independent snapshot of a simulation context."""
+    if isinstance(value, dict):
+        return tuple(sorted(((str(k), _freeze_context(v)) for k, v in value.items()), key=lambda item: item[0]))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze_context(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_freeze_context(v) for v in value)
+    if type(value) in _CONTEXT_SCALARS:
+        # Keep the type so that e.g. True and 1 stay distinct
+        return (type(value), value)
+    # Arbitrary objects may be mutated in place behind a stable hash
+    raise TypeError(f"uncacheable context value: {type(value).__name__}")
+
+def context_key(context):
+    """Frozen snapshot of a simulation context to compare with ==, or None if it holds uncacheable values."""
+    try:
+        return _freeze_context(context)
+    except TypeError:
+        return None
 
 class SmartTutor:
-    def __init__(self):
+    # Callbacks fired as listener(unit_id, old_step, new_step) on every step change
+    _step_listeners = []
+
+    def __init__(self, evaluate_upcoming=None):
         if 'tutor_state' not in st.session_state:
             st.session_state.tutor_state = {}
         if 'tutor_progress' not in st.session_state:
             st.session_state.tutor_progress = {}
+        # {unit_id: {step_index: (context_key, result)}}
+        if 'tutor_eval_cache' not in st.session_state:
+            st.session_state.tutor_eval_cache = {}
+        # {"unit_id:step_index": {"count": n, "last": "ExcType: message"}}
+        if 'tutor_criteria_errors' not in st.session_state:
+            st.session_state.tutor_criteria_errors = {}
+        # {unit_id: context_key} of the last context handed to the progress store
+        if 'tutor_saved_ctx' not in st.session_state:
+            st.session_state.tutor_saved_ctx = {}
+        self.evaluate_upcoming = TUTOR_LOOKAHEAD if evaluate_upcoming is None else evaluate_upcoming
+        self._eval_caches = {}
+
+    @classmethod
+    def add_step_listener(cls, listener):
+        if listener not in cls._step_listeners:
+            cls._step_listeners.append(listener)
+        return listener
+
+    def _emit_step_change(self, unit_id, old_step, new_step):
+        for listener in self._step_listeners:
+            listener(unit_id, old_step, new_step)
 
     def set_current_step(self, unit_id, step_index):
+        old_step = self.get_current_step(unit_id)
         st.session_state.tutor_state[unit_id] = step_index
+        state_store.save(state_store.STEP, unit_id, step_index)
+        self._emit_step_change(unit_id, old_step, step_index)
 
     def get_current_step(self, unit_id):
         return st.session_state.tutor_state.get(unit_id, 0)
 
     def reset_progress(self, unit_id):
         if unit_id in st.session_state.tutor_state:
-            del st.session_state.tutor_state[unit_id]
+            old_step = st.session_state.tutor_state.pop(unit_id)
+            state_store.discard(state_store.STEP, unit_id)
+            self._emit_step_change(unit_id, old_step, 0)
 
     def mark_step_complete(self, unit_id):
         current_step_idx = self.get_current_step(unit_id)
@@ -27,6 +109,7 @@ class SmartTutor:
         key = f"{unit_name}_{experiment_name}"
         if not st.session_state.tutor_progress.get(key):
             st.session_state.tutor_progress[key] = True
+            state_store.save(state_store.COMPLETED, key, True)
             st.balloons()
             st.success(f"🎉 Experiment '{experiment_name}' Completed!")
 
@@ -36,6 +119,8 @@ class SmartTutor:
         """
         current_step_idx = self.get_current_step(unit_id)
         total_steps = len(steps_config)
+        ctx_key = context_key(current_state_context)
+        self._save_context(unit_id, current_state_context, ctx_key)
         
         # Progress Bar with Faculty Tone
         progress = min(current_step_idx / total_steps, 1.0)
@@ -69,13 +154,7 @@ class SmartTutor:
                     st.write(step["hint"])
 
         # Dynamic Validation
-        is_correct = False
-        if "criteria" in step:
-            try:
-                is_correct = step["criteria"](current_state_context)
-            except Exception as e:
-                # st.error(f"Validation Error: {e}")
-                pass
+        is_correct = self.evaluate_step(unit_id, current_step_idx, step, current_state_context, ctx_key)
 
         # Feedback & Navigation
         if is_correct:
@@ -95,6 +174,58 @@ class SmartTutor:
             st.markdown("---")
             st.caption("🔴 *Pending Verification... Perform the action above.*")
 
+        # Look-ahead: upcoming steps the current setup already satisfies
+        if self.evaluate_upcoming:
+            ready = [idx + 1 for idx in range(current_step_idx + 1, total_steps)
+                     if self.evaluate_step(unit_id, idx, steps_config[idx], current_state_context, ctx_key)]
+            if ready:
+                st.caption(f"🔭 Your current setup already satisfies step(s) {', '.join(map(str, ready))}.")
+
+    def _save_context(self, unit_id, context, ctx_key):
+        # Only changed contexts are queued; uncacheable ones are not stored
+        saved = st.session_state.tutor_saved_ctx
+        if ctx_key is not None and saved.get(unit_id) != ctx_key:
+            saved[unit_id] = ctx_key
+            state_store.save(state_store.CONTEXT, unit_id, context)
+
+    def evaluate_step(self, unit_id, step_index, step, context, ctx_key=None):
+        """
+        Evaluates a step's criteria, reusing the last result while the
+        context's context_key snapshot is unchanged. Exceptions count as
+        "not yet" and are recorded in tutor_criteria_errors.
+        """
+        if "criteria" not in step:
+            return False
+        cache = self._eval_cache(unit_id)
+        cached = cache.get(step_index)
+        if ctx_key is not None and cached is not None and cached[0] == ctx_key:
+            return cached[1]
+
+        try:
+            result = bool(step["criteria"](context))
+        except Exception as e:
+            self._record_criteria_error(unit_id, step_index, e)
+            result = False
+
+        if ctx_key is not None:
+            cache[step_index] = (ctx_key, result)
+        return result
+
+    def _eval_cache(self, unit_id):
+        # Looked up once per unit and instance; session_state access is not free
+        if unit_id not in self._eval_caches:
+            self._eval_caches[unit_id] = st.session_state.tutor_eval_cache.setdefault(unit_id, {})
+        return self._eval_caches[unit_id]
+
+    def _record_criteria_error(self, unit_id, step_index, error):
+        entry = st.session_state.tutor_criteria_errors.setdefault(f"{unit_id}:{step_index}", {"count": 0, "last": ""})
+        entry["count"] += 1
+        entry["last"] = f"{type(error).__name__}: {error}"
+
+    def get_criteria_errors(self):
+        """Returns {"unit_id:step_index": {"count": n, "last": "ExcType: message"}}."""
+        return st.session_state.tutor_criteria_errors
+
     def render_right_panel(self, steps, current_step_index):
         """
         Legacy method for backward compatibility.
@@ -1,24 +1,25 @@
 import streamlit as st
-from utils import render_experiment_layout, show_theory, show_success_message, render_circuit_image
-from tutor import SmartTutor
+from utils import render_experiment_layout, show_theory, show_success_message, render_circuit_sprite, render_experiment_selector, rerun_experiment, render_truth_table
+from tutor import SmartTutor, tutor_steps
+from experiment_state import get_experiment_state
 from circuits import draw_logic_gate
+from netlist import gate_circuit
+from truthtable import TruthTable
 
 def render():
     st.title("Unit 1: Basics of Digital Logic")
     
     tutor = SmartTutor()
     
-    tab1, tab2 = st.tabs(["Experiment 1: Logic Gates", "Experiment 2: Boolean Algebra & K-Map"])
-    
-    with tab1:
-        run_experiment_1(tutor)
-        
-    with tab2:
-        run_experiment_2(tutor)
+    render_experiment_selector("unit1", {
+        "Experiment 1: Logic Gates": lambda: run_experiment_1(tutor),
+        "Experiment 2: Boolean Algebra & K-Map": lambda: run_experiment_2(tutor),
+    }, keep=("gate_type", "u1_in_a", "u1_in_b"))
 
-def run_experiment_1(tutor):
+@tutor_steps
+def tutor_steps_1():
     # Comprehensive 30-minute Logic Gate Exploration with Micro-Experiments
-    tutor_config = [
+    return [
         {
             "title": "Introduction: Understanding Logic Levels",
             "instruction": "Select the **AND** gate. Before testing, understand that 0 represents LOW voltage (0V) and 1 represents HIGH voltage (typically 5V in TTL logic).",
@@ -124,6 +125,9 @@ def run_experiment_1(tutor):
         }
     ]
 
+def run_experiment_1(tutor):
+    tutor_config = tutor_steps_1()
+
     def simulation():
         st.markdown("""
         <p style='color: #94a3b8; font-size: 1.05rem; margin-bottom: 2rem;'>
@@ -157,23 +161,14 @@ def run_experiment_1(tutor):
         with col2:
             st.markdown("### 🔬 Oscilloscope / Circuit")
             
-            # Logic Calculation
-            output = 0
-            if gate_type == "AND": output = input_a and input_b
-            elif gate_type == "OR": output = input_a or input_b
-            elif gate_type == "NOT": output = not input_a
-            elif gate_type == "NAND": output = not (input_a and input_b)
-            elif gate_type == "NOR": output = not (input_a or input_b)
-            elif gate_type == "XOR": output = input_a ^ input_b
-            
-            output = int(output)
+            # Logic Calculation (NOT ignores input B)
+            output = gate_circuit(gate_type).evaluate({"A": input_a, "B": input_b})["Y"]
             
             # Draw Circuit
             inputs = [input_a]
             if gate_type != "NOT": inputs.append(input_b)
             
-            img_buf = draw_logic_gate(gate_type, inputs, output)
-            render_circuit_image(img_buf)
+            render_circuit_sprite("u1_ex1", draw_logic_gate, gate_type, inputs, output)
             
             st.markdown("<br/>", unsafe_allow_html=True)
             
@@ -202,6 +197,8 @@ def run_experiment_1(tutor):
                 </div>
                 """, unsafe_allow_html=True)
 
+            render_truth_table(gate_circuit(gate_type), {"A": input_a, "B": input_b})
+
         # Context for Tutor
         context = {
             "gate": gate_type,
@@ -252,9 +249,10 @@ def run_experiment_1(tutor):
         tutor_context=st.session_state.u1_ex1_ctx
     )
 
-def run_experiment_2(tutor):
+@tutor_steps
+def tutor_steps_2():
     # Enhanced K-Map with 10+ guided steps
-    tutor_config = [
+    return [
         {
             "title": "Understanding the Problem",
             "instruction": "You need to implement F(A,B,C,D) = Σ(0,1,2,4,5,6,8,9,12,13,14). This means the function outputs '1' for these decimal inputs.",
@@ -319,19 +317,22 @@ def run_experiment_2(tutor):
             "hint": "Make sure you have EXACTLY the minterms: 0,1,2,4,5,6,8,9,12,13,14"
         }
     ]
+
+def run_experiment_2(tutor):
+    tutor_config = tutor_steps_2()
     
     if 'u1_ex2_ctx' not in st.session_state: st.session_state.u1_ex2_ctx = {}
     
     # Target minterms for F(A,B,C,D)
     target_minterms = {0, 1, 2, 4, 5, 6, 8, 9, 12, 13, 14}
+    target = TruthTable.from_minterms(4, target_minterms)
     
     def simulation():
         st.info("📋 **Task**: Minimize the function **F(A,B,C,D) = Σ(0, 1, 2, 4, 5, 6, 8, 9, 12, 13, 14)**")
         st.markdown("Toggle the cells in the Karnaugh Map below to match the minterms.")
         
-        # Initialize K-Map state (4x4 grid)
-        if 'kmap_grid' not in st.session_state:
-            st.session_state.kmap_grid = [0]*16
+        # K-Map state: one bit per cell
+        kmap = get_experiment_state("u1_ex2")
             
         # K-Map Layout (Gray Code order)
         grid_map = [
@@ -357,32 +358,37 @@ def run_experiment_2(tutor):
                 minterm = grid_map[r][c]
                 key = f"cell_{minterm}"
                 
-                val = st.session_state.kmap_grid[minterm]
+                val = kmap.get(minterm)
                 label = "1" if val else "0"
                 style = "background: rgba(34, 197, 94, 0.3); color: #22c55e; font-weight: bold;" if val else ""
                 
                 if row_cols[c+1].button(label, key=key, use_container_width=True):
-                    st.session_state.kmap_grid[minterm] = 1 - val
-                    st.rerun()
+                    kmap.toggle(minterm)
+                    rerun_experiment()
 
         # Get current marked cells
-        user_minterms = {i for i, x in enumerate(st.session_state.kmap_grid) if x == 1}
+        user_minterms = kmap.minterms()
         
         st.markdown(f"**Currently Marked**: {sorted(user_minterms) if user_minterms else 'None'} ({len(user_minterms)}/11)")
         
+        marked = kmap.table
+        if marked.bits:
+            support = ", ".join("ABCD"[k] for k in marked.support())
+            st.caption(f"Your function depends on: {support or 'no variables (constant 1)'}")
+
         if st.button("Check Solution"):
-            if user_minterms == target_minterms:
+            if marked == target:
                 st.success("✅ **Perfect!** You've correctly mapped all minterms. K-Map is complete!")
                 st.balloons()
                 tutor.mark_completed("Unit 1", "Experiment 2")
             else:
-                missing = target_minterms - user_minterms
-                extra = user_minterms - target_minterms
+                missing = list((target & ~marked).minterms())
+                extra = list((marked & ~target).minterms())
                 msg = "❌ Incorrect."
                 if missing: 
-                    msg += f" **Missing minterms**: {sorted(missing)}"
+                    msg += f" **Missing minterms**: {missing}"
                 if extra: 
-                    msg += f" **Extra minterms**: {sorted(extra)}"
+                    msg += f" **Extra minterms**: {extra}"
                 st.error(msg)
         
         return {
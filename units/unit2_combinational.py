@@ -1,26 +1,27 @@
 import streamlit as st
-from utils import show_theory, show_success_message, render_experiment_layout, render_circuit_image
-from tutor import SmartTutor
+from utils import show_theory, show_success_message, render_experiment_layout, render_circuit_sprite, render_experiment_selector, render_truth_table, render_timing_diagram, widget_default
+from tutor import SmartTutor, tutor_steps
 from circuits import draw_half_adder, draw_mux_4to1, draw_seven_segment, draw_generic_block
+from netlist import half_adder, full_adder, mux4, bcd_to_seven_segment, ripple_adder, word_inputs
+from timing import step_response, DEFAULT_DELAYS
 
 def render():
     st.title("Unit 2: Combinational Circuits")
     
     tutor = SmartTutor()
     
-    tab1, tab2, tab3 = st.tabs(["Ex 3: Adder/Subtractor", "Ex 4: Mux/Demux", "Ex 5: Code Converters"])
-    
-    with tab1:
-        run_experiment_3(tutor)
-        
-    with tab2:
-        run_experiment_4(tutor)
-        
-    with tab3:
-        run_experiment_5(tutor)
+    render_experiment_selector("unit2", {
+        "Ex 3: Adder/Subtractor": lambda: run_experiment_3(tutor),
+        "Ex 4: Mux/Demux": lambda: run_experiment_4(tutor),
+        "Ex 5: Code Converters": lambda: run_experiment_5(tutor),
+    }, keep=("u2_ex3_type", "u2_ex3_a", "u2_ex3_b", "u2_ex3_cin",
+             "u2_ex3_t_a0", "u2_ex3_t_b0", "u2_ex3_t_a1", "u2_ex3_t_b1", "u2_ex3_t_mode",
+             "u2_ex4_d0", "u2_ex4_d1", "u2_ex4_d2", "u2_ex4_d3", "u2_ex4_s1", "u2_ex4_s0", "u2_ex4_t_mode",
+             "u2_ex5_digit"))
 
-def run_experiment_3(tutor):
-    tutor_config = [
+@tutor_steps
+def tutor_steps_3():
+    return [
         {
             "title": "🎯 Experiment Setup",
             "instruction": "Select **Half Adder** from the Circuit Type options. Half adders are the foundation of all arithmetic in computers.",
@@ -105,6 +106,9 @@ def run_experiment_3(tutor):
             "success_msg": "🎓 MASTERY ACHIEVED! You've learned: (1) Half Adders add 2 bits, (2) XOR generates Sum, (3) AND generates Carry, (4) Full Adders chain for multi-bit arithmetic. Your CPU does exactly this billions of times per second!",
         }
     ]
+
+def run_experiment_3(tutor):
+    tutor_config = tutor_steps_3()
     
     if 'u2_ex3_ctx' not in st.session_state: st.session_state.u2_ex3_ctx = {}
 
@@ -116,7 +120,7 @@ def run_experiment_3(tutor):
         </p>
         """, unsafe_allow_html=True)
         
-        circuit_type = st.selectbox("Select Circuit Type", ["- Select -", "Half Adder", "Full Adder"])
+        circuit_type = st.selectbox("Select Circuit Type", ["- Select -", "Half Adder", "Full Adder"], key="u2_ex3_type")
         
         if circuit_type == "- Select -":
             st.info("👈 Select a Circuit Type to begin.")
@@ -130,12 +134,12 @@ def run_experiment_3(tutor):
             st.markdown("### 🎛️ Input Controls")
             st.markdown("<br/>", unsafe_allow_html=True)
             
-            a = st.number_input("Input A", 0, 1, 0, help="First binary input (0 or 1)")
-            b = st.number_input("Input B", 0, 1, 0, help="Second binary input (0 or 1)")
+            a = st.number_input("Input A", 0, 1, key="u2_ex3_a", help="First binary input (0 or 1)")
+            b = st.number_input("Input B", 0, 1, key="u2_ex3_b", help="Second binary input (0 or 1)")
             
             cin = 0
             if circuit_type == "Full Adder":
-                cin = st.number_input("Carry In (Cin)", 0, 1, 0, help="Carry from previous bit position")
+                cin = st.number_input("Carry In (Cin)", 0, 1, key="u2_ex3_cin", help="Carry from previous bit position")
                 st.info(f"💡 Decimal equivalent: {a} + {b} + {cin} = {a+b+cin}")
             else:
                 st.info(f"💡 Decimal equivalent: {a} + {b} = {a+b}")
@@ -145,23 +149,21 @@ def run_experiment_3(tutor):
             
             if circuit_type == "Half Adder":
                 # Half Adder Logic
-                sum_val = a ^ b
-                carry_val = a and b
+                out = half_adder().compiled()({"A": a, "B": b})
+                sum_val, carry_val = out["Sum"], out["Carry"]
                 
-                img_buf = draw_half_adder(a, b)
-                render_circuit_image(img_buf)
+                render_circuit_sprite("u2_ex3", draw_half_adder, a, b)
                 
             else:
                 # Full Adder Logic
-                sum_val = (a ^ b) ^ cin
-                carry_val = (a and b) or (cin and (a ^ b))
+                out = full_adder().compiled()({"A": a, "B": b, "Cin": cin})
+                sum_val, carry_val = out["Sum"], out["Cout"]
                 
                 # Use generic block for Full Adder
                 active_out = {"Sum": sum_val, "Cout": carry_val}
-                img_buf = draw_generic_block("Full Adder", ["A", "B", "Cin"], ["Sum", "Cout"], 
-                                           active_inputs={"A": a, "B": b, "Cin": cin},
-                                           active_outputs=active_out)
-                render_circuit_image(img_buf)
+                render_circuit_sprite("u2_ex3", draw_generic_block, "Full Adder", ["A", "B", "Cin"], ["Sum", "Cout"], 
+                                      active_inputs={"A": a, "B": b, "Cin": cin},
+                                      active_outputs=active_out)
             
             st.markdown("<br/>", unsafe_allow_html=True)
             
@@ -191,6 +193,25 @@ def run_experiment_3(tutor):
             binary_result = f"{carry_val}{sum_val}"
             decimal_result = carry_val * 2 + sum_val
             st.success(f"📊 **Binary Result**: {binary_result}₂ = **{decimal_result}₁₀** (decimal)")
+            circuit = half_adder() if circuit_type == "Half Adder" else full_adder()
+            render_truth_table(circuit, {"A": a, "B": b, "Cin": cin})
+
+        with st.expander("⏱️ Ripple-Carry Timing (4-bit adder)"):
+            st.caption(f"Four full adders chained carry-to-carry. Gate delays: XOR {DEFAULT_DELAYS['XOR']}, "
+                       f"AND {DEFAULT_DELAYS['AND']}, OR {DEFAULT_DELAYS['OR']} time units. "
+                       "Change the operands and watch the carry ripple from bit 0 to bit 3.")
+            t_cols = st.columns(5)
+            a_from = t_cols[0].number_input("A before", 0, 15, key=widget_default("u2_ex3_t_a0", 15))
+            b_from = t_cols[1].number_input("B before", 0, 15, key="u2_ex3_t_b0")
+            a_to = t_cols[2].number_input("A after", 0, 15, key=widget_default("u2_ex3_t_a1", 15))
+            b_to = t_cols[3].number_input("B after", 0, 15, key=widget_default("u2_ex3_t_b1", 1))
+            mode = t_cols[4].radio("Delay model", ["Inertial", "Transport"], key="u2_ex3_t_mode")
+            sim = step_response(ripple_adder(4),
+                                {**word_inputs("A", a_from, 4), **word_inputs("B", b_from, 4), "Cin": 0},
+                                {**word_inputs("A", a_to, 4), **word_inputs("B", b_to, 4), "Cin": 0},
+                                mode=mode.lower(),
+                                watch=[f"FA{i}.{net}" for i in range(4) for net in ("Sum", "Cout")])
+            render_timing_diagram(sim)
 
         return {
             "circuit_type": circuit_type,
@@ -235,8 +256,9 @@ def run_experiment_3(tutor):
                              tutor_unit_id="u2_ex3", tutor_steps_config=tutor_config, tutor_context=st.session_state.u2_ex3_ctx)
 
 
-def run_experiment_4(tutor):
-    tutor_config = [
+@tutor_steps
+def tutor_steps_4():
+    return [
         {
             "title": "Understanding Multiplexers",
             "instruction": "A 4:1 Multiplexer has 4 data inputs (D0-D3) and 2 select lines (S1, S0). The select lines choose which data input appears at the output.",
@@ -313,6 +335,9 @@ def run_experiment_4(tutor):
             "success_msg": "🎉 EXPERIMENT COMPLETE! You've mastered the 4:1 multiplexer - a fundamental building block of computer architecture. Fun fact: A 64-bit CPU register file uses multiplexers to select which of 32+ registers to read!",
         }
     ]
+
+def run_experiment_4(tutor):
+    tutor_config = tutor_steps_4()
     
     if 'u2_ex4_ctx' not in st.session_state: st.session_state.u2_ex4_ctx = {}
 
@@ -329,15 +354,15 @@ def run_experiment_4(tutor):
             st.markdown("### 🎛️ Controls")
             
             st.markdown("#### Data Inputs (The Sources)")
-            d0 = st.number_input("D0", 0, 1, 1, help="Data input 0")
-            d1 = st.number_input("D1", 0, 1, 0, help="Data input 1")
-            d2 = st.number_input("D2", 0, 1, 1, help="Data input 2")
-            d3 = st.number_input("D3", 0, 1, 0, help="Data input 3")
+            d0 = st.number_input("D0", 0, 1, key=widget_default("u2_ex4_d0", 1), help="Data input 0")
+            d1 = st.number_input("D1", 0, 1, key="u2_ex4_d1", help="Data input 1")
+            d2 = st.number_input("D2", 0, 1, key=widget_default("u2_ex4_d2", 1), help="Data input 2")
+            d3 = st.number_input("D3", 0, 1, key="u2_ex4_d3", help="Data input 3")
             
             st.markdown("---")
             st.markdown("#### Select Lines (The Address)")
-            s1 = st.radio("S1 (MSB - Most Significant Bit)", [0, 1], horizontal=True)
-            s0 = st.radio("S0 (LSB - Least Significant Bit)", [0, 1], horizontal=True)
+            s1 = st.radio("S1 (MSB - Most Significant Bit)", [0, 1], horizontal=True, key="u2_ex4_s1")
+            s0 = st.radio("S0 (LSB - Least Significant Bit)", [0, 1], horizontal=True, key="u2_ex4_s0")
             
             # Show binary address
             address = f"{s1}{s0}"
@@ -349,11 +374,10 @@ def run_experiment_4(tutor):
             d_inputs = [d0, d1, d2, d3]
             select_lines = [s1, s0]
             
-            img_buf = draw_mux_4to1(d_inputs, select_lines)
-            render_circuit_image(img_buf)
+            render_circuit_sprite("u2_ex4", draw_mux_4to1, d_inputs, select_lines)
             
             sel_idx = s1 * 2 + s0
-            output = d_inputs[sel_idx]
+            output = mux4().compiled()({"D0": d0, "D1": d1, "D2": d2, "D3": d3, "S1": s1, "S0": s0})["Y"]
             
             st.markdown(f"""
             <div class='lab-box' style='background: linear-gradient(135deg, rgba(34, 197, 94, 0.2) 0%, rgba(16, 185, 129, 0.2) 100%); 
@@ -366,6 +390,16 @@ def run_experiment_4(tutor):
                 </p>
             </div>
             """, unsafe_allow_html=True)
+            render_truth_table(mux4(), {"D0": d0, "D1": d1, "D2": d2, "D3": d3, "S1": s1, "S0": s0})
+
+            with st.expander("⏱️ Select-Line Timing"):
+                st.caption(f"What happens inside the mux when S0 switches from {s0} to {1 - s0} with the current data "
+                           "inputs: S0' lags S0 by one inverter delay, so two AND terms can both be off (or on) for a moment.")
+                mode = st.radio("Delay model", ["Inertial", "Transport"], horizontal=True, key="u2_ex4_t_mode")
+                current = {"D0": d0, "D1": d1, "D2": d2, "D3": d3, "S1": s1, "S0": s0}
+                sim = step_response(mux4(), current, dict(current, S0=1 - s0), mode=mode.lower(),
+                                    watch=["S0", "S0'", "T0", "T1", "T2", "T3", "Y"])
+                render_timing_diagram(sim)
             
         return {
             "d0": d0,
@@ -414,8 +448,9 @@ def run_experiment_4(tutor):
     render_experiment_layout("Experiment 4: Multiplexer Logic", theory, wrapped_sim, tutor, 
                              tutor_unit_id="u2_ex4", tutor_steps_config=tutor_config, tutor_context=st.session_state.u2_ex4_ctx)
 
-def run_experiment_5(tutor):
-    tutor_config = [
+@tutor_steps
+def tutor_steps_5():
+    return [
         {
             "title": "Understanding 7-Segment Displays",
             "instruction": "7-segment displays use 7 LED segments (labeled a-g) to show digits 0-9. Each digit requires a unique pattern of lit segments.",
@@ -479,6 +514,9 @@ def run_experiment_5(tutor):
             "success_msg": "🎉 COMPLETE! You've learned how binary data becomes human-readable displays. This decoder circuit is in every digital clock, calculator, and measuring instrument. Fun fact: The first 7-segment displays were used in telephones in the 1960s!",
         }
     ]
+
+def run_experiment_5(tutor):
+    tutor_config = tutor_steps_5()
     
     if 'u2_ex5_ctx' not in st.session_state: st.session_state.u2_ex5_ctx = {}
 
@@ -494,7 +532,7 @@ def run_experiment_5(tutor):
         
         with col1:
             st.markdown("### 🎛️ Input Encoder")
-            decimal_val = st.slider("Select Decimal Digit", 0, 9, 0, 
+            decimal_val = st.slider("Select Decimal Digit", 0, 9, key="u2_ex5_digit",
                                     help="Choose a decimal digit (0-9) to encode and display")
             
             binary_val = format(decimal_val, '04b')
@@ -514,25 +552,14 @@ def run_experiment_5(tutor):
         with col2:
             st.markdown("### 📺 7-Segment Display Output")
             
-            img_buf = draw_seven_segment(decimal_val)
-            render_circuit_image(img_buf)
+            render_circuit_sprite("u2_ex5", draw_seven_segment, decimal_val)
             
             # Show which segments are active
-            segment_map = {
-                0: "a,b,c,d,e,f",
-                1: "b,c",
-                2: "a,b,d,e,g",
-                3: "a,b,c,d,g",
-                4: "b,c,f,g",
-                5: "a,c,d,f,g",
-                6: "a,c,d,e,f,g",
-                7: "a,b,c",
-                8: "a,b,c,d,e,f,g",
-                9: "a,b,c,d,f,g"
-            }
-            
-            active_segments = segment_map.get(decimal_val, "")
+            segments = bcd_to_seven_segment().compiled()(word_inputs("D", decimal_val, 4))
+            active_segments = ",".join(seg for seg in "abcdefg" if segments[seg])
             st.caption(f"**Active Segments**: {active_segments}")
+            render_truth_table(bcd_to_seven_segment(), word_inputs("D", decimal_val, 4),
+                               label="📋 Decoder Truth Table (codes 10-15 blank the display)")
             
         return {
             "decimal": decimal_val,
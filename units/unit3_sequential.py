@@ -1,24 +1,25 @@
 import streamlit as st
-from utils import render_experiment_layout, render_circuit_image
-from tutor import SmartTutor
+from utils import render_experiment_layout, render_circuit_image, render_experiment_selector, rerun_experiment, render_trace_table
+from tutor import SmartTutor, tutor_steps
+from experiment_state import get_experiment_state
 from circuits import draw_flip_flop, draw_generic_block
+from netlist import flip_flop_next_state
 
 def render():
     st.title("Unit 3: Sequential Circuits")
     
     tutor = SmartTutor()
     
-    tab1, tab2, tab3 = st.tabs(["Ex 6: Flip-Flops", "Ex 7: Shift Registers", "Ex 8: Counters"])
-    
-    with tab1:
-        run_experiment_6(tutor)
-    with tab2:
-        run_experiment_7(tutor)
-    with tab3:
-        run_experiment_8(tutor)
+    render_experiment_selector("unit3", {
+        "Ex 6: Flip-Flops": lambda: run_experiment_6(tutor),
+        "Ex 7: Shift Registers": lambda: run_experiment_7(tutor),
+        "Ex 8: Counters": lambda: run_experiment_8(tutor),
+    }, keep=("u3_ex6_type", "u3_ex6_s", "u3_ex6_r", "u3_ex6_j", "u3_ex6_k", "u3_ex6_d", "u3_ex6_t",
+             "u3_ex7_data_in", "u3_ex8_trace_page"))
 
-def run_experiment_6(tutor):
-    tutor_config = [
+@tutor_steps
+def tutor_steps_6():
+    return [
         {
             "title": "Select SR Flip-Flop",
             "instruction": "Select **SR Flip-Flop** from the dropdown menu to begin sequential circuit analysis.",
@@ -74,6 +75,9 @@ def run_experiment_6(tutor):
             "hint": "Each clock pulse with T=1 inverts the output."
         }
     ]
+
+def run_experiment_6(tutor):
+    tutor_config = tutor_steps_6()
     
     if 'u3_ex6_ctx' not in st.session_state: st.session_state.u3_ex6_ctx = {}
 
@@ -81,7 +85,7 @@ def run_experiment_6(tutor):
         col1, col2 = st.columns([1, 2])
         
         with col1:
-            ff_type = st.selectbox("Flip-Flop Type", ["- Select -", "SR", "JK", "D", "T"])
+            ff_type = st.selectbox("Flip-Flop Type", ["- Select -", "SR", "JK", "D", "T"], key="u3_ex6_type")
             
             if ff_type == "- Select -":
                 st.info("👈 Select a Flip-Flop Type to begin.")
@@ -90,64 +94,53 @@ def run_experiment_6(tutor):
             st.markdown("---")
             
             # State management
-            if 'q' not in st.session_state: st.session_state.q = 0
-            if 'clk_state' not in st.session_state: st.session_state.clk_state = 0 # 0 or 1
+            ff = get_experiment_state("u3_ex6")
             
             # Inputs
             inputs = {}
             s, r, j, k, d, t_val = 0, 0, 0, 0, 0, 0
             
             if ff_type == "SR":
-                s = st.radio("S", [0, 1], horizontal=True)
-                r = st.radio("R", [0, 1], horizontal=True)
+                s = st.radio("S", [0, 1], horizontal=True, key="u3_ex6_s")
+                r = st.radio("R", [0, 1], horizontal=True, key="u3_ex6_r")
                 inputs['S'] = s
                 inputs['R'] = r
             elif ff_type == "JK":
-                j = st.radio("J", [0, 1], horizontal=True)
-                k = st.radio("K", [0, 1], horizontal=True)
+                j = st.radio("J", [0, 1], horizontal=True, key="u3_ex6_j")
+                k = st.radio("K", [0, 1], horizontal=True, key="u3_ex6_k")
                 inputs['J'] = j
                 inputs['K'] = k
             elif ff_type == "D":
-                d = st.radio("D", [0, 1], horizontal=True)
+                d = st.radio("D", [0, 1], horizontal=True, key="u3_ex6_d")
                 inputs['D'] = d
             elif ff_type == "T":
-                t_val = st.radio("T", [0, 1], horizontal=True)
+                t_val = st.radio("T", [0, 1], horizontal=True, key="u3_ex6_t")
                 inputs['T'] = t_val
                 
             # Clock Button (Simulates a full pulse: 0 -> 1 -> 0)
             clk_pulsed = 0
             if st.button("Pulse Clock 🕰️"):
-                # Logic update on rising edge
-                q = st.session_state.q
-                if ff_type == "SR":
-                    if s==1 and r==0: q=1
-                    elif s==0 and r==1: q=0
-                    elif s==1 and r==1: st.error("⚠️ Invalid State (S=1, R=1) - Undefined behavior!")
-                elif ff_type == "JK":
-                    if j==1 and k==0: q=1
-                    elif j==0 and k==1: q=0
-                    elif j==1 and k==1: q = 1-q
-                elif ff_type == "D":
-                    q = d
-                elif ff_type == "T":
-                    if t_val: q = 1-q
-                st.session_state.q = q
-                st.session_state.clk_state = 1 # Visual feedback for pulse
+                # Logic update on rising edge: next state from the characteristic equation
+                if ff_type == "SR" and s == 1 and r == 1:
+                    st.error("⚠️ Invalid State (S=1, R=1) - Undefined behavior!")
+                else:
+                    ff.q = flip_flop_next_state(ff_type).evaluate(dict(inputs, Q=ff.q))["Qn"]
+                ff.clk = 1 # Visual feedback for pulse
                 clk_pulsed = 1
             else:
-                st.session_state.clk_state = 0
+                ff.clk = 0
             
         with col2:
-            img = draw_flip_flop(ff_type, inputs, st.session_state.q, 1-st.session_state.q, st.session_state.clk_state)
+            img = draw_flip_flop(ff_type, inputs, ff.q, 1-ff.q, ff.clk)
             render_circuit_image(img)
             
             st.markdown(f"""
             <div class='lab-box' style='text-align: center; background: rgba(59, 130, 246, 0.15);'>
                 <h4 style='color: #60a5fa; margin-top: 0;'>Current State</h4>
                 <p style='font-size: 2.5rem; font-family: "JetBrains Mono", monospace; 
-                          color: #60a5fa; margin: 0; font-weight: 600;'>Q = {st.session_state.q}</p>
+                          color: #60a5fa; margin: 0; font-weight: 600;'>Q = {ff.q}</p>
                 <p style='color: #93c5fd; font-size: 0.9rem; margin-top: 0.5rem;'>
-                    Q̄ (inverted) = {1 - st.session_state.q}
+                    Q̄ (inverted) = {1 - ff.q}
                 </p>
             </div>
             """, unsafe_allow_html=True)
@@ -157,7 +150,7 @@ def run_experiment_6(tutor):
             "s": s,
             "r": r,
             "clk_pulsed": clk_pulsed,
-            "q": st.session_state.q
+            "q": ff.q
         }
 
     theory = """
@@ -185,8 +178,9 @@ def run_experiment_6(tutor):
     render_experiment_layout("Experiment 6: Flip-Flop Fundamentals", theory, wrapped_sim, tutor, 
                              tutor_unit_id="u3_ex6", tutor_steps_config=tutor_config, tutor_context=st.session_state.u3_ex6_ctx)
 
-def run_experiment_7(tutor):
-    tutor_config = [
+@tutor_steps
+def tutor_steps_7():
+    return [
         {
             "title": "Clear Register to Initial State",
             "instruction": "Press **Clear** to reset all register bits to `0000`.",
@@ -240,11 +234,14 @@ def run_experiment_7(tutor):
             "success_msg": "✓ Experimentation complete! Shift registers are used in serial communication (UART, SPI) and data storage.",
         }
     ]
+
+def run_experiment_7(tutor):
+    tutor_config = tutor_steps_7()
     
     if 'u3_ex7_ctx' not in st.session_state: st.session_state.u3_ex7_ctx = {}
     
-    # Register State: [Q3, Q2, Q1, Q0] - SISO Left to Right: In -> Q3 -> Q2 -> Q1 -> Q0
-    if 'u3_ex7_reg' not in st.session_state: st.session_state.u3_ex7_reg = [0, 0, 0, 0]
+    # Register State: Q3..Q0 packed in one int - SISO Left to Right: In -> Q3 -> Q2 -> Q1 -> Q0
+    shift_reg = get_experiment_state("u3_ex7")
     
     def simulation():
         st.markdown("""
@@ -258,25 +255,23 @@ def run_experiment_7(tutor):
         
         with col1:
             st.markdown("### 🎛️ Controls")
-            data_in = st.radio("Data In (Serial)", [0, 1], horizontal=True)
+            data_in = st.radio("Data In (Serial)", [0, 1], horizontal=True, key="u3_ex7_data_in")
             
             col_btns = st.columns(2)
             pulse = col_btns[0].button("Pulse Clock 🕰️", key="sr_pulse")
             clear = col_btns[1].button("Clear 🗑️", key="sr_clear")
             
             if clear:
-                st.session_state.u3_ex7_reg = [0, 0, 0, 0]
-                st.rerun()
+                shift_reg.clear()
+                rerun_experiment()
                 
             if pulse:
                 # Shift Right: In -> Q3, Q3->Q2, Q2->Q1, Q1->Q0
-                reg = st.session_state.u3_ex7_reg
-                new_reg = [data_in] + reg[:-1]
-                st.session_state.u3_ex7_reg = new_reg
+                shift_reg.shift_in(data_in)
                 
         with col2:
             st.markdown("### 🔬 Register State")
-            reg = st.session_state.u3_ex7_reg
+            reg = shift_reg.as_list()
             
             # Visualize as a generic block with active outputs showing the bits
             active_outs = {
@@ -341,8 +336,9 @@ def run_experiment_7(tutor):
     render_experiment_layout("Experiment 7: Shift Registers", theory, wrapped_sim, tutor, 
                              tutor_unit_id="u3_ex7", tutor_steps_config=tutor_config, tutor_context=st.session_state.u3_ex7_ctx)
 
-def run_experiment_8(tutor):
-    tutor_config = [
+@tutor_steps
+def tutor_steps_8():
+    return [
         {
             "title": "Observe Initial State",
             "instruction": "The counter starts at **0 (0000)**. This is the reset state.",
@@ -401,11 +397,13 @@ def run_experiment_8(tutor):
             "success_msg": "✓ Reset verified! Asynchronous reset immediately clears all flip-flops without waiting for the clock.",
         }
     ]
+
+def run_experiment_8(tutor):
+    tutor_config = tutor_steps_8()
     
     if 'u3_ex8_ctx' not in st.session_state: st.session_state.u3_ex8_ctx = {}
     
-    if 'u3_ex8_count' not in st.session_state: st.session_state.u3_ex8_count = 0
-    if 'u3_ex8_history' not in st.session_state: st.session_state.u3_ex8_history = []
+    counter = get_experiment_state("u3_ex8")
     
     def simulation():
         st.markdown("""
@@ -424,25 +422,16 @@ def run_experiment_8(tutor):
             reset = col_btns[1].button("Reset 🔄", key="ctr_reset")
             
             if reset:
-                st.session_state.u3_ex8_count = 0
-                st.session_state.u3_ex8_history = [] # Clear history
-                st.rerun()
+                counter.reset() # Also clears the trace
+                rerun_experiment()
                 
             if pulse:
-                st.session_state.u3_ex8_count = (st.session_state.u3_ex8_count + 1) % 16
-                # Log state to history
-                count = st.session_state.u3_ex8_count
-                binary_str = format(count, '04b')
-                st.session_state.u3_ex8_history.append({
-                    "Step": len(st.session_state.u3_ex8_history) + 1,
-                    "Decimal": count,
-                    "Binary": binary_str,
-                    "Q3": binary_str[0], "Q2": binary_str[1], "Q1": binary_str[2], "Q0": binary_str[3]
-                })
+                # Advances the count and logs it to the trace
+                counter.pulse()
                 
         with col2:
             st.markdown("### 🔬 Counter State")
-            count = st.session_state.u3_ex8_count
+            count = counter.count
             
             # Convert to binary string
             binary_str = format(count, '04b')
@@ -473,10 +462,10 @@ def run_experiment_8(tutor):
             """, unsafe_allow_html=True)
 
         # Trace Table Visualization
-        if st.session_state.u3_ex8_history:
+        if counter.trace:
             st.markdown("### 📝 State Trace Table")
             st.markdown("This table records the state of the counter after each clock pulse, helping you visualize the counting sequence.")
-            st.dataframe(st.session_state.u3_ex8_history, use_container_width=True)
+            render_trace_table(counter.trace, "u3_ex8_trace", to_frame=counter.trace_frame)
 
         return {
             "count": count
@@ -1,7 +1,8 @@
 import streamlit as st
 import graphviz
-from utils import render_experiment_layout, render_circuit_image
-from tutor import SmartTutor
+from utils import render_experiment_layout, render_circuit_image, render_experiment_selector, rerun_experiment
+from tutor import SmartTutor, tutor_steps
+from experiment_state import get_experiment_state
 from circuits import draw_generic_block
 
 def render():
@@ -9,16 +10,15 @@ def render():
     
     tutor = SmartTutor()
     
-    tab1, tab2 = st.tabs(["Ex 9: FSM Design", "Ex 10: Vending Machine"])
-    
-    with tab1:
-        run_experiment_9(tutor)
-    with tab2:
-        run_experiment_10(tutor)
+    render_experiment_selector("unit4", {
+        "Ex 9: FSM Design": lambda: run_experiment_9(tutor),
+        "Ex 10: Vending Machine": lambda: run_experiment_10(tutor),
+    }, keep=("u4_ex9_x",))
 
-def run_experiment_9(tutor):
+@tutor_steps
+def tutor_steps_9():
     # Advanced Tutor Configuration for FSM
-    tutor_config = [
+    return [
         {
             "title": "Initialize FSM",
             "instruction": "Click **Reset** to ensure the Sequence Detector is in the starting state (State A).",
@@ -83,12 +83,10 @@ def run_experiment_9(tutor):
         }
     ]
 
-    if 'u4_ex9_state' not in st.session_state:
-        st.session_state.u4_ex9_state = 'A'
-    if 'u4_ex9_clocked' not in st.session_state:
-        st.session_state.u4_ex9_clocked = False
-    if 'u4_ex9_last_in' not in st.session_state:
-        st.session_state.u4_ex9_last_in = 0
+def run_experiment_9(tutor):
+    tutor_config = tutor_steps_9()
+
+    fsm = get_experiment_state("u4_ex9")
     
     def simulation():
         st.markdown("### 🕵️ Sequence Detector (Mealy Machine)")
@@ -104,7 +102,7 @@ def run_experiment_9(tutor):
             with c1:
                 if st.button("Clock Pulse 🟢"):
                     # State Transition Logic for '101' Detector
-                    curr = st.session_state.u4_ex9_state
+                    curr = fsm.state
                     next_s = curr
                     out_z = 0
                     
@@ -118,10 +116,10 @@ def run_experiment_9(tutor):
                         if input_x == 1: next_s = 'B'; out_z = 1 # Sequence Detected!
                         else: next_s = 'A'; out_z = 0
                         
-                    st.session_state.u4_ex9_state = next_s
-                    st.session_state.u4_ex9_last_out = out_z
-                    st.session_state.u4_ex9_clocked = True
-                    st.session_state.u4_ex9_last_in = input_x
+                    fsm.state = next_s
+                    fsm.last_out = out_z
+                    fsm.clocked = 1
+                    fsm.last_in = input_x
                     
                     if out_z == 1:
                         st.success(f"🚨 SEQUENCE DETECTED! Output Z = 1")
@@ -130,16 +128,14 @@ def run_experiment_9(tutor):
                     
             with c2:
                 if st.button("Reset 🔴"):
-                    st.session_state.u4_ex9_state = 'A'
-                    st.session_state.u4_ex9_last_out = 0
-                    st.session_state.u4_ex9_clocked = False
-                    st.rerun()
+                    fsm.reset() # Back to state A, output and clock flag cleared
+                    rerun_experiment()
 
-            st.metric("Current State", st.session_state.u4_ex9_state)
+            st.metric("Current State", fsm.state)
             
             # Preview Mealy Output (depends on current state AND input)
             preview_out = 0
-            if st.session_state.u4_ex9_state == 'C' and input_x == 1:
+            if fsm.state == 'C' and input_x == 1:
                 preview_out = 1
             st.metric("Output Z (Next Pulse)", preview_out)
 
@@ -152,7 +148,7 @@ def run_experiment_9(tutor):
             # Define States
             states = ['A', 'B', 'C']
             for s in states:
-                if s == st.session_state.u4_ex9_state:
+                if s == fsm.state:
                     dot.node(s, s, style='filled', fillcolor='#60a5fa', fontcolor='white')
                 else:
                     dot.node(s, s)
@@ -163,15 +159,15 @@ def run_experiment_9(tutor):
             dot.edge('B', 'B', label='1/0')
             dot.edge('B', 'C', label='0/0')
             dot.edge('C', 'A', label='0/0')
-            dot.edge('C', 'B', label='1/1', color='green' if st.session_state.u4_ex9_state == 'C' and input_x == 1 else 'black')
+            dot.edge('C', 'B', label='1/1', color='green' if fsm.state == 'C' and input_x == 1 else 'black')
             
             st.graphviz_chart(dot)
 
         return {
-            "current_state": st.session_state.u4_ex9_state,
-            "last_output": st.session_state.get('u4_ex9_last_out', 0),
-            "clocked": st.session_state.u4_ex9_clocked,
-            "last_input": st.session_state.u4_ex9_last_in
+            "current_state": fsm.state,
+            "last_output": fsm.last_out,
+            "clocked": bool(fsm.clocked),
+            "last_input": fsm.last_in
         }
 
     theory = """
@@ -211,9 +207,10 @@ def run_experiment_9(tutor):
     render_experiment_layout("Experiment 9: Sequence Detector (FSM)", theory, wrapped_sim, tutor, 
                              tutor_unit_id="u4_ex9", tutor_steps_config=tutor_config, tutor_context=st.session_state.u4_ex9_ctx)
 
-def run_experiment_10(tutor):
+@tutor_steps
+def tutor_steps_10():
     # Advanced Tutor for Vending Machine
-    tutor_config = [
+    return [
         {
             "title": "Initialize System",
             "instruction": "Ensure the balance is **0¢**. If not, click **Reset**.",
@@ -276,8 +273,10 @@ def run_experiment_10(tutor):
         }
     ]
 
-    if 'u4_ex10_bal' not in st.session_state: st.session_state.u4_ex10_bal = 0
-    if 'u4_ex10_disp' not in st.session_state: st.session_state.u4_ex10_disp = False
+def run_experiment_10(tutor):
+    tutor_config = tutor_steps_10()
+
+    vend = get_experiment_state("u4_ex10")
 
     def simulation():
         st.markdown("### 🥤 Vending Machine Controller")
@@ -286,26 +285,26 @@ def run_experiment_10(tutor):
         col1, col2 = st.columns([1, 2])
         
         with col1:
-            st.metric("Current Balance", f"{st.session_state.u4_ex10_bal}¢")
+            st.metric("Current Balance", f"{vend.balance}¢")
             
             if st.button("Insert Nickel (5¢)"):
-                st.session_state.u4_ex10_bal += 5
+                vend.balance += 5
             
             if st.button("Insert Dime (10¢)"):
-                st.session_state.u4_ex10_bal += 10
+                vend.balance += 10
                 
             if st.button("Reset / Return Coins"):
-                st.session_state.u4_ex10_bal = 0
-                st.session_state.u4_ex10_disp = False
+                vend.balance = 0
+                vend.dispensed = 0
                 
             # Logic
-            if st.session_state.u4_ex10_bal >= 15:
-                st.session_state.u4_ex10_disp = True
+            if vend.balance >= 15:
+                vend.dispensed = 1
                 # IMPORTANT: Do NOT auto-reset balance immediately, or tutor misses the state!
                 # Let user reset manually or have a delay (simulated by requiring reset step)
                 st.success("🍬 Item Dispensed!")
             else:
-                st.session_state.u4_ex10_disp = False
+                vend.dispensed = 0
                 
         with col2:
             # State Diagram
@@ -313,7 +312,7 @@ def run_experiment_10(tutor):
             dot = graphviz.Digraph()
             dot.attr(rankdir='LR')
             
-            bal = st.session_state.u4_ex10_bal
+            bal = vend.balance
             # States: 0, 5, 10, 15(Dispense)
             
             node_color = '#ec4899'
@@ -336,8 +335,8 @@ def run_experiment_10(tutor):
             st.graphviz_chart(dot)
             
         return {
-            "balance": st.session_state.u4_ex10_bal,
-            "dispensed": st.session_state.u4_ex10_disp
+            "balance": vend.balance,
+            "dispensed": bool(vend.dispensed)
         }
 
     theory = """
@@ -1,24 +1,26 @@
 import streamlit as st
 import pandas as pd
-from utils import render_experiment_layout, render_circuit_image
-from tutor import SmartTutor
+from utils import render_experiment_layout, render_circuit_image, render_experiment_selector
+from tutor import SmartTutor, tutor_steps
+from experiment_state import get_experiment_state
 from circuits import draw_generic_block
+from netlist import pla as pla_circuit, mux4
+from truthtable import describe
 
 def render():
     st.title("Unit 5: PLDs & Memory")
     
     tutor = SmartTutor()
     
-    tab1, tab2 = st.tabs(["Ex 11: PLA/PAL", "Ex 12: FPGA"])
-    
-    with tab1:
-        run_experiment_11(tutor)
-    with tab2:
-        run_experiment_12(tutor)
+    render_experiment_selector("unit5", {
+        "Ex 11: PLA/PAL": lambda: run_experiment_11(tutor),
+        "Ex 12: FPGA": lambda: run_experiment_12(tutor),
+    }, keep=("pla_in_a", "pla_in_b", "fpga_in_a", "fpga_in_b"))
 
-def run_experiment_11(tutor):
+@tutor_steps
+def tutor_steps_11():
     # Advanced Tutor Configuration for PLA
-    tutor_config = [
+    return [
         {
             "title": "Understand PLA Architecture",
             "instruction": "A PLA (Programmable Logic Array) has a programmable AND plane feeding a programmable OR plane. We will implement **F = A + B**.",
@@ -81,9 +83,11 @@ def run_experiment_11(tutor):
         }
     ]
 
-    # PLA State: 2 Product Terms, 2 Inputs (A, B), 1 Output
-    if 'pla_and' not in st.session_state: st.session_state.pla_and = [[False, False], [False, False]]
-    if 'pla_or' not in st.session_state: st.session_state.pla_or = [False, False]
+def run_experiment_11(tutor):
+    tutor_config = tutor_steps_11()
+
+    # PLA State: 2 Product Terms, 2 Inputs (A, B), 1 Output; AND/OR planes bit-packed
+    pla = get_experiment_state("u5_ex11")
     
     def simulation():
         st.markdown("""
@@ -102,41 +106,26 @@ def run_experiment_11(tutor):
             c1, c2 = st.columns(2)
             with c1:
                 st.markdown("**Product Term 1**")
-                st.session_state.pla_and[0][0] = st.checkbox("Input A", value=st.session_state.pla_and[0][0], key="p1_a")
-                st.session_state.pla_and[0][1] = st.checkbox("Input B", value=st.session_state.pla_and[0][1], key="p1_b")
+                pla.set_uses(0, 0, st.checkbox("Input A", value=pla.uses(0, 0), key="p1_a"))
+                pla.set_uses(0, 1, st.checkbox("Input B", value=pla.uses(0, 1), key="p1_b"))
             with c2:
                 st.markdown("**Product Term 2**")
-                st.session_state.pla_and[1][0] = st.checkbox("Input A", value=st.session_state.pla_and[1][0], key="p2_a")
-                st.session_state.pla_and[1][1] = st.checkbox("Input B", value=st.session_state.pla_and[1][1], key="p2_b")
+                pla.set_uses(1, 0, st.checkbox("Input A", value=pla.uses(1, 0), key="p2_a"))
+                pla.set_uses(1, 1, st.checkbox("Input B", value=pla.uses(1, 1), key="p2_b"))
                 
             st.markdown("### 🔗 OR Plane Configuration")
             st.caption("Select Product Terms for the Output (OR Gate)")
             
-            st.session_state.pla_or[0] = st.checkbox("Include Term 1", value=st.session_state.pla_or[0], key="or_p1")
-            st.session_state.pla_or[1] = st.checkbox("Include Term 2", value=st.session_state.pla_or[1], key="or_p2")
+            pla.set_includes(0, st.checkbox("Include Term 1", value=pla.includes(0), key="or_p1"))
+            pla.set_includes(1, st.checkbox("Include Term 2", value=pla.includes(1), key="or_p2"))
             
         with col2:
             st.markdown("### 🧪 Test Bench")
             in_a = st.radio("Input A", [0, 1], horizontal=True, key="pla_in_a")
             in_b = st.radio("Input B", [0, 1], horizontal=True, key="pla_in_b")
             
-            # Logic Calculation
-            # Term 1
-            t1 = 1
-            if st.session_state.pla_and[0][0]: t1 &= in_a
-            if st.session_state.pla_and[0][1]: t1 &= in_b
-            if not st.session_state.pla_and[0][0] and not st.session_state.pla_and[0][1]: t1 = 0 # Unused term is 0
-            
-            # Term 2
-            t2 = 1
-            if st.session_state.pla_and[1][0]: t2 &= in_a
-            if st.session_state.pla_and[1][1]: t2 &= in_b
-            if not st.session_state.pla_and[1][0] and not st.session_state.pla_and[1][1]: t2 = 0
-            
-            # Output
-            out = 0
-            if st.session_state.pla_or[0]: out |= t1
-            if st.session_state.pla_or[1]: out |= t2
+            # Logic Calculation: the programmed AND/OR planes as a netlist
+            out = pla_circuit(pla.and_plane, pla.or_plane).evaluate({"A": in_a, "B": in_b})["F"]
             
             st.markdown("---")
             st.metric("Output F", out)
@@ -145,14 +134,15 @@ def run_experiment_11(tutor):
                 st.markdown("💡 **LED ON**")
             else:
                 st.markdown("⚫ **LED OFF**")
+            st.caption(f"Programmed function: F = {describe(pla.function())}")
 
         return {
-            "p1_a": st.session_state.pla_and[0][0],
-            "p1_b": st.session_state.pla_and[0][1],
-            "p2_a": st.session_state.pla_and[1][0],
-            "p2_b": st.session_state.pla_and[1][1],
-            "or_p1": st.session_state.pla_or[0],
-            "or_p2": st.session_state.pla_or[1],
+            "p1_a": pla.uses(0, 0),
+            "p1_b": pla.uses(0, 1),
+            "p2_a": pla.uses(1, 0),
+            "p2_b": pla.uses(1, 1),
+            "or_p1": pla.includes(0),
+            "or_p2": pla.includes(1),
             "in_a": in_a,
             "in_b": in_b,
             "out": out
@@ -194,9 +184,10 @@ def run_experiment_11(tutor):
     render_experiment_layout("Experiment 11: PLA/PAL Designer", theory, wrapped_sim, tutor, 
                              tutor_unit_id="u5_ex11", tutor_steps_config=tutor_config, tutor_context=st.session_state.u5_ex11_ctx)
 
-def run_experiment_12(tutor):
+@tutor_steps
+def tutor_steps_12():
     # Advanced Tutor Configuration for FPGA
-    tutor_config = [
+    return [
         {
             "title": "Understanding LUTs",
             "instruction": "A Look-Up Table (LUT) is just a small memory. To implement logic, we store the Truth Table outputs in this memory. We will build an **XOR** gate.",
@@ -253,8 +244,11 @@ def run_experiment_12(tutor):
         }
     ]
 
-    # LUT Memory: 4 rows for 2 inputs (A, B)
-    if 'lut_mem' not in st.session_state: st.session_state.lut_mem = [0, 0, 0, 0]
+def run_experiment_12(tutor):
+    tutor_config = tutor_steps_12()
+
+    # LUT Memory: 4 rows for 2 inputs (A, B), one bit per row
+    lut = get_experiment_state("u5_ex12")
     
     def simulation():
         st.markdown("""
@@ -281,7 +275,7 @@ def run_experiment_12(tutor):
                 with c1:
                     st.markdown(f"**Input {bin_str}** (A={a_val}, B={b_val})")
                 with c2:
-                    st.session_state.lut_mem[i] = st.selectbox(f"Output for {bin_str}", [0, 1], key=f"lut_{i}")
+                    lut.set(i, st.selectbox(f"Output for {bin_str}", [0, 1], index=lut.get(i), key=f"lut_{i}"))
                     
         with col2:
             st.markdown("### 🧪 Test Bench")
@@ -291,12 +285,14 @@ def run_experiment_12(tutor):
             # Calculate Address
             addr = (in_a << 1) | in_b
             
-            # Fetch from LUT
-            out = st.session_state.lut_mem[addr]
+            # Fetch from LUT: the configuration bits are the data inputs of a 4:1 mux
+            out = mux4().evaluate({"D0": lut.get(0), "D1": lut.get(1), "D2": lut.get(2), "D3": lut.get(3),
+                                   "S1": in_a, "S0": in_b})["Y"]
             
             st.markdown("---")
             st.markdown(f"**LUT Address**: `{format(addr, '02b')}`")
             st.metric("FPGA Output", out)
+            st.caption(f"Configured function: F = {describe(lut.table)}")
             
             # Visualizing the active row
             st.markdown("#### Active Memory Cell")
@@ -307,7 +303,7 @@ def run_experiment_12(tutor):
             """, unsafe_allow_html=True)
 
         return {
-            "lut": st.session_state.lut_mem,
+            "lut": lut.as_list(),
             "in_a": in_a,
             "in_b": in_b,
             "out": out
@@ -1,508 +1,45 @@
 import streamlit as st
 import streamlit.components.v1 as components
+from streamlit.errors import StreamlitAPIException
+import base64
+import hashlib
+import os
+import tempfile
+import threading
+import time
+import state_store
+from truthtable import exhaustive
+
+# --- Lab Theme ---
+# The theme lives in static/css/lab.css with its fonts bundled in
+# static/fonts, so a rerun only carries a short <link> tag and the browser
+# fetches the stylesheet and fonts once.
+
+LAB_STYLESHEET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "css", "lab.css")
+LAB_STYLESHEET_URL = "app/static/css/lab.css"
+
+_lab_stylesheet = None
+
+def _load_lab_stylesheet():
+    """Returns (css, version) for the theme, read once per process."""
+    global _lab_stylesheet
+    if _lab_stylesheet is None:
+        with open(LAB_STYLESHEET_PATH, encoding="utf-8") as f:
+            css = f.read()
+        _lab_stylesheet = (css, hashlib.sha256(css.encode("utf-8")).hexdigest()[:12])
+    return _lab_stylesheet
 
 def apply_lab_style():
     """Applies a professional, modern dark theme with engineering aesthetics."""
-    st.markdown("""
-        <style>
-        @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&family=JetBrains+Mono:wght@400;500;600&display=swap');
-        
-        /* Main Background with subtle gradient */
-        .stApp {
-            background: linear-gradient(135deg, #0a0e1a 0%, #1a1f35 100%);
-            color: #e4e7eb;
-            font-family: 'Inter', -apple-system, BlinkMacSystemFont, sans-serif;
-        }
-        
-        /* Better text rendering */
-        * {
-            -webkit-font-smoothing: antialiased;
-            -moz-osx-font-smoothing: grayscale;
-        }
-        
-        /* Main content padding */
-        .main .block-container {
-            padding-top: 3rem;
-            padding-bottom: 3rem;
-            padding-left: 3rem;
-            padding-right: 3rem;
-            max-width: 1400px;
-        }
-        
-        /* Sidebar with glassmorphism effect */
-        [data-testid="stSidebar"] {
-            background: rgba(20, 25, 40, 0.95);
-            backdrop-filter: blur(10px);
-            border-right: 1px solid rgba(100, 200, 255, 0.1);
-            box-shadow: 4px 0 24px rgba(0, 0, 0, 0.3);
-        }
-        
-        [data-testid="stSidebar"] > div:first-child {
-            padding-top: 2rem;
-            padding-left: 1.5rem;
-            padding-right: 1.5rem;
-        }
-        
-        /* Logo styling */
-        [data-testid="stSidebar"] img {
-            border-radius: 12px;
-            margin-bottom: 1.5rem;
-            box-shadow: 0 4px 12px rgba(96, 165, 250, 0.2);
-        }
-        
-        /* Headers with gradient text and better spacing */
-        h1 {
-            background: linear-gradient(135deg, #60a5fa 0%, #a78bfa 50%, #ec4899 100%);
-            -webkit-background-clip: text;
-            -webkit-text-fill-color: transparent;
-            background-clip: text;
-            font-weight: 700;
-            font-size: 2.75rem !important;
-            margin-bottom: 2rem !important;
-            margin-top: 0 !important;
-            letter-spacing: -0.02em;
-            line-height: 1.2;
-        }
-        
-        h2 {
-            color: #60a5fa;
-            font-weight: 600;
-            font-size: 1.875rem !important;
-            margin-top: 2.5rem !important;
-            margin-bottom: 1.25rem !important;
-            border-bottom: 2px solid rgba(96, 165, 250, 0.2);
-            padding-bottom: 0.75rem;
-            letter-spacing: -0.01em;
-        }
-        
-        h3 {
-            color: #93c5fd;
-            font-weight: 600;
-            font-size: 1.375rem !important;
-            margin-top: 2rem !important;
-            margin-bottom: 1rem !important;
-            letter-spacing: -0.01em;
-        }
-        
-        h4 {
-            color: #bfdbfe;
-            font-weight: 500;
-            font-size: 1.125rem !important;
-            margin-top: 1.5rem !important;
-            margin-bottom: 0.75rem !important;
-        }
-        
-        /* Paragraph spacing */
-        p {
-            line-height: 1.7;
-            margin-bottom: 1rem;
-        }
-        
-        /* Buttons with modern styling */
-        .stButton>button {
-            background: linear-gradient(135deg, #3b82f6 0%, #2563eb 100%);
-            color: white;
-            border: none;
-            border-radius: 10px;
-            font-weight: 600;
-            padding: 0.875rem 2rem;
-            font-size: 1rem;
-            transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1);
-            box-shadow: 0 4px 12px rgba(59, 130, 246, 0.3);
-            text-transform: uppercase;
-            letter-spacing: 0.05em;
-            margin-top: 0.5rem;
-        }
-        
-        .stButton>button:hover {
-            background: linear-gradient(135deg, #2563eb 0%, #1d4ed8 100%);
-            box-shadow: 0 6px 20px rgba(59, 130, 246, 0.5);
-            transform: translateY(-2px);
-        }
-        
-        .stButton>button:active {
-            transform: translateY(0);
-        }
-        
-        /* Radio buttons with better spacing */
-        .stRadio {
-            margin-bottom: 1.5rem;
-        }
-        
-        .stRadio > label {
-            color: #93c5fd;
-            font-weight: 500;
-            font-size: 0.95rem;
-            margin-bottom: 0.75rem;
-            display: block;
-        }
-        
-        .stRadio > div {
-            background: rgba(30, 41, 59, 0.5);
-            padding: 1rem;
-            border-radius: 10px;
-            border: 1px solid rgba(100, 200, 255, 0.1);
-            gap: 1rem;
-        }
-        
-        .stRadio > div > label {
-            padding: 0.5rem 1rem;
-            border-radius: 6px;
-            transition: all 0.2s;
-        }
-        
-        .stRadio > div > label:hover {
-            background: rgba(59, 130, 246, 0.1);
-        }
-        
-        /* Select boxes with better styling */
-        .stSelectbox {
-            margin-bottom: 1.5rem;
-        }
-        
-        .stSelectbox > label {
-            color: #93c5fd;
-            font-weight: 500;
-            font-size: 0.95rem;
-            margin-bottom: 0.75rem;
-            display: block;
-        }
-        
-        .stSelectbox > div > div {
-            background-color: rgba(30, 41, 59, 0.8);
-            border: 1px solid rgba(100, 200, 255, 0.2);
-            border-radius: 10px;
-            color: #e4e7eb;
-        }
-
-        /* Fix for Selectbox Text Visibility */
-        div[data-baseweb="select"] > div {
-            color: #e4e7eb !important;
-            background-color: rgba(30, 41, 59, 0.8) !important;
-        }
-        
-        div[data-baseweb="select"] span {
-            color: #e4e7eb !important;
-        }
-        
-        /* Fix for Dropdown Menu Visibility */
-        div[data-baseweb="popover"] {
-            background-color: #1e293b !important;
-            border: 1px solid rgba(100, 200, 255, 0.2);
-        }
-        
-        div[data-baseweb="menu"] {
-            background-color: #1e293b !important;
-        }
-        
-        div[data-baseweb="menu"] div {
-            color: #e4e7eb !important;
-        }
-        
-        div[data-baseweb="menu"] li:hover {
-            background-color: rgba(59, 130, 246, 0.2) !important;
-        }
-        
-        /* Number inputs */
-        .stNumberInput {
-            margin-bottom: 1.5rem;
-        }
-        
-        .stNumberInput > label {
-            color: #93c5fd;
-            font-weight: 500;
-            font-size: 0.95rem;
-            margin-bottom: 0.75rem;
-            display: block;
-        }
-        
-        .stNumberInput input {
-            background-color: rgba(30, 41, 59, 0.8);
-            border: 1px solid rgba(100, 200, 255, 0.2);
-            border-radius: 10px;
-            color: #e4e7eb;
-            font-family: 'JetBrains Mono', monospace;
-            padding: 0.625rem 1rem;
-        }
-        
-        /* Slider styling */
-        .stSlider {
-            margin-bottom: 1.5rem;
-            padding-top: 0.5rem;
-        }
-        
-        .stSlider > label {
-            color: #93c5fd;
-            font-weight: 500;
-            margin-bottom: 1rem;
-        }
-        
-        /* Tabs with modern design */
-        .stTabs {
-            margin-top: 2rem;
-            margin-bottom: 2rem;
-        }
-        
-        .stTabs [data-baseweb="tab-list"] {
-            gap: 12px;
-            background-color: transparent;
-            border-bottom: 2px solid rgba(100, 200, 255, 0.1);
-            padding-bottom: 0;
-        }
-
-        .stTabs [data-baseweb="tab"] {
-            height: 56px;
-            background: rgba(30, 41, 59, 0.5);
-            border-radius: 10px 10px 0 0;
-            padding: 12px 28px;
-            color: #94a3b8;
-            font-weight: 500;
-            font-size: 1rem;
-            border: 1px solid rgba(100, 200, 255, 0.1);
-            border-bottom: none;
-            transition: all 0.3s ease;
-        }
-        
-        .stTabs [data-baseweb="tab"]:hover {
-            background: rgba(59, 130, 246, 0.1);
-            color: #60a5fa;
-        }
-
-        .stTabs [aria-selected="true"] {
-            background: linear-gradient(135deg, rgba(59, 130, 246, 0.2) 0%, rgba(37, 99, 235, 0.2) 100%);
-            color: #60a5fa;
-            border-color: rgba(96, 165, 250, 0.3);
-            box-shadow: 0 -2px 12px rgba(59, 130, 246, 0.2);
-        }
-        
-        .stTabs [data-baseweb="tab-panel"] {
-            padding-top: 2rem;
-        }
-        
-        /* Metrics with better styling */
-        [data-testid="stMetricValue"] {
-            font-size: 2.25rem;
-            color: #60a5fa;
-            font-family: 'JetBrains Mono', monospace;
-            font-weight: 600;
-        }
-        
-        [data-testid="stMetricLabel"] {
-            color: #93c5fd;
-            font-weight: 500;
-            font-size: 0.95rem;
-            margin-bottom: 0.5rem;
-        }
-        
-        [data-testid="stMetric"] {
-            background: rgba(30, 41, 59, 0.5);
-            padding: 1.5rem;
-            border-radius: 12px;
-            border: 1px solid rgba(100, 200, 255, 0.1);
-        }
-        
-        /* Info/Success/Warning boxes */
-        .stAlert {
-            background: rgba(30, 41, 59, 0.8);
-            border-radius: 12px;
-            border-left: 4px solid #60a5fa;
-            padding: 1.25rem 1.75rem;
-            backdrop-filter: blur(10px);
-            margin: 1.5rem 0;
-        }
-        
-        /* Expander with better styling */
-        .streamlit-expanderHeader {
-            background: rgba(30, 41, 59, 0.6);
-            border-radius: 10px;
-            border: 1px solid rgba(100, 200, 255, 0.1);
-            color: #93c5fd;
-            font-weight: 500;
-            padding: 1rem 1.25rem;
-            margin-bottom: 0.5rem;
-        }
-        
-        .streamlit-expanderHeader:hover {
-            background: rgba(59, 130, 246, 0.1);
-            border-color: rgba(96, 165, 250, 0.3);
-        }
-        
-        .streamlit-expanderContent {
-            border: 1px solid rgba(100, 200, 255, 0.1);
-            border-top: none;
-            border-radius: 0 0 10px 10px;
-            padding: 1.5rem;
-            background: rgba(15, 23, 42, 0.5);
-        }
-        
-        /* Dataframe styling */
-        .stDataFrame {
-            margin: 1.5rem 0;
-        }
-        
-        [data-testid="stDataFrame"] {
-            background: rgba(30, 41, 59, 0.5);
-            border-radius: 10px;
-            border: 1px solid rgba(100, 200, 255, 0.1);
-        }
-        
-        /* Sidebar elements */
-        [data-testid="stSidebar"] h1,
-        [data-testid="stSidebar"] h2,
-        [data-testid="stSidebar"] h3 {
-            color: #60a5fa;
-        }
-        
-        [data-testid="stSidebar"] .stRadio > div {
-            background: rgba(59, 130, 246, 0.1);
-            border: 1px solid rgba(96, 165, 250, 0.2);
-        }
-        
-        /* Progress bar */
-        .stProgress > div > div > div {
-            background: linear-gradient(90deg, #3b82f6 0%, #8b5cf6 50%, #ec4899 100%);
-            border-radius: 10px;
-        }
-        
-        .stProgress > div > div {
-            background: rgba(30, 41, 59, 0.5);
-            border-radius: 10px;
-        }
-        
-        /* Checkbox */
-        .stCheckbox {
-            color: #93c5fd;
-            margin-bottom: 0.75rem;
-        }
-        
-        .stCheckbox > label {
-            padding: 0.5rem 0;
-        }
-        
-        /* Custom classes */
-        .lab-box {
-            background: rgba(30, 41, 59, 0.6);
-            padding: 2rem;
-            border-radius: 16px;
-            border: 1px solid rgba(100, 200, 255, 0.15);
-            margin-bottom: 2rem;
-            box-shadow: 0 4px 16px rgba(0, 0, 0, 0.2);
-            transition: all 0.3s ease;
-        }
-        
-        .lab-box:hover {
-            border-color: rgba(96, 165, 250, 0.3);
-            box-shadow: 0 8px 24px rgba(0, 0, 0, 0.3);
-        }
-        
-        .circuit-container {
-            background: rgba(15, 23, 42, 0.8);
-            padding: 2.5rem;
-            border-radius: 16px;
-            border: 1px solid rgba(100, 200, 255, 0.2);
-            text-align: center;
-            box-shadow: 0 8px 24px rgba(0, 0, 0, 0.3);
-            margin: 1.5rem 0;
-        }
-        
-        /* Horizontal rule */
-        hr {
-            border: none;
-            border-top: 1px solid rgba(100, 200, 255, 0.1);
-            margin: 2rem 0;
-        }
-        
-        /* Code blocks */
-        code {
-            background: rgba(30, 41, 59, 0.8);
-            padding: 0.25rem 0.5rem;
-            border-radius: 6px;
-            font-family: 'JetBrains Mono', monospace;
-            font-size: 0.9em;
-            color: #f472b6;
-        }
-        
-        pre {
-            background: rgba(15, 23, 42, 0.8);
-            padding: 1.5rem;
-            border-radius: 10px;
-            border: 1px solid rgba(100, 200, 255, 0.1);
-            overflow-x: auto;
-        }
-        
-        /* Scrollbar */
-        ::-webkit-scrollbar {
-            width: 12px;
-            height: 12px;
-        }
-        
-        ::-webkit-scrollbar-track {
-            background: rgba(15, 23, 42, 0.5);
-            border-radius: 10px;
-        }
-        
-        ::-webkit-scrollbar-thumb {
-            background: rgba(96, 165, 250, 0.3);
-            border-radius: 10px;
-            border: 2px solid rgba(15, 23, 42, 0.5);
-        }
-        
-        ::-webkit-scrollbar-thumb:hover {
-            background: rgba(96, 165, 250, 0.5);
-        }
-        
-        /* Column spacing */
-        [data-testid="column"] {
-            padding: 0 1rem;
-        }
-        
-        [data-testid="column"]:first-child {
-            padding-left: 0;
-        }
-        
-        [data-testid="column"]:last-child {
-            padding-right: 0;
-        }
-        
-        /* Responsive Design for Mobile/Tablets */
-        @media (max-width: 768px) {
-            .main .block-container {
-                padding: 2rem 1rem;
-            }
-            
-            h1 {
-                font-size: 2rem !important;
-            }
-            
-            h2 {
-                font-size: 1.5rem !important;
-                margin-top: 1.5rem !important;
-            }
-            
-            h3 {
-                font-size: 1.2rem !important;
-            }
-            
-            .lab-box {
-                padding: 1.25rem;
-            }
-            
-            [data-testid="stMetricValue"] {
-                font-size: 1.75rem;
-            }
-            
-            .circuit-container {
-                padding: 1rem;
-            }
-            
-            /* Stack columns on mobile */
-            [data-testid="column"] {
-                width: 100% !important;
-                margin-bottom: 1rem;
-            }
-        }
-        </style>
-    """, unsafe_allow_html=True)
+    css, version = _load_lab_stylesheet()
+    if _static_serving_enabled():
+        # The version query busts browser caches whenever lab.css changes
+        st.markdown(f'<link rel="stylesheet" href="{LAB_STYLESHEET_URL}?v={version}">',
+                    unsafe_allow_html=True)
+    else:
+        # Without static serving the bundled fonts are unreachable and the
+        # theme falls back to the system font stack.
+        st.markdown(f"<style>{css}</style>", unsafe_allow_html=True)
 
 def show_theory(title, content):
     """Displays a theory section in an expander."""
@@ -522,55 +59,417 @@ def render_experiment_layout(title, theory_content, simulation_func, tutor=None,
     """
     st.header(f"{title}")
     
-    # Create two columns: Main Content (Left) and Tutor (Right)
-    col_main, col_tutor = st.columns([3, 1])
-    
-    with col_main:
-        # Force scroll to top
-        components.html(
-            """
-            <script>
-                window.parent.document.querySelector('section.main').scrollTo(0, 0);
-            </script>
-            """, 
-            height=0
-        )
-
-        tab_theory, tab_sim = st.tabs(["📖 Theory", "🔬 Simulation"])
-        
-        with tab_theory:
-            st.markdown(theory_content)
-            
-        with tab_sim:
-            # Capture the context returned by the simulation
-            sim_context = simulation_func()
-            if sim_context is not None:
-                tutor_context = sim_context
+    # Force scroll to top
+    components.html(
+        """
+        <script>
+            window.parent.document.querySelector('section.main').scrollTo(0, 0);
+        </script>
+        """, 
+        height=0
+    )
+
+    # The simulation and its tutor form one fragment: a widget inside it
+    # reruns only this panel, not the page chrome, sidebar and stylesheet.
+    @st.fragment
+    def experiment_panel():
+        try:
+            # Create two columns: Main Content (Left) and Tutor (Right)
+            col_main, col_tutor = st.columns([3, 1])
+            context = tutor_context
+        
+            with col_main:
+                tab_theory, tab_sim = st.tabs(["📖 Theory", "🔬 Simulation"])
             
-    with col_tutor:
-        if tutor:
-            if tutor_steps_config and tutor_unit_id:
-                # New Advanced Tutor
-                tutor.guide(tutor_unit_id, tutor_steps_config, tutor_context)
-            elif steps:
-                # Legacy Tutor
-                tutor.render_right_panel(steps, current_step_index)
-            else:
-                st.info("Tutor is ready.")
+                with tab_theory:
+                    st.markdown(theory_content)
+                
+                with tab_sim:
+                    # Capture the context returned by the simulation
+                    sim_context = simulation_func()
+                    if sim_context is not None:
+                        context = sim_context
+                
+            with col_tutor:
+                if tutor:
+                    if tutor_steps_config and tutor_unit_id:
+                        # New Advanced Tutor
+                        tutor.guide(tutor_unit_id, tutor_steps_config, context)
+                    elif steps:
+                        # Legacy Tutor
+                        tutor.render_right_panel(steps, current_step_index)
+                    else:
+                        st.info("Tutor is ready.")
+        finally:
+            # Experiment state changes made during this run, queued for the
+            # state backend even when the panel stops early (st.rerun raises)
+            state_store.checkpoint_experiment_state()
 
-import base64
+    experiment_panel()
+
+def rerun_experiment():
+    """
+    Reruns the experiment panel after a state change. Inside a fragment rerun
+    only the panel is redrawn; during a full run the whole app reruns.
+    """
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
+
+# --- Experiment Navigation ---
+# st.tabs executes every panel on every rerun and only hides the inactive ones
+# in the browser. Units instead pick one experiment with a selector and run
+# just that one; experiment state lives in st.session_state, so it survives
+# while the experiment is not on screen.
+
+def keep_widget_state(*keys):
+    """
+    Keeps keyed widget values alive across reruns in which the widget is not
+    rendered (Streamlit drops the state of widgets missing from a run).
+    """
+    for key in keys:
+        if key in st.session_state:
+            st.session_state[key] = st.session_state[key]
+
+def widget_default(key, value):
+    """
+    Seeds a keyed widget's initial value through Session State and returns
+    the key. Widgets listed in `keep` take their default this way rather
+    than a `value` argument, which Streamlit flags once the value has also
+    been written through Session State.
+    """
+    if key not in st.session_state:
+        st.session_state[key] = value
+    return key
+
+def render_experiment_selector(unit_id, experiments, keep=()):
+    """
+    Tab-style experiment navigation that only executes the active experiment.
+    `experiments` maps labels to zero-argument callables; `keep` lists widget
+    keys of the unit's experiments whose values must persist while hidden.
+    """
+    keep_widget_state(*keep)
+    labels = list(experiments)
+    active = st.radio("Experiment", labels, horizontal=True,
+                      key=f"{unit_id}_active_experiment", label_visibility="collapsed")
+    st.markdown("---")
+    experiments[active]()
+
+# --- Trace Tables ---
+# Sequential experiments record a TraceBuffer (traces.py) per pulse. The
+# table shows one page of it, and only that page is built into a DataFrame
+# and sent to the browser.
+
+TRACE_PAGE_ROWS = 20
+
+def render_trace_table(trace, key, to_frame=None, page_rows=TRACE_PAGE_ROWS):
+    """
+    Paginated view of a TraceBuffer. `to_frame(start, stop)` builds the rows
+    of a page (defaults to trace.frame). While the newest page is selected,
+    the view follows new rows onto the next page.
+    """
+    pages = max(1, -(-len(trace) // page_rows))
+    page_key, pages_key = f"{key}_page", f"{key}_pages"
+    page = st.session_state.get(page_key, pages)
+    if page >= st.session_state.get(pages_key, pages) or page > pages:
+        page = pages
+    st.session_state[page_key] = page
+    st.session_state[pages_key] = pages
+
+    start = (page - 1) * page_rows
+    stop = min(start + page_rows, len(trace))
+    if pages > 1:
+        col_page, col_info = st.columns([1, 3])
+        col_page.number_input("Page", min_value=1, max_value=pages, step=1, key=page_key)
+        dropped = trace.first_step - 1
+        note = f" The oldest {dropped} pulses are no longer kept." if dropped else ""
+        col_info.caption(f"Steps {trace.first_step + start}–{trace.first_step + stop - 1} "
+                         f"of {trace.total}.{note}")
+    st.dataframe((to_frame or trace.frame)(start, stop), hide_index=True, use_container_width=True)
+
+# --- Truth Tables ---
+# Combinational experiments show their circuit's full truth table, computed
+# in one bit-parallel pass over all rows (truthtable.py) rather than one row
+# per rerun.
+
+def render_truth_table(circuit, current=None, label="📋 Full Truth Table"):
+    """Expander with every row of a netlist; `current` (input name -> bit) marks the row on screen."""
+    table = exhaustive(circuit)
+    with st.expander(label):
+        df = table.frame()
+        if current is not None:
+            df.insert(0, "", "")
+            df.iloc[table.row_index(current), 0] = "▶"
+        st.dataframe(df, hide_index=True, use_container_width=True)
+        ones = ", ".join(f"{name} = 1 in {table.ones(name)}/{table.rows} rows" for name in table.outputs)
+        st.caption(ones)
+
+# --- Timing Diagrams ---
+# Experiments with propagation delays run an EventSimulator (timing.py) and
+# show its waveforms as text, one character per time unit.
+
+def render_timing_diagram(sim, nets=None):
+    """Waveforms of a finished EventSimulator run, its settle time, hazards and filtered pulses."""
+    st.code(sim.waveform_text(nets), language=None)
+    st.caption(f"Settled {sim.settle_time()} time units after the inputs changed "
+               f"({sim.events} signal changes, {sim.mode} delays).")
+    for glitch in sim.glitches():
+        st.warning(f"⚡ {glitch['kind'].capitalize()} hazard on **{glitch['net']}**: "
+                   f"{glitch['transitions']} transitions between t={glitch['start']} and t={glitch['end']}.")
+    for net, time in sim.filtered:
+        st.info(f"🛡️ A pulse on **{net}** (due at t={time}) was shorter than the gate delay and was filtered out.")
+
+# --- Circuit Image Publishing ---
+# Rendered circuits are stored once under their content hash in ./static and
+# referenced by URL, so an unchanged image is never re-sent over the websocket
+# and browsers can reuse it across reruns and sessions. The directory is kept
+# under CIRCUIT_STATIC_MAX_BYTES by deleting the least recently used images;
+# file mtimes are the LRU clock, shared by every process serving the directory.
+
+CIRCUIT_STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "circuits")
+CIRCUIT_STATIC_URL = "app/static/circuits"
+CIRCUIT_STATIC_MAX_BYTES = int(os.environ.get("CIRCUIT_STATIC_MAX_BYTES", 64 * 1024 * 1024))
+_PUBLISH_TOUCH_SECONDS = 60  # how often a reused image's mtime is refreshed
+
+_IMAGE_EXTENSIONS = {'image/png': 'png', 'image/svg+xml': 'svg'}
+_published_images = {}  # filename -> time.monotonic() of its last mtime refresh
+_publish_lock = threading.Lock()
+_static_bytes_since_sweep = None  # None until this process has swept the directory once
+
+def image_mime_type(data):
+    """Returns the MIME type of a rendered circuit (PNG or SVG backend)."""
+    return 'image/svg+xml' if data.lstrip()[:4] == b'<svg' else 'image/png'
+
+def _static_serving_enabled():
+    try:
+        return bool(st.get_option("server.enableStaticServing"))
+    except Exception:
+        return False
+
+def publish_circuit_image(data):
+    """
+    Stores image bytes under their content hash and returns a stable URL.
+    Returns None when static serving is disabled or the directory is not writable.
+    """
+    global _static_bytes_since_sweep
+    if not _static_serving_enabled():
+        return None
+
+    digest = hashlib.sha256(data).hexdigest()[:32]
+    filename = f"{digest}.{_IMAGE_EXTENSIONS[image_mime_type(data)]}"
+    url = f"{CIRCUIT_STATIC_URL}/{filename}"
+    if _keep_published(filename):
+        return url
+
+    path = os.path.join(CIRCUIT_STATIC_DIR, filename)
+    try:
+        if os.path.exists(path):
+            os.utime(path)  # published by another process; mark it as used
+        else:
+            # Write to a temp file and rename so readers never see a partial image
+            os.makedirs(CIRCUIT_STATIC_DIR, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=CIRCUIT_STATIC_DIR, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+    except OSError:
+        return None
+
+    with _publish_lock:
+        _published_images[filename] = time.monotonic()
+        # Sweep on this process's first publish (clearing earlier deploys' images)
+        # and then after every tenth of the budget written
+        due = (_static_bytes_since_sweep is None
+               or _static_bytes_since_sweep + len(data) > CIRCUIT_STATIC_MAX_BYTES // 10)
+        _static_bytes_since_sweep = 0 if due else _static_bytes_since_sweep + len(data)
+    if due:
+        sweep_circuit_images()
+    return url
+
+def _keep_published(filename):
+    """
+    True if this process published filename and it is still on disk. Refreshes
+    the file's mtime at most every _PUBLISH_TOUCH_SECONDS.
+    """
+    now = time.monotonic()
+    with _publish_lock:
+        touched = _published_images.get(filename)
+        if touched is None:
+            return False
+        if now - touched < _PUBLISH_TOUCH_SECONDS:
+            return True
+        _published_images[filename] = now
+    try:
+        os.utime(os.path.join(CIRCUIT_STATIC_DIR, filename))
+        return True
+    except OSError:
+        # Evicted by another process; the caller publishes it again
+        with _publish_lock:
+            _published_images.pop(filename, None)
+        return False
+
+def sweep_circuit_images(max_bytes=None):
+    """Deletes least recently used images until static/circuits is under 90% of its budget."""
+    max_bytes = CIRCUIT_STATIC_MAX_BYTES if max_bytes is None else max_bytes
+    entries = []
+    total = 0
+    try:
+        scan = list(os.scandir(CIRCUIT_STATIC_DIR))
+    except OSError:
+        return
+    for entry in scan:
+        if entry.name.endswith(".tmp"):
+            continue
+        try:
+            stat = entry.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, entry.name))
+        total += stat.st_size
+    if total <= max_bytes:
+        return
+    entries.sort()
+    target = int(max_bytes * 0.9)
+    for _, size, name in entries:
+        if total <= target:
+            break
+        try:
+            os.remove(os.path.join(CIRCUIT_STATIC_DIR, name))
+        except OSError:
+            continue
+        total -= size
+        with _publish_lock:
+            _published_images.pop(name, None)
 
 def render_circuit_image(img_buf):
     """
-    Renders a matplotlib image buffer inside a styled HTML container.
+    Renders a circuit image buffer (PNG or SVG) inside a styled HTML container.
+    The image is referenced by its content-addressed URL when possible, falling
+    back to an inline base64 data URI.
     """
     if img_buf:
-        b64 = base64.b64encode(img_buf.getvalue()).decode()
+        data = img_buf.getvalue()
+        src = publish_circuit_image(data)
+        if src is None:
+            b64 = base64.b64encode(data).decode()
+            src = f"data:{image_mime_type(data)};base64,{b64}"
         html = f"""
             <div class='circuit-container'>
-                <img src='data:image/png;base64,{b64}' style='max-width: 100%; border-radius: 8px;'>
+                <img src='{src}' style='max-width: 100%; border-radius: 8px;'>
             </div>
         """
         st.markdown(html, unsafe_allow_html=True)
     else:
         st.warning("No circuit image generated.")
+
+# --- Circuit Sprite Sheets ---
+# For the small combinational experiments, every visual state is packed into
+# one sprite sheet per experiment. The sheet is published once (content-
+# addressed, so the browser fetches it once) and each interaction only sends
+# the cell position to show.
+
+SPRITE_EXPERIMENTS = ("u1_ex1", "u2_ex3", "u2_ex4", "u2_ex5")
+
+_SPRITE_RETRY_SECONDS = 60  # a sheet that failed to publish is rebuilt after this long
+
+_sprite_sheets = {}
+_sprite_failed_at = {}  # sheet key -> time.monotonic() of the last failed build
+_sprite_build_locks = {}
+_sprite_lock = threading.Lock()  # guards the dicts above, never held while rendering
+
+def get_sprite_sheet(experiment_id):
+    """
+    Builds (once per process and backend) the sprite sheet for an experiment.
+    Returns a dict with the sheet URL, grid layout and a cache-key -> cell index
+    map, or None if the sheet cannot be published. Failed builds are retried
+    after _SPRITE_RETRY_SECONDS rather than on every rerun.
+    """
+    import circuits
+
+    sheet_key = (experiment_id, circuits.CIRCUIT_BACKEND)
+    sheet = _cached_sprite_sheet(sheet_key)
+    if sheet is not None:
+        return sheet
+    with _sprite_lock:
+        if _sprite_failed_recently(sheet_key):
+            return None
+        build_lock = _sprite_build_locks.setdefault(sheet_key, threading.Lock())
+
+    # Concurrent requests for one sheet wait for a single build; other sheets build in parallel
+    with build_lock:
+        sheet = _cached_sprite_sheet(sheet_key)
+        if sheet is not None:
+            return sheet
+        with _sprite_lock:
+            if _sprite_failed_recently(sheet_key):
+                return None
+        sheet = _build_sprite_sheet(experiment_id)
+        with _sprite_lock:
+            if sheet is None:
+                _sprite_failed_at[sheet_key] = time.monotonic()
+            else:
+                _sprite_sheets[sheet_key] = sheet
+                _sprite_failed_at.pop(sheet_key, None)
+        return sheet
+
+def _cached_sprite_sheet(sheet_key):
+    # A sheet whose image was evicted from static/circuits is dropped and rebuilt
+    with _sprite_lock:
+        sheet = _sprite_sheets.get(sheet_key)
+    if sheet is not None and not _keep_published(sheet["url"].rsplit("/", 1)[-1]):
+        with _sprite_lock:
+            _sprite_sheets.pop(sheet_key, None)
+        return None
+    return sheet
+
+def _sprite_failed_recently(sheet_key):
+    # Caller holds _sprite_lock
+    failed_at = _sprite_failed_at.get(sheet_key)
+    return failed_at is not None and time.monotonic() - failed_at < _SPRITE_RETRY_SECONDS
+
+def _build_sprite_sheet(experiment_id):
+    """Renders every state of an experiment onto one sheet and publishes it."""
+    import circuits
+    from prerender import iter_render_states
+
+    images = []
+    index = {}
+    for exp_id, func_name, args, kwargs in iter_render_states():
+        if exp_id != experiment_id:
+            continue
+        draw_func = getattr(circuits, func_name)
+        key, _, _ = draw_func.cache_key(*args, **kwargs)
+        index[key] = len(images)
+        images.append(draw_func(*args, **kwargs).getvalue())
+
+    if not images:
+        return None
+    data, layout = circuits.compose_sprite_sheet(images)
+    url = publish_circuit_image(data)
+    return dict(layout, url=url, index=index) if url is not None else None
+
+def render_circuit_sprite(experiment_id, draw_func, *args, **kwargs):
+    """
+    Shows draw_func(*args, **kwargs) as a cell of the experiment's sprite sheet.
+    Falls back to render_circuit_image for states that are not on the sheet.
+    """
+    sheet = get_sprite_sheet(experiment_id)
+    key, _, _ = draw_func.cache_key(*args, **kwargs)
+    cell = sheet["index"].get(key) if sheet else None
+    if cell is None:
+        render_circuit_image(draw_func(*args, **kwargs))
+        return
+
+    cols, rows = sheet["cols"], sheet["rows"]
+    col, row = cell % cols, cell // cols
+    x = col * 100 / (cols - 1) if cols > 1 else 0
+    y = row * 100 / (rows - 1) if rows > 1 else 0
+    html = f"""
+        <div class='circuit-container'>
+            <div role='img' style='width: 100%; max-width: {sheet["cell_width"]}px; margin: 0 auto;
+                 aspect-ratio: {sheet["cell_width"]} / {sheet["cell_height"]}; border-radius: 8px;
+                 background: url({sheet["url"]}) {x:.4f}% {y:.4f}% / {cols * 100}% {rows * 100}% no-repeat;'></div>
+        </div>
+    """
+    st.markdown(html, unsafe_allow_html=True)